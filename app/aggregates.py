@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Agregados compactos em estruturas simples (listas e dicionários), prontos para JSON.
+
+Tudo sai do que as etapas já calcularam: tabelas de frequência e médias
+Likert do modelo de resultados, recortes do cubo de segmentos e faixas de
+tempo de planejamento dos logs. Nenhum dado por respondente é exportado, só
+contagens, somas e médias. Valores ausentes (NaN) viram None (null no JSON).
+"""
+import math
+
+from planning_logs import CATEGORIES, category_minutes
+from reliability import SECTIONS_PROF, SECTIONS_SUP
+from segment_cube import METHODS
+
+
+SECTIONS = {'professores': SECTIONS_PROF, 'supervisores': SECTIONS_SUP}
+
+# Perguntas de tempo estimado do formulário, por método
+TIME_QUESTIONS = {'Manual': 'P2.6_Tempo_Aula_Manual', 'Planilha': 'P2.7_Tempo_Aula_Planilha'}
+
+
+def json_number(value, digits=4):
+    """Número JSON (números NumPy viram `float`): arredondado se `digits`, ou None para ausente/NaN."""
+    if value is None:
+        return None
+    value = float(value)
+    if math.isnan(value):
+        return None
+    return value if digits is None else round(value, digits)
+
+
+def _count(value):
+    """Contagem JSON: inteira nas tabelas sem pesos, arredondada nas ponderadas."""
+    return int(value) if float(value).is_integer() else json_number(value)
+
+
+def frequency_aggregates(tables):
+    """{coluna: {'n', 'values', 'counts', 'percentages'}} das perguntas categóricas."""
+    out = {}
+    for column in tables.columns:
+        table = tables.get(column)
+        if table is None:
+            continue
+        out[column] = {
+            'n': _count(table.valid_n),
+            'values': [str(value) for value in table.counts.index],
+            'counts': [_count(count) for count in table.counts],
+            'percentages': [json_number(pct, 1) for pct in table.percentages],
+        }
+    return out
+
+
+def likert_aggregates(results, sections):
+    """Médias por método e teste de Friedman de cada pergunta, agrupadas por seção."""
+    if not results.likert:
+        return []
+    out = []
+    for prefix, name in sections.items():
+        questions = []
+        for question, item in results.likert.items():
+            if not question.startswith(prefix):
+                continue
+            entry = {'question': question, 'means': [json_number(item.means.get(m)) for m in METHODS]}
+            if item.friedman is not None:
+                n, chi2, p_holm, kendall_w = item.friedman
+                entry.update({'n': n, 'chi2': json_number(chi2), 'p_holm': json_number(p_holm, 6),
+                              'kendall_w': json_number(kendall_w)})
+            questions.append(entry)
+        if questions:
+            out.append({'section': prefix.rstrip('.'), 'name': name, 'questions': questions})
+    return out
+
+
+def _bins(counts):
+    """Contagens por faixa (na ordem de CATEGORIES), porcentagens e média pelos pontos médios."""
+    total = int(counts.sum())
+    mean = sum(category_minutes(c) * n for c, n in counts.items()) / total if total else None
+    return {
+        'counts': [int(n) for n in counts],
+        'percentages': [json_number(n / total * 100, 1) if total else 0 for n in counts],
+        'n': total,
+        'mean_minutes': json_number(mean, 2),
+    }
+
+
+def planning_time_aggregates(logs, frequencies=None, role='Professor'):
+    """Faixas de tempo por aula: Manual e Planilha estimados no formulário, PlanningApp pelos logs.
+
+    As faixas estimadas vêm do `process-logs.py` quando ele já rodou; senão,
+    das tabelas de frequência de P2.6 e P2.7.
+    """
+    methods = {}
+    for method, column in TIME_QUESTIONS.items():
+        counts = logs.estimated_bins(method) if logs is not None else None
+        if counts is None and frequencies is not None and column in frequencies:
+            counts = frequencies.get(column).counts.reindex(CATEGORIES, fill_value=0)
+        if counts is not None:
+            methods[method] = _bins(counts)
+    out = {'categories': list(CATEGORIES), 'methods': methods, 'role': role}
+    if logs is not None:
+        methods['PlanningApp'] = _bins(logs.bins(role))
+        methods['PlanningApp']['mean_minutes'] = json_number(logs.weighted_mean(role), 2)
+        out['overall_minutes'] = json_number(logs.overall_minutes, 2)
+        out['percentiles'] = {str(q): json_number(v, 2) for q, v in logs.percentiles(role).items()}
+    return out
+
+
+def group_aggregates(results, cube=None):
+    """Agregados de um grupo: N, frequências, Likert por seção e recortes do cubo."""
+    return {
+        'n': results.n_respondents,
+        'frequencies': frequency_aggregates(results.frequencies) if results.frequencies is not None else {},
+        'likert': likert_aggregates(results, SECTIONS.get(results.group, {})),
+        'segments': cube.to_compact() if cube is not None else None,
+    }
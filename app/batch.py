@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Modo em lote: várias escolas, cada uma processada como um shard independente.
+
+Cada subpasta de `<pasta_escolas>` é uma escola, com o seu `respostas.csv`
+e, se houver, `logs.json` e `margens_populacao.csv`:
+
+    escolas/
+    ├── ee_jose_augusto/
+    │   ├── respostas.csv
+    │   └── logs.json
+    └── outra_escola/
+        └── ...
+
+Uso (na pasta app/):
+
+    python batch.py escolas [--saida lote] [--processos 4] [--etapas process.py percentages.py ...]
+
+Cada escola ganha a sua pasta em `<saida>/<escola>/` (com `input/`,
+`output/`, `graficos_tcc/` e o `execucao.log` da escola) e roda o pipeline
+num processo do pool, com a pasta da escola como diretório de trabalho; cada
+processo atende uma única escola, então os caches das etapas nunca misturam
+escolas. Ao terminar, a escola grava `output/totais_escola.json` com os
+totais aditivos (somas e contagens Likert, frequências, palavras-chave e
+tempos dos logs), e o consolidado entre escolas (`<saida>/consolidado/`) sai
+da soma desses totais, sem juntar os dados por respondente.
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from incremental import OPEN_PREFIXES, GroupTotals
+from output_writer import writer
+from segment_cube import METHODS
+
+GROUPS = ['professores', 'supervisores']
+INPUT_FILES = ['respostas.csv', 'logs.json', 'margens_populacao.csv']
+TOTALS_FILE = 'totais_escola.json'
+
+
+def find_schools(root):
+    """{escola: pasta de entrada}, uma por subpasta com `respostas.csv`, em ordem alfabética."""
+    return {name: os.path.join(root, name) for name in sorted(os.listdir(root))
+            if os.path.isfile(os.path.join(root, name, 'respostas.csv'))}
+
+
+def prepare_shard(source, shard_dir):
+    """Cria a pasta da escola e copia os arquivos de entrada para `input/`."""
+    input_dir = os.path.join(shard_dir, 'input')
+    os.makedirs(input_dir, exist_ok=True)
+    for name in INPUT_FILES:
+        path = os.path.join(source, name)
+        if os.path.isfile(path):
+            shutil.copy2(path, os.path.join(input_dir, name))
+
+
+def school_totals():
+    """Totais aditivos da escola a partir dos resultados em memória (diretório atual = pasta da escola)."""
+    from planning_logs import planning_logs
+    from results import load_results
+
+    totals = {'groups': {}, 'logs': {}}
+    for group in GROUPS:
+        results = load_results(group)
+        group_totals = GroupTotals()
+        if results.n_respondents:
+            likert_columns = [f"{question}_{method}" for question in results.likert for method in METHODS]
+            open_columns = [col for col in results.data.columns if col.startswith(OPEN_PREFIXES[group])]
+            group_totals.add(results.data, likert_columns, results.frequencies.columns, open_columns)
+        totals['groups'][group] = group_totals.to_dict()
+    if os.path.exists('./input/logs.json'):
+        logs = planning_logs()
+        for role in logs.roles:
+            users, minutes, plannings = logs.totals(role)
+            totals['logs'][role] = {'users': users, 'minutes': minutes, 'plannings': plannings,
+                                    'bins': [int(n) for n in logs.bins(role)]}
+    return totals
+
+
+def run_shard(name, shard_dir, stages):
+    """Roda o pipeline de uma escola no processo atual; devolve (escola, segundos, erro ou None)."""
+    from pipeline import run_pipeline
+
+    inicio = time.perf_counter()
+    os.chdir(shard_dir)
+    if not os.path.exists('./input/logs.json'):
+        stages = [stage for stage in stages if stage != 'process-logs.py']
+    with open('execucao.log', 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            run_pipeline(stages)
+            writer.write_text(json.dumps(school_totals(), ensure_ascii=False), os.path.join('output', TOTALS_FILE))
+            writer.flush()
+        except (Exception, SystemExit) as e:
+            print(f"Erro: {e!r}")
+            return name, time.perf_counter() - inicio, repr(e)
+    return name, time.perf_counter() - inicio, None
+
+
+def load_school_totals(shard_dir):
+    """Totais gravados por `run_shard`: ({grupo: GroupTotals}, {função: totais dos logs})."""
+    with open(os.path.join(shard_dir, 'output', TOTALS_FILE), 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    return {group: GroupTotals(**totals) for group, totals in saved['groups'].items()}, saved['logs']
+
+
+def rollup(shards, output_dir):
+    """Consolidado entre escolas, somando os totais de cada uma."""
+    from planning_logs import CATEGORIES
+
+    merged = {group: GroupTotals() for group in GROUPS}
+    school_means = {group: [] for group in GROUPS}
+    time_rows = []
+    logs_total = {}
+    for name, shard_dir in shards.items():
+        groups, logs = load_school_totals(shard_dir)
+        for group, totals in groups.items():
+            merged[group] = merged[group].merge(totals)
+            if totals.rows:
+                means = totals.means().stack().rename('Media').reset_index()
+                means.columns = ['Pergunta', 'Metodo', 'Media']
+                means.insert(0, 'Escola', name)
+                means['N'] = [totals.counts.get(f"{q}_{m}", 0) for q, m in zip(means['Pergunta'], means['Metodo'])]
+                school_means[group].append(means)
+        for role, role_totals in logs.items():
+            time_rows.append({'Escola': name, 'Funcao': role, **_time_columns(role_totals, CATEGORIES)})
+            total = logs_total.setdefault(role, {'users': 0, 'minutes': 0.0, 'plannings': 0, 'bins': [0] * len(CATEGORIES)})
+            for key in ('users', 'minutes', 'plannings'):
+                total[key] += role_totals[key]
+            total['bins'] = [a + b for a, b in zip(total['bins'], role_totals['bins'])]
+    time_rows.extend({'Escola': 'Todas', 'Funcao': role, **_time_columns(total, CATEGORIES)}
+                     for role, total in logs_total.items())
+
+    for group, totals in merged.items():
+        if not totals.rows:
+            continue
+        writer.write_csv(totals.means(), os.path.join(output_dir, f"medias_{group}.csv"))
+        writer.write_csv(totals.frequency_summary(), os.path.join(output_dir, f"frequencias_{group}.csv"), index=False)
+        writer.write_csv(totals.keyword_summary(), os.path.join(output_dir, f"palavras_chave_{group}.csv"), index=False)
+        if school_means[group]:
+            writer.write_csv(pd.concat(school_means[group], ignore_index=True),
+                             os.path.join(output_dir, f"medias_por_escola_{group}.csv"), index=False)
+    if time_rows:
+        writer.write_csv(pd.DataFrame(time_rows), os.path.join(output_dir, "tempo_planejamento_escolas.csv"), index=False)
+    return merged
+
+
+def _time_columns(totals, categories):
+    """Colunas da tabela de tempo por escola: usuários, média por planejamento (minutos totais / planejamentos) e usuários por faixa."""
+    mean = totals['minutes'] / totals['plannings'] if totals['plannings'] else None
+    return {'Usuarios': totals['users'], 'Planejamentos': totals['plannings'],
+            'Media_Minutos': None if mean is None else round(mean, 2),
+            **dict(zip(categories, totals['bins']))}
+
+
+def run_batch(root, output_root, stages, max_workers=None):
+    """Processa todas as escolas de `root` em paralelo e gera o consolidado."""
+    schools = find_schools(root)
+    if not schools:
+        print(f"Nenhuma escola encontrada em {root} (subpastas com respostas.csv).")
+        return None
+    output_root = os.path.abspath(output_root)
+    shards = {name: os.path.join(output_root, name) for name in schools}
+    for name, source in schools.items():
+        prepare_shard(source, shards[name])
+
+    inicio = time.perf_counter()
+    workers = max_workers or min(os.cpu_count() or 1, len(shards))
+    print(f"Processando {len(shards)} escolas com {workers} processos...")
+    status = []
+    # Um processo novo por escola: os caches das etapas (resultados, frequências, cubo) são por processo
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        futures = [pool.submit(run_shard, name, shard_dir, stages) for name, shard_dir in shards.items()]
+        for future in futures:
+            name, elapsed, error = future.result()
+            print(f"  {name}: {'ok' if error is None else 'ERRO - ' + error} ({elapsed:.1f}s)")
+            status.append({'Escola': name, 'Status': 'ok' if error is None else error, 'Tempo_s': round(elapsed, 1)})
+
+    done = {name: shards[name] for name, row in zip(shards, status) if row['Status'] == 'ok'}
+    consolidated_dir = os.path.join(output_root, 'consolidado')
+    os.makedirs(consolidated_dir, exist_ok=True)
+    merged = rollup(done, consolidated_dir) if done else {}
+    for row in status:
+        if row['Escola'] in done:
+            groups, _ = load_school_totals(done[row['Escola']])
+            row.update({group.capitalize(): groups[group].rows for group in GROUPS if group in groups})
+    writer.write_csv(pd.DataFrame(status), os.path.join(consolidated_dir, "resumo_escolas.csv"), index=False)
+    writer.flush()
+    total_rows = {group: totals.rows for group, totals in merged.items()}
+    print(f"Consolidado de {len(done)} escolas em {consolidated_dir} "
+          f"({total_rows.get('professores', 0)} professores, {total_rows.get('supervisores', 0)} supervisores; "
+          f"{time.perf_counter() - inicio:.1f}s).")
+    return merged
+
+
+if __name__ == '__main__':
+    from pipeline import STAGES
+
+    parser = argparse.ArgumentParser(description="Processa várias escolas em paralelo e consolida os resultados.")
+    parser.add_argument('escolas', help="pasta com uma subpasta por escola (respostas.csv e logs.json)")
+    parser.add_argument('--saida', default='lote', help="pasta das saídas por escola e do consolidado")
+    parser.add_argument('--processos', type=int, default=None, help="processos em paralelo (padrão: núcleos)")
+    parser.add_argument('--etapas', nargs='+', default=STAGES, help="etapas do pipeline (padrão: todas)")
+    args = parser.parse_args()
+    if run_batch(args.escolas, args.saida, args.etapas, args.processos) is None:
+        sys.exit(1)
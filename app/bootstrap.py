@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Intervalos de confiança bootstrap para médias e diferenças entre métodos.
+
+As reamostragens são sorteadas em lote: cada bloco é uma matriz de índices
+(reamostragens x respondentes) aplicada de uma vez sobre a matriz de dados,
+sem laço Python por reamostragem. Os blocos podem ser distribuídos num pool de
+processos; cada bloco tem sua própria semente, derivada de uma
+`SeedSequence`, então o resultado é o mesmo com ou sem paralelismo.
+
+Os respondentes são reamostrados inteiros (todas as colunas juntas), o que
+preserva o pareamento entre métodos e permite calcular o IC das diferenças.
+"""
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RESAMPLES = 5000
+DEFAULT_SEED = 20251029
+CHUNK_SIZE = 500
+# Limite de células por bloco (reamostragens x respondentes x colunas) para conter a memória
+MAX_CHUNK_CELLS = 20_000_000
+# Abaixo deste volume (reamostragens x células) o pool custa mais do que economiza
+PARALLEL_THRESHOLD = 50_000_000
+
+
+def _stat_mean(sample):
+    """Média por coluna de cada reamostragem (ignora NaN)."""
+    counts = (~np.isnan(sample)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nansum(sample, axis=1) / np.where(counts > 0, counts, np.nan)
+
+
+def _stat_ratio(sample):
+    """Razão entre as somas da coluna 0 e da coluna 1 de cada reamostragem."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (np.nansum(sample[:, :, 0], axis=1) / np.nansum(sample[:, :, 1], axis=1))[:, None]
+
+
+STATISTICS = {'mean': _stat_mean, 'ratio': _stat_ratio}
+
+
+def _resample_chunk(values, statistic, seed_seq, size):
+    """Sorteia `size` reamostragens de uma vez e aplica a estatística."""
+    rng = np.random.default_rng(seed_seq)
+    n = values.shape[0]
+    indices = rng.integers(0, n, size=(size, n))
+    return STATISTICS[statistic](values[indices])
+
+
+def bootstrap(values, statistic='mean', n_resamples=DEFAULT_RESAMPLES, seed=DEFAULT_SEED, max_workers=None):
+    """Distribuição bootstrap (reamostragens x estatísticas) de uma matriz respondentes x colunas."""
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    if values.shape[0] == 0:
+        n_out = 1 if statistic == 'ratio' else values.shape[1]
+        return np.full((n_resamples, n_out), np.nan)
+
+    chunk_size = max(1, min(CHUNK_SIZE, MAX_CHUNK_CELLS // max(values.size, 1)))
+    sizes = [chunk_size] * (n_resamples // chunk_size)
+    if n_resamples % chunk_size:
+        sizes.append(n_resamples % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = max_workers if max_workers is not None else min(os.cpu_count() or 1, len(sizes))
+    if workers > 1 and values.size * n_resamples >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_resample_chunk, [values] * len(sizes), [statistic] * len(sizes), seeds, sizes))
+    else:
+        chunks = [_resample_chunk(values, statistic, s, size) for s, size in zip(seeds, sizes)]
+    return np.concatenate(chunks, axis=0)
+
+
+def percentile_interval(distribution, confidence=0.95):
+    """Limites inferior e superior (percentis) por coluna da distribuição bootstrap."""
+    alpha = (1 - confidence) / 2 * 100
+    with warnings.catch_warnings():
+        # Colunas sem nenhuma resposta resultam em NaN, sem aviso
+        warnings.simplefilter('ignore', RuntimeWarning)
+        lower, upper = np.nanpercentile(distribution, [alpha, 100 - alpha], axis=0)
+    return lower, upper
+
+
+def method_mean_intervals(data, questions, methods=('Manual', 'Planilha', 'PlanningApp'),
+                          pairs=(), confidence=0.95, **kwargs):
+    """IC bootstrap da média de cada (pergunta, método) e de cada diferença entre métodos.
+
+    Retorna uma tabela por pergunta com `<Metodo>`, `<Metodo>_IC_Inf`,
+    `<Metodo>_IC_Sup` e, para cada par (a, b), `<a>-<b>` com seus limites.
+    """
+    questions = list(questions)
+    columns = [f'{q}_{m}' for q in questions for m in methods]
+    present = [c in data.columns for c in columns]
+    values = np.column_stack([
+        pd.to_numeric(data[c], errors='coerce').to_numpy(dtype=float) if ok else np.full(len(data), np.nan)
+        for c, ok in zip(columns, present)
+    ]) if columns else np.empty((len(data), 0))
+
+    distribution = bootstrap(values, 'mean', **kwargs).reshape(-1, len(questions), len(methods))
+    point = _stat_mean(values[None, :, :])[0].reshape(len(questions), len(methods))
+    lower, upper = percentile_interval(distribution, confidence)
+
+    results = pd.DataFrame(index=pd.Index(questions, name='Pergunta'))
+    for m, method in enumerate(methods):
+        results[method] = point[:, m]
+        results[f'{method}_IC_Inf'] = lower[:, m]
+        results[f'{method}_IC_Sup'] = upper[:, m]
+    for a, b in pairs:
+        ia, ib = methods.index(a), methods.index(b)
+        diff_lower, diff_upper = percentile_interval(distribution[:, :, ia] - distribution[:, :, ib], confidence)
+        results[f'{a}-{b}'] = point[:, ia] - point[:, ib]
+        results[f'{a}-{b}_IC_Inf'] = diff_lower
+        results[f'{a}-{b}_IC_Sup'] = diff_upper
+    return results
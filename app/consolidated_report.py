@@ -1,32 +1,20 @@
 # -*- coding: utf-8 -*-
-import pandas as pd
 import numpy as np
 import os
+from output_writer import writer
+from results import load_results
+from report_render import build_document, save_document, save_essential_data
+from segment_cube import METHODS, load_cube
+from significance import format_p, significance_marker
+from reliability import interpret_alpha
+from text_pipeline import text_corpus
 from datetime import datetime
 
-# --- Carregar Dados Processados ---
+# --- Carregar Resultados ---
+# Em memória quando rodando no pipeline; os CSVs de output/ só são lidos quando a etapa roda sozinha
 try:
-    df_professores = pd.read_csv("./output/professores_processado.csv")
-    df_supervisores = pd.read_csv("./output/supervisores_processado.csv")
-    df_results_prof = pd.read_csv("./output/medias_professores.csv", index_col=0)
-    df_results_sup = pd.read_csv("./output/medias_supervisores.csv", index_col=0)
-    
-    # Carregar dados de porcentagens se existirem
-    try:
-        df_percent_prof = pd.read_csv("./output/percentagens_professores.csv")
-        df_percent_sup = pd.read_csv("./output/percentagens_supervisores.csv")
-    except FileNotFoundError:
-        df_percent_prof = None
-        df_percent_sup = None
-    
-    # Carregar análise qualitativa se existir
-    try:
-        df_qual_prof = pd.read_csv("./output/analise_qualitativa_professores.csv")
-        df_qual_sup = pd.read_csv("./output/analise_qualitativa_supervisores.csv")
-    except FileNotFoundError:
-        df_qual_prof = None
-        df_qual_sup = None
-    
+    results_prof = load_results('professores')
+    results_sup = load_results('supervisores')
     print("Dados processados carregados com sucesso.")
 except FileNotFoundError as e:
     print(f"Erro: Arquivo não encontrado: {e}")
@@ -35,110 +23,127 @@ except Exception as e:
     print(f"Erro ao carregar arquivos CSV: {e}")
     exit()
 
+df_professores = results_prof.data
+df_supervisores = results_sup.data
+
+# Cubo de segmentos (em memória quando rodando no pipeline)
+try:
+    writer.wait_for("./output/cubo_segmentos_professores.csv", "./output/cubo_segmentos_supervisores.csv")
+    cube_prof = load_cube('professores', "./output/cubo_segmentos_professores.csv")
+    cube_sup = load_cube('supervisores', "./output/cubo_segmentos_supervisores.csv")
+except FileNotFoundError:
+    cube_prof = None
+    cube_sup = None
+
+# Tabelas de frequência (reaproveitadas do process.py quando rodando no pipeline)
+freq_prof = results_prof.frequencies
+freq_sup = results_sup.frequencies
+
 # --- Funções para Gerar Relatório ---
-def generate_profile_summary(data, prefix, title):
+# Perguntas de perfil na ordem do relatório: (sufixo da coluna, rótulo)
+profile_questions = [
+    ('1.1_Tempo_Servico', 'Tempo de Serviço'),
+    ('1.2_Segmentos', 'Segmentos de Atuação'),
+    ('1.3_Conforto_Tec', 'Conforto com Tecnologia'),
+    ('1.4_Num_Turmas', 'Número de Turmas'),
+    ('1.5_Num_Planos', 'Número de Planos/Cronogramas'),
+    ('1.6_Outra_Escola_Metodo', 'Atuação em Outras Escolas'),  # apenas para professores
+]
+
+def generate_profile_summary(tables, prefix, title):
     """Gera resumo do perfil dos participantes."""
     summary = []
     
-    # P1.1 - Tempo de Serviço
-    if f'{prefix}1.1_Tempo_Servico' in data.columns:
-        col = f'{prefix}1.1_Tempo_Servico'
-        clean_data = data.dropna(subset=[col])
-        if not clean_data.empty:
-            counts = clean_data[col].value_counts()
-            percentages = (counts / len(clean_data) * 100).round(1)
-            summary.append(f"Tempo de Serviço (N={len(clean_data)}):")
-            for value, count in counts.items():
-                pct = percentages[value]
-                summary.append(f"  {value}: {count} ({pct}%)")
-            summary.append("")
+    for suffix, label in profile_questions:
+        if suffix == '1.6_Outra_Escola_Metodo' and prefix != 'P':
+            continue
+        table = tables.get(f'{prefix}{suffix}')
+        if table is None:
+            continue
+        summary.append(f"{label} (N={table.valid_n}):")
+        for value, count in table.counts.items():
+            pct = table.percentages[value]
+            summary.append(f"  {value}: {count} ({pct}%)")
+        summary.append("")
     
-    # P1.2 - Segmentos
-    if f'{prefix}1.2_Segmentos' in data.columns:
-        col = f'{prefix}1.2_Segmentos'
-        clean_data = data.dropna(subset=[col])
-        if not clean_data.empty:
-            counts = clean_data[col].value_counts()
-            percentages = (counts / len(clean_data) * 100).round(1)
-            summary.append(f"Segmentos de Atuação (N={len(clean_data)}):")
-            for value, count in counts.items():
-                pct = percentages[value]
-                summary.append(f"  {value}: {count} ({pct}%)")
-            summary.append("")
+    return summary
+
+def generate_likert_summary(likert, title):
+    """Gera resumo das médias Likert, com os testes pareados quando disponíveis."""
+    summary = []
+    summary.append(f"{title}:")
+    summary.append("Médias de Concordância (1=Discordo Totalmente, 5=Concordo Totalmente)")
+    summary.append("-" * 80)
     
-    # P1.3 - Conforto com Tecnologia
-    if f'{prefix}1.3_Conforto_Tec' in data.columns:
-        col = f'{prefix}1.3_Conforto_Tec'
-        clean_data = data.dropna(subset=[col])
-        if not clean_data.empty:
-            counts = clean_data[col].value_counts()
-            percentages = (counts / len(clean_data) * 100).round(1)
-            summary.append(f"Conforto com Tecnologia (N={len(clean_data)}):")
-            for value, count in counts.items():
-                pct = percentages[value]
-                summary.append(f"  {value}: {count} ({pct}%)")
-            summary.append("")
+    for question, item in likert.items():
+        summary.append(f"{question}:")
+        for method, mean in item.means.items():
+            summary.append(f"  {method}: {mean:.2f}")
+        if item.friedman is not None:
+            n, chi2, p_holm, kendall_w = item.friedman
+            summary.append(f"  Friedman: Qui2(2)={chi2:.2f}, p(Holm)={format_p(p_holm)} "
+                           f"{significance_marker(p_holm)}, W de Kendall={kendall_w:.2f} (N={n})")
+            for a, b, z, p_holm, r in item.pairs:
+                summary.append(f"  Wilcoxon {a} vs {b}: Z={z:.2f}, p(Holm)={format_p(p_holm)} "
+                               f"{significance_marker(p_holm)}, r={r:.2f}")
+        summary.append("")
     
-    # P1.4 - Número de Turmas
-    if f'{prefix}1.4_Num_Turmas' in data.columns:
-        col = f'{prefix}1.4_Num_Turmas'
-        clean_data = data.dropna(subset=[col])
-        if not clean_data.empty:
-            counts = clean_data[col].value_counts()
-            percentages = (counts / len(clean_data) * 100).round(1)
-            summary.append(f"Número de Turmas (N={len(clean_data)}):")
-            for value, count in counts.items():
-                pct = percentages[value]
-                summary.append(f"  {value}: {count} ({pct}%)")
-            summary.append("")
+    return summary
+
+def generate_segment_summary(cube, question, dimensions, title):
+    """Gera resumo de uma pergunta Likert por segmento de perfil, a partir do cubo."""
+    if cube is None:
+        return [f"{title}: Cubo de segmentos não disponível.", ""]
     
-    # P1.5 - Número de Planos
-    if f'{prefix}1.5_Num_Planos' in data.columns:
-        col = f'{prefix}1.5_Num_Planos'
-        clean_data = data.dropna(subset=[col])
-        if not clean_data.empty:
-            counts = clean_data[col].value_counts()
-            percentages = (counts / len(clean_data) * 100).round(1)
-            summary.append(f"Número de Planos/Cronogramas (N={len(clean_data)}):")
-            for value, count in counts.items():
-                pct = percentages[value]
-                summary.append(f"  {value}: {count} ({pct}%)")
-            summary.append("")
+    summary = []
+    summary.append(f"{title}:")
+    summary.append(f"Médias de {question} por segmento (1=Discordo Totalmente, 5=Concordo Totalmente)")
+    summary.append("-" * 80)
     
-    # P1.6 - Outra Escola (apenas para professores)
-    if prefix == 'P' and f'{prefix}1.6_Outra_Escola_Metodo' in data.columns:
-        col = f'{prefix}1.6_Outra_Escola_Metodo'
-        clean_data = data.dropna(subset=[col])
-        if not clean_data.empty:
-            counts = clean_data[col].value_counts()
-            percentages = (counts / len(clean_data) * 100).round(1)
-            summary.append(f"Atuação em Outras Escolas (N={len(clean_data)}):")
-            for value, count in counts.items():
-                pct = percentages[value]
-                summary.append(f"  {value}: {count} ({pct}%)")
-            summary.append("")
+    for dimension in dimensions:
+        try:
+            breakdown = cube.breakdown(dimension, question)
+        except KeyError:
+            continue
+        summary.append(f"{dimension}:")
+        methods = [method for method in METHODS if method in breakdown.columns]
+        for segment, n, row in zip(breakdown.index, breakdown['N'], breakdown[methods].to_numpy(dtype=float)):
+            means = [f"{method} {mean:.2f}" for method, mean in zip(methods, row) if not np.isnan(mean)]
+            summary.append(f"  {segment} (N={int(n)}): " + " | ".join(means))
+        summary.append("")
     
     return summary
 
-def generate_likert_summary(df_means, title):
-    """Gera resumo das médias Likert."""
+def generate_reliability_summary(reliability, title, min_item_total=0.3):
+    """Gera resumo do alfa de Cronbach por seção e método, com itens de baixa correlação item-total."""
+    if not reliability:
+        return [f"{title}: Confiabilidade não disponível.", ""]
+    
     summary = []
     summary.append(f"{title}:")
-    summary.append("Médias de Concordância (1=Discordo Totalmente, 5=Concordo Totalmente)")
+    summary.append("Alfa de Cronbach por seção e método (exclusão listwise)")
     summary.append("-" * 80)
     
-    for idx, row in df_means.iterrows():
-        summary.append(f"{idx}:")
-        for method in ['Manual', 'Planilha', 'PlanningApp']:
-            if method in row and not pd.isna(row[method]):
-                summary.append(f"  {method}: {row[method]:.2f}")
+    for section in reliability:
+        summary.append(f"{section.section} - {section.name} ({section.n_items} itens):")
+        for method, alpha, n, item_totals in section.methods:
+            line = f"  {method}: α = {'n/d' if alpha is None else f'{alpha:.2f}'} ({interpret_alpha(alpha)}, N={n})"
+            weak = [item for item, correlation in item_totals if correlation < min_item_total]
+            if weak:
+                line += f" | item-total < {min_item_total}: " + ", ".join(weak)
+            summary.append(line)
         summary.append("")
     
     return summary
 
-def generate_qualitative_summary(df_qual, title):
-    """Gera resumo da análise qualitativa."""
-    if df_qual is None or df_qual.empty:
+def generate_qualitative_summary(keywords, title, index=None, top=5):
+    """Gera resumo da análise qualitativa.
+
+    `keywords` vem agrupado por pergunta e ordenado por frequência. Com
+    `index` (índice invertido das respostas abertas), cada tema vem com até
+    duas citações de respostas que mencionam a palavra.
+    """
+    if not keywords:
         return [f"{title}: Nenhum dado qualitativo disponível."]
     
     summary = []
@@ -146,26 +151,50 @@ def generate_qualitative_summary(df_qual, title):
     summary.append("Principais Temas Identificados")
     summary.append("-" * 50)
     
-    # Agrupar por pergunta
-    for pergunta in df_qual['Pergunta'].unique():
-        pergunta_data = df_qual[df_qual['Pergunta'] == pergunta]
-        summary.append(f"\n{pergunta}:")
+    for question, items in keywords.items():
+        summary.append(f"\n{question}:")
         
-        # Pegar os 5 temas mais frequentes
-        top_themes = pergunta_data.nlargest(5, 'Frequencia')
-        for _, row in top_themes.iterrows():
-            summary.append(f"  {row['Palavra_Chave']}: {row['Frequencia']} menções ({row['Porcentagem']}%)")
+        # Os `top` temas mais frequentes
+        for item in items[:top]:
+            summary.append(f"  {item.keyword}: {item.frequency} menções ({item.percentage}%)")
+            if index is not None:
+                for quote in index.quotes(item.keyword, question=question):
+                    summary.append(f'      "{quote}"')
+    
+    return summary
+
+def generate_theme_summary(themes, title):
+    """Gera resumo dos temas encontrados pelo agrupamento das respostas (TF-IDF + k-means)."""
+    if not themes:
+        return []
+    
+    summary = []
+    summary.append(f"\n{title}:")
+    summary.append("-" * 50)
+    for question, items in themes.items():
+        summary.append(f"\n{question}:")
+        for theme in items:
+            summary.append(f"  Tema {theme.number} - {theme.responses} respostas ({theme.percentage}%): {theme.terms}")
+            for example in theme.examples:
+                summary.append(f'      "{example}"')
     
     return summary
 
 # --- Gerar Relatório Consolidado ---
 print("Gerando relatório consolidado...")
 
+# Formatos gerados além do texto
+REPORT_FORMATS = ['.md', '.html', '.tex']
+
+prof_columns = ['P1.1_Tempo_Servico', 'P1.2_Segmentos', 'P1.3_Conforto_Tec', 'P1.4_Num_Turmas', 'P1.5_Num_Planos', 'P1.6_Outra_Escola_Metodo']
+sup_columns = ['S1.1_Funcao_Gestora', 'S1.2_Tempo_Gestao', 'S1.3_Outras_Plataformas']
+
 report = []
 report.append("=" * 80)
 report.append("RELATÓRIO CONSOLIDADO - ANÁLISE DE DADOS TCC")
 report.append("=" * 80)
-report.append(f"Data de geração: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+generated_at = f"Data de geração: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+report.append(generated_at)
 report.append("")
 
 # Seção 4.1 - Perfil dos Participantes
@@ -173,12 +202,12 @@ report.append("SEÇÃO 4.1 - PERFIL DOS PARTICIPANTES")
 report.append("=" * 50)
 
 # Professores
-prof_profile = generate_profile_summary(df_professores, 'P', "PROFESSORES (N=28)")
+prof_profile = generate_profile_summary(freq_prof, 'P', f"PROFESSORES (N={len(df_professores)})")
 report.extend(prof_profile)
 
 # Supervisores
 if not df_supervisores.empty:
-    sup_profile = generate_profile_summary(df_supervisores, 'S', "SUPERVISORES (N=4)")
+    sup_profile = generate_profile_summary(freq_sup, 'S', f"SUPERVISORES (N={len(df_supervisores)})")
     report.extend(sup_profile)
 else:
     report.append("SUPERVISORES: Nenhum dado disponível.")
@@ -188,27 +217,53 @@ report.append("SEÇÕES 4.2 a 4.5 - ANÁLISE COMPARATIVA")
 report.append("=" * 50)
 
 # Médias dos professores
-prof_likert = generate_likert_summary(df_results_prof, "MÉDIAS DE CONCORDÂNCIA - PROFESSORES")
+prof_likert = generate_likert_summary(results_prof.likert, "MÉDIAS DE CONCORDÂNCIA - PROFESSORES")
 report.extend(prof_likert)
 
 # Médias dos supervisores
-if not df_results_sup.empty:
-    sup_likert = generate_likert_summary(df_results_sup, "MÉDIAS DE CONCORDÂNCIA - SUPERVISORES")
+if results_sup.likert:
+    sup_likert = generate_likert_summary(results_sup.likert, "MÉDIAS DE CONCORDÂNCIA - SUPERVISORES")
     report.extend(sup_likert)
 
+# Confiabilidade das seções como escalas
+report.append("CONFIABILIDADE DAS ESCALAS")
+report.append("=" * 50)
+report.extend(generate_reliability_summary(results_prof.reliability, "CONFIABILIDADE - PROFESSORES"))
+if not df_supervisores.empty:
+    report.extend(generate_reliability_summary(results_sup.reliability, "CONFIABILIDADE - SUPERVISORES"))
+
+# Recortes por segmento de perfil (cubo pré-calculado)
+report.append("ANÁLISE POR SEGMENTO DE PERFIL")
+report.append("=" * 50)
+report.extend(generate_segment_summary(cube_prof, 'P3.6_Satisfacao_Geral', prof_columns,
+                                       "SATISFAÇÃO GERAL POR SEGMENTO - PROFESSORES"))
+if not df_supervisores.empty:
+    report.extend(generate_segment_summary(cube_sup, 'S3.7_Satisfacao_Geral', sup_columns,
+                                           "SATISFAÇÃO GERAL POR SEGMENTO - SUPERVISORES"))
+
 # Seção 4.6 - Síntese Qualitativa
 report.append("SEÇÃO 4.6 - SÍNTESE QUALITATIVA")
 report.append("=" * 50)
 
 # Análise qualitativa dos professores
-prof_qual = generate_qualitative_summary(df_qual_prof, "ANÁLISE QUALITATIVA - PROFESSORES")
+# Índice palavra -> respostas (reaproveitado do qualitative_analysis.py quando rodando no pipeline)
+prof_open_ended_cols = [col for col in df_professores.columns if col.startswith('P6.')]
+sup_index = None
+prof_index = text_corpus('professores', df_professores, prof_open_ended_cols).index
+prof_qual = generate_qualitative_summary(results_prof.keywords, "ANÁLISE QUALITATIVA - PROFESSORES", prof_index)
 report.extend(prof_qual)
 
 # Análise qualitativa dos supervisores
-if df_qual_sup is not None:
-    sup_qual = generate_qualitative_summary(df_qual_sup, "ANÁLISE QUALITATIVA - SUPERVISORES")
+if results_sup.keywords is not None:
+    sup_open_ended_cols = [col for col in df_supervisores.columns if col.startswith('S7.')]
+    sup_index = text_corpus('supervisores', df_supervisores, sup_open_ended_cols).index
+    sup_qual = generate_qualitative_summary(results_sup.keywords, "ANÁLISE QUALITATIVA - SUPERVISORES", sup_index)
     report.extend(sup_qual)
 
+# Temas por agrupamento das respostas
+report.extend(generate_theme_summary(results_prof.themes, "TEMAS POR AGRUPAMENTO - PROFESSORES"))
+report.extend(generate_theme_summary(results_sup.themes, "TEMAS POR AGRUPAMENTO - SUPERVISORES"))
+
 # Resumo dos Ns utilizados
 report.append("RESUMO DOS Ns UTILIZADOS NO CÁLCULO")
 report.append("=" * 50)
@@ -220,60 +275,24 @@ else:
 
 # Salvar relatório
 report_text = "\n".join(report)
-with open("output/relatorio_consolidado.txt", "w", encoding="utf-8") as f:
-    f.write(report_text)
+writer.write_text(report_text, "output/relatorio_consolidado.txt")
 
 print("Relatório consolidado salvo em: output/relatorio_consolidado.txt")
 
+# --- Relatório em Markdown, HTML e LaTeX ---
+# Mesmas tabelas agregadas, sem refazer a análise; os modelos de cada formato são compilados uma vez
+report_groups = [('Professores', results_prof, prof_columns, prof_index),
+                 ('Supervisores', results_sup, sup_columns, sup_index)]
+document = build_document(report_groups, "Relatório Consolidado - Análise de Dados TCC", generated_at)
+for extension in REPORT_FORMATS:
+    save_document(document, f"output/relatorio_consolidado{extension}")
+    print(f"Relatório consolidado salvo em: output/relatorio_consolidado{extension}")
+
 # --- Gerar CSV com dados essenciais para o TCC ---
 print("Gerando dados essenciais para o TCC...")
 
-# Dados essenciais para Seção 4.1
-essential_data = []
-
-# Professores - Perfil
-prof_columns = ['P1.1_Tempo_Servico', 'P1.2_Segmentos', 'P1.3_Conforto_Tec', 'P1.4_Num_Turmas', 'P1.5_Num_Planos', 'P1.6_Outra_Escola_Metodo']
-for col in prof_columns:
-    if col in df_professores.columns:
-        clean_data = df_professores.dropna(subset=[col])
-        if not clean_data.empty:
-            counts = clean_data[col].value_counts()
-            percentages = (counts / len(clean_data) * 100).round(1)
-            for value, count in counts.items():
-                pct = percentages[value]
-                essential_data.append({
-                    'Categoria': 'Professores',
-                    'Pergunta': col,
-                    'Resposta': value,
-                    'Contagem': count,
-                    'Porcentagem': pct,
-                    'Total_Respondentes': len(clean_data)
-                })
-
-# Supervisores - Perfil
-if not df_supervisores.empty:
-    sup_columns = ['S1.1_Funcao_Gestora', 'S1.2_Tempo_Gestao', 'S1.3_Outras_Plataformas']
-    for col in sup_columns:
-        if col in df_supervisores.columns:
-            clean_data = df_supervisores.dropna(subset=[col])
-            if not clean_data.empty:
-                counts = clean_data[col].value_counts()
-                percentages = (counts / len(clean_data) * 100).round(1)
-                for value, count in counts.items():
-                    pct = percentages[value]
-                    essential_data.append({
-                        'Categoria': 'Supervisores',
-                        'Pergunta': col,
-                        'Resposta': value,
-                        'Contagem': count,
-                        'Porcentagem': pct,
-                        'Total_Respondentes': len(clean_data)
-                    })
-
-# Salvar dados essenciais
-if essential_data:
-    df_essential = pd.DataFrame(essential_data)
-    df_essential.to_csv("output/dados_essenciais_tcc.csv", index=False)
+# Dados essenciais para Seção 4.1: frequências de perfil de cada grupo, gravadas linha a linha
+if save_essential_data(report_groups, "output/dados_essenciais_tcc.csv"):
     print("Dados essenciais salvos em: output/dados_essenciais_tcc.csv")
 
 print("\n" + "=" * 80)
@@ -281,6 +300,7 @@ print("RELATÓRIO CONSOLIDADO GERADO COM SUCESSO")
 print("=" * 80)
 print("Arquivos gerados:")
 print("- output/relatorio_consolidado.txt")
+print("- output/relatorio_consolidado.md, .html e .tex")
 print("- output/dados_essenciais_tcc.csv")
 print("- Gráficos com porcentagens na pasta graficos_tcc/")
 print("- Análise qualitativa na pasta output/")
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Painel HTML estático (output/painel.html) com os agregados embutidos em JSON.
+
+Um único arquivo, sem servidor e sem bibliotecas externas: os agregados
+compactos (frequências, médias Likert por seção, recortes do cubo de
+segmentos e faixas de tempo de planejamento) vão num bloco JSON da própria
+página, e os gráficos são montados no navegador a partir dele. Trocar de
+grupo, pergunta ou recorte (inclusive juntar segmentos, somando as somas e
+contagens do cubo) é instantâneo e não gera imagens novas.
+"""
+import json
+from datetime import datetime
+
+from output_writer import writer
+from aggregates import group_aggregates, planning_time_aggregates
+from planning_logs import planning_logs
+from results import load_results
+from segment_cube import load_cube
+
+DASHBOARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Painel - Avaliação dos Métodos de Planejamento</title>
+<style>
+body{font-family:sans-serif;margin:0;color:#222;background:#f6f7f9}
+header{background:#2c3e50;color:#fff;padding:.8em 1.5em}
+header h1{font-size:1.3em;margin:0}
+header small{opacity:.8}
+nav{display:flex;gap:.3em;padding:.6em 1.5em;background:#e4e7eb;align-items:center;flex-wrap:wrap}
+nav button{border:0;padding:.45em .9em;border-radius:4px;background:#fff;cursor:pointer}
+nav button.ativo{background:#2c3e50;color:#fff}
+nav label{margin-left:auto}
+main{padding:1em 1.5em;max-width:70em}
+select{padding:.3em;margin:0 .5em .8em 0}
+.barra{display:flex;align-items:center;margin:.15em 0;font-size:.9em}
+.barra .rotulo{width:16em;text-align:right;padding-right:.6em;overflow:hidden;text-overflow:ellipsis;white-space:nowrap}
+.barra .trilho{flex:1;background:#e4e7eb;height:1.1em;border-radius:2px}
+.barra .valor{height:100%;border-radius:2px}
+.barra .numero{width:9em;padding-left:.6em}
+.pergunta{background:#fff;border-radius:6px;padding:.6em 1em;margin:.6em 0}
+.pergunta h3{font-size:.95em;margin:.2em 0 .4em}
+.nota{color:#666;font-size:.85em}
+.legenda span{display:inline-block;margin-right:1em;font-size:.85em}
+.legenda i{display:inline-block;width:.9em;height:.9em;margin-right:.3em;vertical-align:middle}
+.segmentos label{display:inline-block;margin:0 1em .3em 0;font-size:.9em}
+</style>
+</head>
+<body>
+<header><h1>Avaliação dos Métodos de Planejamento de Aula</h1><small id="gerado"></small></header>
+<nav id="abas">
+<button data-aba="perfil" class="ativo">Perfil</button>
+<button data-aba="likert">Escalas Likert</button>
+<button data-aba="segmentos">Segmentos</button>
+<button data-aba="tempo">Tempo de planejamento</button>
+<label>Grupo <select id="grupo"></select></label>
+</nav>
+<main id="conteudo"></main>
+<script type="application/json" id="dados">__DADOS__</script>
+<script>
+"use strict";
+const DADOS = JSON.parse(document.getElementById('dados').textContent);
+const METODOS = ['Manual', 'Planilha', 'PlanningApp'];
+const CORES = {Manual: '#ff7f0e', Planilha: '#1f77b4', PlanningApp: '#2ca02c'};
+const estado = {aba: 'perfil', grupo: Object.keys(DADOS.groups)[0]};
+const conteudo = document.getElementById('conteudo');
+
+function el(tag, attrs, ...filhos) {
+  const node = document.createElement(tag);
+  Object.entries(attrs || {}).forEach(([k, v]) => k === 'text' ? node.textContent = v : node.setAttribute(k, v));
+  filhos.forEach(f => f && node.appendChild(f));
+  return node;
+}
+function fmt(v, casas) { return v === null || v === undefined ? 'n/d' : v.toFixed(casas); }
+function barra(rotulo, valor, maximo, texto, cor) {
+  const trilho = el('div', {class: 'trilho'},
+    el('div', {class: 'valor', style: `width:${maximo ? Math.max(0, valor || 0) / maximo * 100 : 0}%;background:${cor || '#2c3e50'}`}));
+  return el('div', {class: 'barra'}, el('span', {class: 'rotulo', title: rotulo, text: rotulo}), trilho,
+            el('span', {class: 'numero', text: texto}));
+}
+function seletor(opcoes, atual, aoMudar) {
+  const s = el('select');
+  opcoes.forEach(([valor, rotulo]) => s.appendChild(el('option', {value: valor, text: rotulo})));
+  if (atual !== undefined) s.value = atual;
+  s.addEventListener('change', () => aoMudar(s.value));
+  return s;
+}
+function legenda() {
+  const l = el('div', {class: 'legenda'});
+  METODOS.forEach(m => l.appendChild(el('span', {}, el('i', {style: `background:${CORES[m]}`}), document.createTextNode(m))));
+  return l;
+}
+function caixa(titulo, ...filhos) { return el('div', {class: 'pergunta'}, el('h3', {text: titulo}), ...filhos); }
+
+const abas = {
+  perfil(g) {
+    const colunas = Object.keys(g.frequencies);
+    if (!colunas.length) return [el('p', {text: 'Sem perguntas categóricas.'})];
+    estado.perfil = colunas.includes(estado.perfil) ? estado.perfil : colunas[0];
+    const t = g.frequencies[estado.perfil];
+    const maximo = Math.max(...t.counts);
+    const grafico = caixa(`${estado.perfil} (N=${t.n})`,
+      ...t.values.map((v, i) => barra(v, t.counts[i], maximo, `${t.counts[i]} (${t.percentages[i]}%)`)));
+    return [seletor(colunas.map(c => [c, c]), estado.perfil, v => { estado.perfil = v; desenhar(); }), grafico];
+  },
+  likert(g) {
+    if (!g.likert.length) return [el('p', {text: 'Sem médias Likert.'})];
+    const secoes = g.likert.map(s => s.section);
+    estado.secao = secoes.includes(estado.secao) ? estado.secao : secoes[0];
+    const secao = g.likert.find(s => s.section === estado.secao);
+    const saida = [seletor(g.likert.map(s => [s.section, `${s.section} - ${s.name}`]), estado.secao,
+                           v => { estado.secao = v; desenhar(); }), legenda()];
+    secao.questions.forEach(q => {
+      const teste = q.p_holm === undefined ? 'Sem teste de Friedman.' :
+        `Friedman: Qui2(2)=${fmt(q.chi2, 2)}, p(Holm)=${q.p_holm < 0.001 ? '<0,001' : fmt(q.p_holm, 3)}, W=${fmt(q.kendall_w, 2)} (N=${q.n})`;
+      saida.push(caixa(q.question, ...METODOS.map((m, i) => barra(m, q.means[i], 5, fmt(q.means[i], 2), CORES[m])),
+                       el('div', {class: 'nota', text: teste})));
+    });
+    return saida;
+  },
+  segmentos(g) {
+    const cubo = g.segments;
+    if (!cubo || !cubo.slices.length) return [el('p', {text: 'Cubo de segmentos não disponível.'})];
+    const nomes = cubo.slices.map(s => s.dims.join(' x '));
+    estado.recorte = nomes.includes(estado.recorte) ? estado.recorte : nomes[0];
+    const recorte = cubo.slices[nomes.indexOf(estado.recorte)];
+    const perguntas = [...new Set(cubo.columns.map(c => c.slice(0, c.lastIndexOf('_'))))];
+    estado.questao = perguntas.includes(estado.questao) ? estado.questao : perguntas[0];
+    const indices = METODOS.map(m => cubo.columns.indexOf(`${estado.questao}_${m}`));
+    if (!estado.marcados || estado.marcados.recorte !== estado.recorte)
+      estado.marcados = {recorte: estado.recorte, linhas: new Set(recorte.segments.map((_, i) => i))};
+    const marcados = estado.marcados.linhas;
+
+    const caixas = el('div', {class: 'segmentos'});
+    recorte.segments.forEach((seg, i) => {
+      const cb = el('input', {type: 'checkbox'});
+      cb.checked = marcados.has(i);
+      cb.addEventListener('change', () => { cb.checked ? marcados.add(i) : marcados.delete(i); desenhar(); });
+      caixas.appendChild(el('label', {}, cb, document.createTextNode(` ${seg.join(' / ')} (N=${recorte.n[i]})`)));
+    });
+    const media = (linhas, j) => {
+      if (j < 0) return null;
+      let soma = 0, cont = 0;
+      linhas.forEach(i => { soma += recorte.sums[i][j]; cont += recorte.counts[i][j]; });
+      return cont ? soma / cont : null;
+    };
+    const blocos = recorte.segments.map((seg, i) => i).filter(i => marcados.has(i)).map(i =>
+      caixa(`${recorte.segments[i].join(' / ')} (N=${recorte.n[i]})`,
+            ...METODOS.map((m, k) => barra(m, media([i], indices[k]), 5, fmt(media([i], indices[k]), 2), CORES[m]))));
+    const juntos = [...marcados];
+    const total = juntos.reduce((a, i) => a + recorte.n[i], 0);
+    if (juntos.length > 1)
+      blocos.unshift(caixa(`Segmentos marcados juntos (N=${total})`,
+        ...METODOS.map((m, k) => barra(m, media(juntos, indices[k]), 5, fmt(media(juntos, indices[k]), 2), CORES[m]))));
+    return [seletor(nomes.map(n => [n, n]), estado.recorte, v => { estado.recorte = v; desenhar(); }),
+            seletor(perguntas.map(p => [p, p]), estado.questao, v => { estado.questao = v; desenhar(); }),
+            caixas, legenda(), ...blocos];
+  },
+  tempo() {
+    const t = DADOS.planning_time;
+    const metodos = METODOS.filter(m => t.methods[m]);
+    if (!metodos.length) return [el('p', {text: 'Sem dados de tempo de planejamento.'})];
+    const saida = [legenda()];
+    t.categories.forEach((c, i) => saida.push(caixa(c, ...metodos.map(m =>
+      barra(m, t.methods[m].percentages[i], 100, `${t.methods[m].percentages[i]}% (${t.methods[m].counts[i]})`, CORES[m])))));
+    saida.push(caixa('Tempo médio por aula (minutos)', ...metodos.map(m =>
+      barra(m, t.methods[m].mean_minutes, Math.max(...metodos.map(x => t.methods[x].mean_minutes || 0)),
+            `${fmt(t.methods[m].mean_minutes, 1)} min (N=${t.methods[m].n})`, CORES[m]))));
+    const notas = ['Manual e Planilha: estimativas do formulário (pontos médios das faixas); PlanningApp: logs por usuário.'];
+    if (t.overall_minutes !== undefined) notas.push(`Média geral dos logs: ${fmt(t.overall_minutes, 1)} min.`);
+    if (t.percentiles) notas.push('Percentis PlanningApp (' + t.role + '): ' +
+      Object.entries(t.percentiles).map(([p, v]) => `P${p} ${fmt(v, 1)} min`).join(', ') + '.');
+    notas.forEach(n => saida.push(el('p', {class: 'nota', text: n})));
+    return saida;
+  },
+};
+
+function desenhar() {
+  conteudo.replaceChildren(...abas[estado.aba](DADOS.groups[estado.grupo]));
+}
+document.getElementById('gerado').textContent = DADOS.generated;
+const grupo = document.getElementById('grupo');
+Object.entries(DADOS.groups).forEach(([k, g]) => grupo.appendChild(el('option', {value: k, text: `${k} (N=${g.n})`})));
+grupo.addEventListener('change', () => { estado.grupo = grupo.value; desenhar(); });
+document.querySelectorAll('#abas button').forEach(b => b.addEventListener('click', () => {
+  document.querySelectorAll('#abas button').forEach(x => x.classList.toggle('ativo', x === b));
+  estado.aba = b.dataset.aba;
+  desenhar();
+}));
+desenhar();
+</script>
+</body>
+</html>
+"""
+
+
+def build_dashboard(data):
+    """Página do painel com `data` embutido (o JSON não pode fechar a tag <script>)."""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return DASHBOARD_TEMPLATE.replace('__DADOS__', payload)
+
+
+# --- Carregar Resultados (em memória quando rodando no pipeline) ---
+try:
+    results_prof = load_results('professores')
+    results_sup = load_results('supervisores')
+except FileNotFoundError as e:
+    print(f"Erro: Arquivo não encontrado: {e}. Execute o process.py primeiro.")
+    exit()
+
+cubes = {}
+for group in ('professores', 'supervisores'):
+    path = f"./output/cubo_segmentos_{group}.csv"
+    try:
+        writer.wait_for(path)
+        cubes[group] = load_cube(group, path)
+    except FileNotFoundError:
+        cubes[group] = None
+
+try:
+    logs = planning_logs()
+except FileNotFoundError:
+    print("Aviso: logs.json não encontrado; painel sem o tempo registrado no PlanningApp.")
+    logs = None
+
+# --- Agregados e Página ---
+data = {
+    'generated': f"Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
+    'groups': {group: group_aggregates(results, cubes[group])
+               for group, results in (('professores', results_prof), ('supervisores', results_sup))
+               if results.n_respondents > 0},
+    'planning_time': planning_time_aggregates(logs, results_prof.frequencies),
+}
+page = build_dashboard(data)
+writer.write_text(page, "output/painel.html")
+print(f"Painel salvo em: output/painel.html ({len(page) / 1024:.0f} KB, sem dependências externas)")
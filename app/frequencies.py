@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Tabelas de frequência das perguntas categóricas, calculadas uma vez por coluna.
+
+Todas as colunas categóricas de um grupo (perfil e tempo estimado) são
+contadas numa única passada sobre os dados em formato longo. O resultado fica
+memoizado por grupo ('professores', 'supervisores'), de modo que as etapas
+seguintes do pipeline reutilizam as mesmas tabelas em vez de refazer
+`dropna -> value_counts -> / len * 100` para cada coluna.
+
+Com uma coluna de pesos, as contagens passam a ser somas de pesos (versão
+ponderada das mesmas tabelas).
+"""
+
+# Prefixos das colunas tratadas como categóricas
+CATEGORICAL_PREFIXES = ('P1.', 'S1.', 'P2.6', 'P2.7')
+
+
+class FrequencyTable:
+    """Contagens, porcentagens e N válido de uma coluna."""
+
+    __slots__ = ('column', 'counts', 'percentages', 'valid_n')
+
+    def __init__(self, column, counts):
+        self.column = column
+        self.counts = counts
+        self.valid_n = counts.sum() if counts.dtype.kind == 'f' else int(counts.sum())
+        self.percentages = (counts / self.valid_n * 100).round(1)
+
+    def proportions(self):
+        """Proporções (0-1), equivalentes a `value_counts(normalize=True)`."""
+        return (self.counts / self.valid_n).rename('proportion')
+
+    def reindex(self, order):
+        """Reordena contagens e porcentagens, mantendo só categorias presentes."""
+        valid_order = [o for o in order if o in self.counts.index]
+        return self.counts.reindex(valid_order).fillna(0), self.percentages.reindex(valid_order).fillna(0)
+
+
+class FrequencyTables:
+    """Tabelas de frequência de todas as colunas categóricas de um DataFrame."""
+
+    def __init__(self, data, columns=None, weights=None):
+        if columns is None:
+            columns = categorical_columns(data)
+        self.columns = [col for col in columns if col in data.columns]
+        self.n_rows = len(data)
+        self.weights = weights
+        self._tables = {}
+
+        if self.columns:
+            # Uma única passada: formato longo + contagem por (coluna, resposta)
+            if weights is None:
+                long = data[self.columns].melt(var_name='Pergunta', value_name='Resposta').dropna(subset=['Resposta'])
+                grouped = long.groupby(['Pergunta', 'Resposta'], sort=False).size()
+            else:
+                long = data[self.columns + [weights]].melt(id_vars=[weights], var_name='Pergunta', value_name='Resposta')
+                long = long.dropna(subset=['Resposta'])
+                grouped = long.groupby(['Pergunta', 'Resposta'], sort=False)[weights].sum()
+            for column, counts in grouped.groupby(level=0, sort=False):
+                counts = counts.droplevel(0).sort_values(ascending=False, kind='stable')
+                counts.index.name = column
+                self._tables[column] = FrequencyTable(column, counts.rename('count'))
+
+    def get(self, column):
+        """Retorna a tabela da coluna ou None se ela não existir ou estiver vazia."""
+        return self._tables.get(column)
+
+    def __contains__(self, column):
+        return column in self._tables
+
+    def matches(self, data):
+        """Indica se as tabelas foram calculadas para um DataFrame com este formato."""
+        return (self.n_rows == len(data) and all(col in data.columns for col in self.columns)
+                and (self.weights is None or self.weights in data.columns))
+
+
+def categorical_columns(data):
+    """Lista as colunas categóricas (perfil e tempo estimado) do DataFrame."""
+    return [col for col in data.columns if col.startswith(CATEGORICAL_PREFIXES)]
+
+
+# Cache por grupo, compartilhado entre as etapas do mesmo processo
+_cache = {}
+
+
+def frequency_tables(group, data, weights=None):
+    """Retorna as tabelas do grupo, calculando-as só se ainda não existirem.
+
+    Com `weights` (nome da coluna de pesos), as tabelas ponderadas ficam num
+    cache separado das não ponderadas.
+    """
+    key = group if weights is None else (group, weights)
+    tables = _cache.get(key)
+    if tables is None or not tables.matches(data):
+        tables = FrequencyTables(data, weights=weights)
+        _cache[key] = tables
+    return tables
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Correção de grafia das respostas curtas por vizinho mais próximo em distância de edição.
+
+As perguntas P6.3 a P6.5 pedem uma palavra por método, e as respostas chegam
+com erros de digitação ("prátco") que o léxico de sentimentos não reconhece.
+Cada palavra é levada ao termo canônico mais próximo (léxico e palavras
+frequentes do próprio corpus) dentro de um limite de edições.
+
+A busca usa um índice de remoções simétricas (SymSpell): cada termo é
+guardado sob todas as variantes obtidas removendo até `MAX_DISTANCE` letras;
+uma consulta gera as mesmas variantes da palavra e só compara com os termos
+que compartilham alguma, então o custo depende do tamanho da palavra e não do
+vocabulário. A distância final é a de Damerau-Levenshtein (com transposição
+de letras vizinhas), sem acentos. O resultado de cada palavra distinta fica
+guardado, já que o vocabulário é muito menor que o volume de respostas.
+
+Uma correção nunca pode inverter o sentido da palavra: "ineficiente" está a
+uma letra de "eficiente", mas não é erro de grafia dela. Candidatos que só
+diferem da palavra por um prefixo de negação (in-, im-, ir-, i-, des-, a-)
+são descartados, e palavras frequentes no corpus que não estão perto de
+nenhum termo do léxico são a sua própria forma canônica.
+"""
+from itertools import combinations
+
+from text_pipeline import fold_accents
+
+MAX_DISTANCE = 2
+MIN_WORD_LENGTH = 4
+# Palavras a partir deste tamanho aceitam `MAX_DISTANCE` edições; as menores, uma só
+LONG_WORD_LENGTH = 8
+
+# Prefixos que negam a palavra ("eficiente" -> "ineficiente", "normal" -> "anormal")
+NEGATING_PREFIXES = ('des', 'in', 'im', 'ir', 'i', 'a')
+
+def allowed_distance(word):
+    """Edições aceitas para uma palavra: nenhuma abaixo de 4 letras, 1 abaixo de 8, 2 a partir disso."""
+    if len(word) < MIN_WORD_LENGTH:
+        return 0
+    return 1 if len(word) < LONG_WORD_LENGTH else MAX_DISTANCE
+
+
+def negates(a, b):
+    """True se uma das formas (sem acentos) é a outra com um prefixo de negação."""
+    shorter, longer = sorted((a, b), key=len)
+    return any(longer == prefix + shorter for prefix in NEGATING_PREFIXES)
+
+
+def deletes(word, max_distance=MAX_DISTANCE):
+    """Todas as variantes de `word` com até `max_distance` letras removidas (inclui a própria)."""
+    variants = {word}
+    for k in range(1, min(max_distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), k):
+            variants.add(''.join(ch for i, ch in enumerate(word) if i not in positions))
+    return variants
+
+
+def edit_distance(a, b, limit=MAX_DISTANCE):
+    """Distância de Damerau-Levenshtein restrita (transposição de vizinhas), com saída antecipada."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SymmetricDeleteIndex:
+    """Termos canônicos indexados por remoções; a ordem de inserção desempata."""
+
+    def __init__(self, terms=(), max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.terms = {}         # forma sem acentos -> termo original (o primeiro visto)
+        self.rank = {}          # forma sem acentos -> ordem de inserção
+        self.variants = {}      # variante -> formas sem acentos
+        for term in terms:
+            self.add(term)
+
+    def add(self, term):
+        folded = fold_accents(term)
+        if folded in self.terms:
+            return
+        self.terms[folded] = term
+        self.rank[folded] = len(self.rank)
+        for variant in deletes(folded, self.max_distance):
+            self.variants.setdefault(variant, []).append(folded)
+
+    def lookup(self, word, max_distance=None):
+        """Termo mais próximo de `word` e a distância, ou (None, None) se nenhum estiver no limite."""
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        folded = fold_accents(word)
+        if folded in self.terms:
+            return self.terms[folded], 0
+        best, best_distance = None, limit + 1
+        seen = set()
+        for variant in deletes(folded, limit):
+            for candidate in self.variants.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if negates(folded, candidate):
+                    continue
+                distance = edit_distance(folded, candidate, limit)
+                if distance < best_distance or (distance == best_distance and best is not None
+                                                and self.rank[candidate] < self.rank[best]):
+                    best, best_distance = candidate, distance
+        if best is None:
+            return None, None
+        return self.terms[best], best_distance
+
+
+class Canonicalizer:
+    """Leva cada palavra ao termo canônico mais próximo, com cache por palavra distinta.
+
+    Os termos de `lexicon` têm prioridade. Uma palavra de `frequent` sem
+    termo do léxico a uma distância aceita é a sua própria forma canônica
+    (não é corrigida) e serve de referência para as demais; a que tem é um
+    erro comum ("prátco" frequente continua indo para "prático").
+    """
+
+    def __init__(self, lexicon, frequent=()):
+        lexicon = list(lexicon)
+        lexicon_index = SymmetricDeleteIndex(lexicon)
+        self.index = SymmetricDeleteIndex(lexicon)
+        self._cache = {}
+        for word in frequent:
+            term, distance = lexicon_index.lookup(word, allowed_distance(word))
+            if term is None:
+                self.index.add(word)
+
+    def canonical(self, word):
+        """(termo canônico, distância); a própria palavra com distância 0 quando não há correção."""
+        result = self._cache.get(word)
+        if result is None:
+            term, distance = self.index.lookup(word, allowed_distance(word))
+            result = (word, 0) if term is None else (term, distance)
+            self._cache[word] = result
+        return result
+
@@ -1,24 +1,12 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import textwrap
 import os
-
-# --- Configurações Globais ---
-sns.set_theme(style="whitegrid")
-plt.style.use('seaborn-v0_8-colorblind') # Estilo de cores acessível
-plt.rcParams['figure.figsize'] = (8, 5) # Mais compacto para artigo científico
-plt.rcParams['font.size'] = 9 # Fonte menor mas legível
-plt.rcParams['axes.titlesize'] = 10
-plt.rcParams['axes.labelsize'] = 9
-plt.rcParams['xtick.labelsize'] = 8
-plt.rcParams['ytick.labelsize'] = 8
-plt.rcParams['legend.fontsize'] = 8
-plt.rcParams['figure.autolayout'] = True # Tenta ajustar layout automaticamente
-plt.rcParams['savefig.dpi'] = 300 # Alta resolução para artigo científico
-plt.rcParams['savefig.bbox'] = 'tight' # Remove espaços em branco
+from plot_config import carregar_plotagem
+from output_writer import writer
+from significance import significance_marker
+from reliability import correlation_matrix
 
 # Criar diretório para salvar gráficos se não existir
 output_dir = "graficos_tcc"
@@ -26,10 +14,35 @@ os.makedirs(output_dir, exist_ok=True)
 
 # --- Carregar Dados Processados ---
 try:
+    writer.wait_for("./output/professores_processado.csv", "./output/supervisores_processado.csv",
+                    "./output/medias_professores.csv", "./output/medias_supervisores.csv")
     df_professores = pd.read_csv("./output/professores_processado.csv")
     df_supervisores = pd.read_csv("./output/supervisores_processado.csv")
     df_results_prof = pd.read_csv("./output/medias_professores.csv", index_col=0)
     df_results_sup = pd.read_csv("./output/medias_supervisores.csv", index_col=0)
+    try:
+        writer.wait_for("./output/testes_significancia_professores.csv", "./output/testes_significancia_supervisores.csv")
+        df_tests_prof = pd.read_csv("./output/testes_significancia_professores.csv", index_col=0)
+        df_tests_sup = pd.read_csv("./output/testes_significancia_supervisores.csv", index_col=0)
+    except FileNotFoundError:
+        df_tests_prof = None
+        df_tests_sup = None
+    try:
+        writer.wait_for("./output/ic_medias_professores.csv", "./output/ic_medias_supervisores.csv")
+        df_ci_prof = pd.read_csv("./output/ic_medias_professores.csv", index_col=0)
+        df_ci_sup = pd.read_csv("./output/ic_medias_supervisores.csv", index_col=0)
+    except FileNotFoundError:
+        df_ci_prof = None
+        df_ci_sup = None
+    try:
+        writer.wait_for("./output/correlacoes_professores.csv", "./output/correlacoes_supervisores.csv",
+                        "./output/confiabilidade_professores.csv", "./output/confiabilidade_supervisores.csv")
+        df_corr_prof = pd.read_csv("./output/correlacoes_professores.csv")
+        df_corr_sup = pd.read_csv("./output/correlacoes_supervisores.csv")
+        df_alpha_prof = pd.read_csv("./output/confiabilidade_professores.csv")
+        df_alpha_sup = pd.read_csv("./output/confiabilidade_supervisores.csv")
+    except FileNotFoundError:
+        df_corr_prof = df_corr_sup = df_alpha_prof = df_alpha_sup = None
     print("Dados processados carregados com sucesso.")
 except FileNotFoundError:
     print("Erro: Arquivos CSV processados não encontrados. Execute o Bloco de Análise primeiro.")
@@ -42,8 +55,9 @@ except Exception as e:
 
 def save_plot(filename, title):
     """Salva a figura atual no diretório de saída."""
+    plt, _ = carregar_plotagem('artigo')
     filepath = os.path.join(output_dir, filename)
-    plt.savefig(filepath, bbox_inches='tight')
+    writer.save_figure(plt.gcf(), filepath, bbox_inches='tight')
     print(f"Gráfico '{title}' salvo como {filepath}")
     plt.close() # Fechar figura
 
@@ -53,6 +67,7 @@ def plot_profile_chart(data, column, title, filename, plot_type='bar', order=Non
         print(f"Aviso: Coluna '{column}' não encontrada ou vazia. Gráfico '{title}' não gerado.")
         return
 
+    plt, sns = carregar_plotagem('artigo')
     plt.figure(figsize=(8, 5))
     plt.suptitle(title, fontsize=10, y=0.95)
     clean_data = data.dropna(subset=[column]) # Remover NaNs antes de contar
@@ -98,8 +113,43 @@ def plot_profile_chart(data, column, title, filename, plot_type='bar', order=Non
     save_plot(filename, title)
 
 
-def plot_likert_comparison(df_means, title, filename, participant_type=""):
-    """Gera gráfico de barras agrupadas para médias Likert."""
+# Rótulos curtos das perguntas Likert, usados nos gráficos comparativos e de correlação
+short_labels = {
+    # Professor
+    'P2.1_Rapidez': 'Rapidez', 'P2.2_Acesso_Fora': 'Acesso Remoto',
+    'P2.3_Encontrar_Info': 'Encontrar Info', 'P2.4_Retrabalho': 'Baixo Retrabalho',
+    'P2.5_Tempo_Admin': 'Tempo Admin',
+    'P3.1_Facil_Aprender': 'Fácil Aprender', 'P3.2_Org_Clara': 'Org. Clara',
+    'P3.3_Prev_Erros': 'Previne Erros', 'P3.4_Seguro_Dados': 'Segurança',
+    'P3.5_Suporte_Facil': 'Suporte', 'P3.6_Satisfacao_Geral': 'Satisfação',
+    'P4.1_Alinhamento_BNCC': 'Alinh. Normas', 'P4.2_Visao_Progresso': 'Visão Progresso',
+    'P4.3_Colaboracao': 'Colaboração', 'P4.4_Comun_Coord': 'Comun. Coord',
+    'P5.1_Reduz_Estresse': 'Reduz Estresse', 'P5.2_Causa_Frustracao': 'Causa Frustração',
+    'P5.3_Controle_Autonomia': 'Controle', 'P5.4_Profissionalismo': 'Profissionalismo',
+    'P5.5_Libera_Tempo': 'Libera Tempo',
+    # Supervisor
+    'S2.1_Visao_Geral': 'Visão Geral', 'S2.2_Feedback_Agil': 'Feedback',
+    'S2.3_Identifica_Pendentes': 'Identif. Pendentes', 'S2.4_Verifica_Alinhamento': 'Verif. Alinhamento',
+    'S2.5_Tempo_Operacional': 'Tempo Operacional',
+    'S3.1_Facil_Aprender': 'Fácil Aprender', 'S3.2_Org_Clara': 'Org. Clara',
+    'S3.3_Prev_Erros': 'Previne Erros', 'S3.4_Seguro_Dados': 'Segurança',
+    'S3.5_Suporte_Facil': 'Suporte', 'S3.7_Satisfacao_Geral': 'Satisfação',
+    'S4.1_Config_Ano': 'Config. Ano', 'S4.2_Gerencia_Profs': 'Gerenciar Profs',
+    'S4.3_Confianca_Dados': 'Confiança',
+    'S5.1_Extrai_Dados_Decisao': 'Extrai Dados', 'S5.2_Otimiza_Comun': 'Otimiza Comunicação',
+    'S6.1_Reduz_Estresse': 'Reduz Estresse', 'S6.2_Causa_Frustracao': 'Causa Frustração',
+    'S6.3_Controle_Autonomia': 'Controle', 'S6.4_Profissionalismo': 'Profissionalismo',
+    'S6.5_Libera_Tempo': 'Libera Tempo'
+}
+
+
+def plot_likert_comparison(df_means, title, filename, participant_type="", df_tests=None, df_ci=None):
+    """Gera gráfico de barras agrupadas para médias Likert.
+
+    Com `df_tests`, marca acima de cada pergunta a significância do teste de
+    Friedman entre os três métodos (p ajustado por Holm). Com `df_ci`, desenha
+    os intervalos de confiança bootstrap como barras de erro.
+    """
     if df_means.empty:
         print(f"Aviso: Sem dados de médias para plotar '{title}'")
         return
@@ -110,40 +160,25 @@ def plot_likert_comparison(df_means, title, filename, participant_type=""):
         print(f"Aviso: Sem dados válidos para plotar '{title}' após remover NaNs")
         return
 
-    # Mapeamento para rótulos mais curtos e descritivos
-    short_labels = {
-        # Professor
-        'P2.1_Rapidez': 'Rapidez', 'P2.2_Acesso_Fora': 'Acesso Remoto',
-        'P2.3_Encontrar_Info': 'Encontrar Info', 'P2.4_Retrabalho': 'Baixo Retrabalho',
-        'P2.5_Tempo_Admin': 'Tempo Admin',
-        'P3.1_Facil_Aprender': 'Fácil Aprender', 'P3.2_Org_Clara': 'Org. Clara',
-        'P3.3_Prev_Erros': 'Previne Erros', 'P3.4_Seguro_Dados': 'Segurança',
-        'P3.5_Suporte_Facil': 'Suporte', 'P3.6_Satisfacao_Geral': 'Satisfação',
-        'P4.1_Alinhamento_BNCC': 'Alinh. Normas', 'P4.2_Visao_Progresso': 'Visão Progresso',
-        'P4.3_Colaboracao': 'Colaboração', 'P4.4_Comun_Coord': 'Comun. Coord',
-        'P5.1_Reduz_Estresse': 'Reduz Estresse', 'P5.2_Causa_Frustracao': 'Causa Frustração',
-        'P5.3_Controle_Autonomia': 'Controle', 'P5.4_Profissionalismo': 'Profissionalismo',
-        'P5.5_Libera_Tempo': 'Libera Tempo',
-        # Supervisor
-        'S2.1_Visao_Geral': 'Visão Geral', 'S2.2_Feedback_Agil': 'Feedback',
-        'S2.3_Identifica_Pendentes': 'Identif. Pendentes', 'S2.4_Verifica_Alinhamento': 'Verif. Alinhamento',
-        'S2.5_Tempo_Operacional': 'Tempo Operacional',
-        'S3.1_Facil_Aprender': 'Fácil Aprender', 'S3.2_Org_Clara': 'Org. Clara',
-        'S3.3_Prev_Erros': 'Previne Erros', 'S3.4_Seguro_Dados': 'Segurança',
-        'S3.5_Suporte_Facil': 'Suporte', 'S3.7_Satisfacao_Geral': 'Satisfação',
-        'S4.1_Config_Ano': 'Config. Ano', 'S4.2_Gerencia_Profs': 'Gerenciar Profs',
-        'S4.3_Confianca_Dados': 'Confiança',
-        'S5.1_Extrai_Dados_Decisao': 'Extrai Dados', 'S5.2_Otimiza_Comun': 'Otimiza Comunicação',
-        'S6.1_Reduz_Estresse': 'Reduz Estresse', 'S6.2_Causa_Frustracao': 'Causa Frustração',
-        'S6.3_Controle_Autonomia': 'Controle', 'S6.4_Profissionalismo': 'Profissionalismo',
-        'S6.5_Libera_Tempo': 'Libera Tempo'
-    }
-    
     # Pegar apenas os índices presentes no df_means_clean e mapeá-los
     plot_labels = [short_labels.get(idx, idx) for idx in df_means_clean.index]
 
+    plt, _ = carregar_plotagem('artigo')
+    from matplotlib.container import BarContainer
+    methods = ['Manual', 'Planilha', 'PlanningApp']
+    yerr = None
+    if df_ci is not None and df_means_clean.index.isin(df_ci.index).all():
+        ci = df_ci.loc[df_means_clean.index]
+        # Formato esperado pelo pandas para erros assimétricos: (séries, 2, pontos)
+        yerr = np.stack([
+            [(df_means_clean[m] - ci[f'{m}_IC_Inf']).clip(lower=0).fillna(0).to_numpy(),
+             (ci[f'{m}_IC_Sup'] - df_means_clean[m]).clip(lower=0).fillna(0).to_numpy()]
+            for m in methods
+        ])
+
     plt.figure(figsize=(10, 6))
-    ax = df_means_clean[['Manual', 'Planilha', 'PlanningApp']].plot(kind='bar', width=0.7)
+    ax = df_means_clean[methods].plot(kind='bar', width=0.7, yerr=yerr, capsize=2,
+                                      error_kw={'elinewidth': 0.8, 'ecolor': '#444444'})
     plt.title(title, fontsize=11, pad=10)
     plt.ylabel('Média (1=Discordo, 5=Concordo)', fontsize=9)
     plt.xlabel('Aspectos Avaliados', fontsize=9)
@@ -154,11 +189,49 @@ def plot_likert_comparison(df_means, title, filename, participant_type=""):
 
     # Add values above bars
     for container in ax.containers:
-        ax.bar_label(container, fmt='%.1f', fontsize=7, padding=2)
+        if isinstance(container, BarContainer):
+            ax.bar_label(container, fmt='%.1f', fontsize=7, padding=2)
 
     # Adicionar linha de referência no Neutro (3)
     ax.axhline(3, color='grey', linestyle='--', linewidth=0.8, alpha=0.7)
 
+    # Marcadores de significância (Friedman, Holm) acima de cada grupo de barras
+    if df_tests is not None:
+        for i, idx in enumerate(df_means_clean.index):
+            if idx in df_tests.index:
+                marker = significance_marker(df_tests.loc[idx, 'Friedman_p_Holm'])
+                ax.text(i, 5.3, marker, ha='center', va='bottom', fontsize=7)
+        ax.text(1.02, 0.0, "Friedman (Holm):\n* p<0,05  ** p<0,01\n*** p<0,001", transform=ax.transAxes,
+                fontsize=6, va='bottom', ha='left')
+
+    save_plot(filename, title)
+
+
+def plot_correlation_heatmaps(df_corr, df_alpha, section, title, filename):
+    """Gera os mapas de calor das correlações de Spearman de uma seção, um por método."""
+    if df_corr is None or not (df_corr['Secao'] == section).any():
+        print(f"Aviso: Sem correlações para plotar '{title}'")
+        return
+
+    plt, sns = carregar_plotagem('artigo')
+    methods = [m for m in ['Manual', 'Planilha', 'PlanningApp'] if ((df_corr['Secao'] == section) & (df_corr['Metodo'] == m)).any()]
+    fig, axes = plt.subplots(1, len(methods), figsize=(5 * len(methods), 4.8), squeeze=False)
+    for ax, method in zip(axes[0], methods):
+        matrix = correlation_matrix(df_corr, section, method)
+        labels = [short_labels.get(idx, idx) for idx in matrix.index]
+        sns.heatmap(matrix.to_numpy(dtype=float), ax=ax, vmin=-1, vmax=1, cmap='RdBu_r', annot=True, fmt='.2f',
+                    annot_kws={'fontsize': 7}, square=True, cbar=False, xticklabels=labels, yticklabels=labels)
+        subtitle = method
+        if df_alpha is not None:
+            alpha = df_alpha[(df_alpha['Secao'] == section) & (df_alpha['Metodo'] == method)]['Alfa_Cronbach']
+            if not alpha.empty and not pd.isna(alpha.iloc[0]):
+                subtitle += f" (α = {alpha.iloc[0]:.2f})"
+        ax.set_title(subtitle, fontsize=10)
+        ax.tick_params(axis='x', labelsize=7, rotation=45)
+        ax.tick_params(axis='y', labelsize=7, rotation=0)
+        plt.setp(ax.get_xticklabels(), ha='right')
+    fig.suptitle(title, fontsize=11)
+    fig.tight_layout()
     save_plot(filename, title)
 
 
@@ -205,10 +278,10 @@ df_means_prof_usabilidade = df_results_prof[df_results_prof.index.str.startswith
 df_means_prof_alinhamento = df_results_prof[df_results_prof.index.str.startswith('P4.')]
 df_means_prof_bemestar = df_results_prof[df_results_prof.index.str.startswith('P5.')]
 
-plot_likert_comparison(df_means_prof_eficiencia, 'Professores: Eficiência e Carga de Trabalho', '10_comp_prof_eficiencia.png')
-plot_likert_comparison(df_means_prof_usabilidade, 'Professores: Usabilidade e Satisfação', '11_comp_prof_usabilidade.png')
-plot_likert_comparison(df_means_prof_alinhamento, 'Professores: Alinhamento Pedagógico e Colaboração', '12_comp_prof_alinhamento.png')
-plot_likert_comparison(df_means_prof_bemestar, 'Professores: Bem-Estar e Impacto Profissional', '13_comp_prof_bemestar.png')
+plot_likert_comparison(df_means_prof_eficiencia, 'Professores: Eficiência e Carga de Trabalho', '10_comp_prof_eficiencia.png', df_tests=df_tests_prof, df_ci=df_ci_prof)
+plot_likert_comparison(df_means_prof_usabilidade, 'Professores: Usabilidade e Satisfação', '11_comp_prof_usabilidade.png', df_tests=df_tests_prof, df_ci=df_ci_prof)
+plot_likert_comparison(df_means_prof_alinhamento, 'Professores: Alinhamento Pedagógico e Colaboração', '12_comp_prof_alinhamento.png', df_tests=df_tests_prof, df_ci=df_ci_prof)
+plot_likert_comparison(df_means_prof_bemestar, 'Professores: Bem-Estar e Impacto Profissional', '13_comp_prof_bemestar.png', df_tests=df_tests_prof, df_ci=df_ci_prof)
 
 # Supervisores
 if not df_supervisores.empty:
@@ -218,15 +291,37 @@ if not df_supervisores.empty:
     df_means_sup_visao_estr = df_results_sup[df_results_sup.index.str.startswith('S5.')]
     df_means_sup_bemestar = df_results_sup[df_results_sup.index.str.startswith('S6.')] # Confirme se é S6
 
-    plot_likert_comparison(df_means_sup_supervisao, 'Supervisores: Gestão e Supervisão', '14_comp_sup_supervisao.png')
-    plot_likert_comparison(df_means_sup_usabilidade, 'Supervisores: Usabilidade e Satisfação', '15_comp_sup_usabilidade.png')
-    plot_likert_comparison(df_means_sup_gestao_adm, 'Supervisores: Gestão Administrativa', '16_comp_sup_gestao_adm.png')
-    plot_likert_comparison(df_means_sup_visao_estr, 'Supervisores: Visão Estratégica', '17_comp_sup_visao_estr.png')
-    plot_likert_comparison(df_means_sup_bemestar, 'Supervisores: Bem-Estar e Impacto Profissional', '18_comp_sup_bemestar.png')
+    plot_likert_comparison(df_means_sup_supervisao, 'Supervisores: Gestão e Supervisão', '14_comp_sup_supervisao.png', df_tests=df_tests_sup, df_ci=df_ci_sup)
+    plot_likert_comparison(df_means_sup_usabilidade, 'Supervisores: Usabilidade e Satisfação', '15_comp_sup_usabilidade.png', df_tests=df_tests_sup, df_ci=df_ci_sup)
+    plot_likert_comparison(df_means_sup_gestao_adm, 'Supervisores: Gestão Administrativa', '16_comp_sup_gestao_adm.png', df_tests=df_tests_sup, df_ci=df_ci_sup)
+    plot_likert_comparison(df_means_sup_visao_estr, 'Supervisores: Visão Estratégica', '17_comp_sup_visao_estr.png', df_tests=df_tests_sup, df_ci=df_ci_sup)
+    plot_likert_comparison(df_means_sup_bemestar, 'Supervisores: Bem-Estar e Impacto Profissional', '18_comp_sup_bemestar.png', df_tests=df_tests_sup, df_ci=df_ci_sup)
 else:
      print("Aviso: Nenhum dado de supervisor encontrado para gerar gráficos comparativos.")
 
 
+# Mapas de calor das correlações entre itens de cada seção (Spearman, com alfa de Cronbach)
+print("\n--- Gerando Mapas de Correlação por Seção ---")
+correlation_plots_prof = [
+    ('P2', 'Professores: Correlações - Eficiência e Carga de Trabalho', '26_corr_prof_eficiencia.png'),
+    ('P3', 'Professores: Correlações - Usabilidade e Satisfação', '27_corr_prof_usabilidade.png'),
+    ('P4', 'Professores: Correlações - Alinhamento Pedagógico e Colaboração', '28_corr_prof_alinhamento.png'),
+    ('P5', 'Professores: Correlações - Bem-Estar e Impacto Profissional', '29_corr_prof_bemestar.png'),
+]
+correlation_plots_sup = [
+    ('S2', 'Supervisores: Correlações - Gestão e Supervisão', '30_corr_sup_supervisao.png'),
+    ('S3', 'Supervisores: Correlações - Usabilidade e Satisfação', '31_corr_sup_usabilidade.png'),
+    ('S4', 'Supervisores: Correlações - Gestão Administrativa', '32_corr_sup_gestao_adm.png'),
+    ('S5', 'Supervisores: Correlações - Visão Estratégica', '33_corr_sup_visao_estr.png'),
+    ('S6', 'Supervisores: Correlações - Bem-Estar e Impacto Profissional', '34_corr_sup_bemestar.png'),
+]
+for section, title, filename in correlation_plots_prof:
+    plot_correlation_heatmaps(df_corr_prof, df_alpha_prof, section, title, filename)
+if not df_supervisores.empty:
+    for section, title, filename in correlation_plots_sup:
+        plot_correlation_heatmaps(df_corr_sup, df_alpha_sup, section, title, filename)
+
+
 # III. Gráficos de Tempo Estimado - REMOVIDOS (mantendo apenas os com porcentagem)
 # print("\n--- Gerando Gráficos de Tempo Estimado ---")
 # order_tempo_aula = ['Menos de 10 minutos', 'Entre 10 e 20 minutos', 'Entre 20 e 30 minutos', 'Entre 30 e 45 minutos', 'Mais de 45 minutos']
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Expressões frequentes (bigramas e trigramas) com memória limitada.
+
+Contar todos os n-gramas com um `Counter` cresce com o volume de texto. Aqui
+cada coluna é resumida por um Space-Saving de capacidade fixa: no máximo
+`capacity` expressões monitoradas, cada uma com sua contagem e o erro máximo
+dessa contagem (a contagem real fica entre `contagem - erro` e `contagem`).
+Resumos de blocos ou de processos diferentes podem ser somados com `merge`
+sem perder essa garantia.
+
+Os n-gramas saem dos vetores de ids do `text_pipeline` (sem atravessar o fim
+de uma resposta nem a pontuação entre orações, como em "Não é prático, perda
+de tempo") e cada bloco é pré-agregado com `np.unique` antes de entrar
+no resumo, que recebe então contagens já somadas.
+"""
+import numpy as np
+import pandas as pd
+
+from text_pipeline import STOP_WORDS, fold_accents
+
+DEFAULT_CAPACITY = 256
+DEFAULT_CHUNK_RESPONSES = 1000
+
+# Palavras que não abrem nem fecham uma expressão (além das com menos de 3 letras):
+# as stop words das palavras-chave e as palavras de ligação, comparadas sem acentos
+FUNCTION_WORDS = STOP_WORDS | frozenset({
+    'aos', 'ante', 'após', 'até', 'com', 'contra', 'desde', 'entre', 'para', 'perante', 'por', 'sem', 'sob', 'sobre',
+    'dos', 'das', 'nos', 'nas', 'num', 'numa', 'nuns', 'numas', 'dum', 'duma', 'pelo', 'pela', 'pelos', 'pelas',
+    'uns', 'umas', 'uma', 'que', 'como', 'mas', 'nem', 'pois', 'porque', 'quando', 'onde', 'também', 'muito',
+    'mais', 'menos', 'bem', 'era', 'foi', 'são', 'ser', 'ter', 'tem', 'está', 'estava', 'não', 'sim',
+    'sua', 'seu', 'suas', 'seus', 'meu', 'minha', 'meus', 'minhas', 'nós', 'eles', 'elas', 'ele', 'ela',
+    'isso', 'isto', 'aquilo', 'este', 'esta', 'esse', 'essa', 'estes', 'estas', 'esses', 'essas',
+    'nesse', 'nessa', 'neste', 'nesta', 'desse', 'dessa', 'deste', 'desta', 'aquele', 'aquela',
+})
+FOLDED_FUNCTION_WORDS = frozenset(fold_accents(word) for word in FUNCTION_WORDS)
+
+
+class SpaceSaving:
+    """Resumo Space-Saving: contagens aproximadas das expressões mais frequentes."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _min_count(self):
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def update(self, item, count=1):
+        """Soma `count` ocorrências de `item`."""
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            # Substitui o item de menor contagem; a contagem dele vira o erro do novo
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+
+    def update_many(self, items, counts):
+        """Soma um lote já agregado, das maiores contagens para as menores."""
+        for item, count in sorted(zip(items, counts), key=lambda pair: -pair[1]):
+            self.update(item, int(count))
+
+    def merge(self, other):
+        """Combina dois resumos (de blocos ou processos diferentes) num novo resumo."""
+        floor_self, floor_other = self._min_count(), other._min_count()
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        merged.total = self.total + other.total
+        counts, errors = {}, {}
+        for item in list(self.counts) + [i for i in other.counts if i not in self.counts]:
+            # Item ausente num resumo cheio pode ter até o mínimo daquele resumo
+            c1, e1 = (self.counts[item], self.errors[item]) if item in self.counts else (floor_self, floor_self)
+            c2, e2 = (other.counts[item], other.errors[item]) if item in other.counts else (floor_other, floor_other)
+            counts[item] = c1 + c2
+            errors[item] = e1 + e2
+        keep = sorted(counts, key=lambda item: -counts[item])[:merged.capacity]
+        merged.counts = {item: counts[item] for item in keep}
+        merged.errors = {item: errors[item] for item in keep}
+        return merged
+
+    def top(self, k=10):
+        """As `k` expressões de maior contagem: (item, contagem, erro máximo)."""
+        ranked = sorted(self.counts, key=lambda item: (-self.counts[item], self.errors[item]))[:k]
+        return [(item, self.counts[item], self.errors[item]) for item in ranked]
+
+
+def edge_mask(vocabulary):
+    """Máscara por id: a palavra pode abrir ou fechar uma expressão."""
+    return np.array([len(tok) >= 3 and fold_accents(tok) not in FOLDED_FUNCTION_WORDS for tok in vocabulary.tokens],
+                    dtype=bool)
+
+
+def ngram_keys(tokens, vocabulary, n, start=0, stop=None, edges=None):
+    """Chaves inteiras dos n-gramas das respostas `start:stop` de uma coluna tokenizada.
+
+    Só entram n-gramas dentro de uma mesma oração (sem atravessar vírgula,
+    ponto ou o fim da resposta) cujas pontas não sejam palavras de ligação.
+    """
+    stop = len(tokens) if stop is None else stop
+    lo, hi = tokens.indptr[start], tokens.indptr[stop]
+    ids = tokens.ids[lo:hi]
+    if len(ids) < n:
+        return np.zeros(0, dtype=np.int64)
+    # Orações numeradas na coluna toda: a mesma oração implica a mesma resposta
+    clause = tokens.response_of_token if tokens.clause_of_token is None else tokens.clause_of_token
+    clause = clause[lo:hi]
+    same_clause = clause[:len(ids) - n + 1] == clause[n - 1:]
+
+    edges = edge_mask(vocabulary) if edges is None else edges
+    valid = same_clause & edges[ids[:len(ids) - n + 1]] & edges[ids[n - 1:]]
+
+    size = np.int64(len(vocabulary))
+    keys = np.zeros(len(ids) - n + 1, dtype=np.int64)
+    for j in range(n):
+        keys = keys * size + ids[j:len(ids) - n + 1 + j]
+    return keys[valid]
+
+
+def decode_key(key, vocabulary, n):
+    """Converte a chave inteira de volta na expressão (palavras separadas por espaço)."""
+    size = len(vocabulary)
+    ids = []
+    for _ in range(n):
+        key, token = divmod(int(key), size)
+        ids.append(token)
+    return ' '.join(vocabulary.decode(reversed(ids)))
+
+
+def column_summary(tokens, vocabulary, n, capacity=DEFAULT_CAPACITY, chunk_responses=DEFAULT_CHUNK_RESPONSES):
+    """Resumo Space-Saving dos n-gramas de uma coluna, bloco a bloco, com resumos mesclados."""
+    summary = SpaceSaving(capacity)
+    edges = edge_mask(vocabulary)
+    for start in range(0, len(tokens), chunk_responses):
+        keys = ngram_keys(tokens, vocabulary, n, start, min(start + chunk_responses, len(tokens)), edges)
+        if len(keys) == 0:
+            continue
+        unique, counts = np.unique(keys, return_counts=True)
+        chunk = SpaceSaving(capacity)
+        chunk.update_many([decode_key(k, vocabulary, n) for k in unique], counts)
+        summary = summary.merge(chunk)
+    return summary
+
+
+def top_phrases(corpus, columns, sizes=(2, 3), k=10, capacity=DEFAULT_CAPACITY):
+    """Expressões mais frequentes por coluna e tamanho, com limites de erro.
+
+    Colunas: Pergunta, N, Expressao, Contagem, Erro_Max, Contagem_Min,
+    Garantida (contagem mínima acima do maior erro possível de um item fora
+    do resumo).
+    """
+    rows = []
+    for col in columns:
+        tokens = corpus.get(col)
+        if tokens is None or len(tokens) == 0:
+            continue
+        for n in sizes:
+            summary = column_summary(tokens, corpus.vocabulary, n, capacity)
+            floor = summary._min_count()
+            for phrase, count, error in summary.top(k):
+                rows.append({
+                    'Pergunta': col, 'N': n, 'Expressao': phrase,
+                    'Contagem': count, 'Erro_Max': error, 'Contagem_Min': count - error,
+                    'Garantida': count - error >= floor,
+                })
+    return pd.DataFrame(rows, columns=['Pergunta', 'N', 'Expressao', 'Contagem', 'Erro_Max', 'Contagem_Min', 'Garantida'])
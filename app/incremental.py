@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""Modo incremental do `process.py` para exports do Google Forms que só crescem.
+
+Cada download do formulário traz todas as linhas anteriores mais as novas.
+O estado salvo em `output/estado_incremental.json` guarda a impressão digital
+de cada linha já processada (carimbo de data/hora -> hash da linha) e, por
+grupo, os totais aditivos: somas e contagens das colunas Likert, contagens
+das perguntas categóricas e contagens de palavras-chave das respostas
+abertas. Num novo export, só as linhas com carimbo desconhecido são
+codificadas, e os totais são atualizados por elas.
+
+Como os totais são aditivos, os de escolas diferentes também se somam
+(`GroupTotals.merge`), o que o `batch.py` usa para o consolidado entre
+escolas.
+
+Linha editada (mesmo carimbo, hash diferente) ou removida não tem como ser
+descontada com segurança dos totais: nesses casos o `process.py` volta ao
+processamento completo e o estado é refeito do zero. O mesmo acontece quando
+os `<grupo>_processado.csv` não têm exatamente os respondentes do estado.
+Toda execução completa do `process.py`, com ou sem `--incremental`, regrava
+o estado. As estatísticas que não
+são aditivas (testes, intervalos bootstrap, confiabilidade, cubo, pesos)
+continuam sendo as da última execução completa.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from frequencies import categorical_columns
+from output_writer import writer
+from response_store import respondent_ids
+from segment_cube import METHODS, split_method
+from text_pipeline import Vocabulary, tokenize_column
+
+STATE_PATH = './output/estado_incremental.json'
+
+# Palavras-chave por pergunta no resumo (como no `qualitative_analysis.py`)
+TOP_KEYWORDS = 10
+
+# Respostas abertas de cada grupo
+OPEN_PREFIXES = {'professores': 'P6.', 'supervisores': 'S7.'}
+
+
+def row_fingerprints(data):
+    """{identificador da linha: hash do conteúdo}, na ordem do CSV."""
+    hashes = pd.util.hash_pandas_object(data.astype(str), index=False)
+    return dict(zip(respondent_ids(data), (f"{h:016x}" for h in hashes)))
+
+
+class RowDiff:
+    """Linhas novas, editadas e removidas de um export em relação ao estado salvo."""
+
+    def __init__(self, new, edited, removed):
+        self.new = new              # identificadores das linhas ainda não processadas
+        self.edited = edited
+        self.removed = removed
+
+    @property
+    def full_recompute(self):
+        return bool(self.edited or self.removed)
+
+    def describe(self):
+        return (f"{len(self.new)} linhas novas, {len(self.edited)} editadas, "
+                f"{len(self.removed)} removidas")
+
+
+class GroupTotals:
+    """Totais aditivos de um grupo: somas/contagens Likert, frequências e palavras-chave."""
+
+    def __init__(self, sums=None, counts=None, frequencies=None, keywords=None, responses=None, rows=0):
+        self.rows = rows                        # respondentes somados
+        self.sums = sums or {}                  # {coluna Likert: soma}
+        self.counts = counts or {}              # {coluna Likert: respostas válidas}
+        self.frequencies = frequencies or {}    # {coluna: {resposta: contagem}}, na ordem de aparição
+        self.keywords = keywords or {}          # {coluna: {radical: {forma: contagem}}}
+        self.responses = responses or {}        # {coluna aberta: respostas não vazias}
+
+    def add(self, data, likert_columns, categorical_columns, text_columns):
+        """Soma as linhas de `data` aos totais (só as colunas Likert terminadas num método de METHODS)."""
+        self.rows += len(data)
+        for col in likert_columns:
+            if col in data.columns and split_method(col)[1] in METHODS:
+                values = pd.to_numeric(data[col], errors='coerce')
+                self.sums[col] = self.sums.get(col, 0.0) + float(values.sum())
+                self.counts[col] = self.counts.get(col, 0) + int(values.notna().sum())
+        for col in categorical_columns:
+            if col in data.columns:
+                table = self.frequencies.setdefault(col, {})
+                for value, n in data[col].dropna().astype(str).value_counts(sort=False).items():
+                    table[value] = table.get(value, 0) + int(n)
+        vocabulary = Vocabulary()
+        for col in text_columns:
+            if col not in data.columns:
+                continue
+            tokens = tokenize_column(data, col, vocabulary)
+            self.responses[col] = self.responses.get(col, 0) + len(tokens)
+            ids, first, n = np.unique(tokens.keyword_ids(vocabulary), return_index=True, return_counts=True)
+            column = self.keywords.setdefault(col, {})
+            # Radicais e formas na ordem da primeira ocorrência: os empates saem como no `qualitative_analysis.py`
+            order = np.argsort(first, kind='stable')
+            for token_id, count in zip(ids[order].tolist(), n[order].tolist()):
+                forms = column.setdefault(vocabulary.stems[vocabulary.stem_of[token_id]], {})
+                form = vocabulary.tokens[token_id]
+                forms[form] = forms.get(form, 0) + count
+
+    def merge(self, other):
+        """Soma de dois totais (de exports ou escolas diferentes); nenhum dos dois é alterado."""
+        merged = GroupTotals(rows=self.rows + other.rows)
+        for totals in (self, other):
+            for target, source in ((merged.sums, totals.sums), (merged.counts, totals.counts),
+                                   (merged.responses, totals.responses)):
+                for col, value in source.items():
+                    target[col] = target.get(col, 0) + value
+            for col, table in totals.frequencies.items():
+                target = merged.frequencies.setdefault(col, {})
+                for value, n in table.items():
+                    target[value] = target.get(value, 0) + n
+            for col, stems in totals.keywords.items():
+                target = merged.keywords.setdefault(col, {})
+                for word_stem, forms in stems.items():
+                    counted = target.setdefault(word_stem, {})
+                    for form, n in forms.items():
+                        counted[form] = counted.get(form, 0) + n
+        return merged
+
+    def means(self):
+        """Médias (pergunta x método), no formato de `medias_<grupo>.csv`."""
+        questions = {}
+        for col, total in self.sums.items():
+            question, method = split_method(col)
+            n = self.counts.get(col, 0)
+            questions.setdefault(question, {})[method] = total / n if n else np.nan
+        return pd.DataFrame(questions).T.reindex(columns=METHODS)
+
+    def frequency_summary(self):
+        """Contagens e porcentagens de cada pergunta categórica (Pergunta, Resposta, Contagem, Porcentagem)."""
+        rows = []
+        for col, table in self.frequencies.items():
+            total = sum(table.values())
+            ranked = sorted(table.items(), key=lambda item: -item[1])     # estável: empates na ordem de aparição
+            rows.extend({'Pergunta': col, 'Resposta': value, 'Contagem': n,
+                         'Porcentagem': round(n / total * 100, 1)} for value, n in ranked)
+        return pd.DataFrame(rows, columns=['Pergunta', 'Resposta', 'Contagem', 'Porcentagem'])
+
+    def keyword_summary(self, top=TOP_KEYWORDS):
+        """Palavras-chave mais frequentes por pergunta, nas colunas do `analise_qualitativa_<grupo>.csv`.
+
+        Cada radical aparece com a sua forma mais frequente e os empates ficam
+        na ordem da primeira ocorrência, como no `qualitative_analysis.py`;
+        aqui não há o desconto de respostas quase duplicadas, então as
+        contagens podem ser um pouco maiores.
+        """
+        rows = []
+        for col, stems in self.keywords.items():
+            total = self.responses.get(col, 0)
+            counted = [(max(forms.items(), key=lambda item: item[1])[0], sum(forms.values()))
+                       for forms in stems.values()]
+            for keyword, n in sorted(counted, key=lambda item: -item[1])[:top]:
+                rows.append({'Pergunta': col, 'Palavra_Chave': keyword, 'Frequencia': n,
+                             'Porcentagem': round(n / total * 100, 1) if total else 0.0,
+                             'Total_Respostas': total})
+        summary = pd.DataFrame(rows, columns=['Pergunta', 'Palavra_Chave', 'Frequencia', 'Porcentagem', 'Total_Respostas'])
+        return summary.sort_values(['Pergunta', 'Frequencia'], ascending=[True, False], kind='stable')
+
+    def to_dict(self):
+        return {'rows': self.rows, 'sums': self.sums, 'counts': self.counts, 'frequencies': self.frequencies,
+                'keywords': self.keywords, 'responses': self.responses}
+
+
+class IngestState:
+    """Linhas já processadas e totais por grupo, persistidos entre execuções."""
+
+    def __init__(self, rows=None, groups=None):
+        self.rows = rows or {}          # {identificador da linha: hash}
+        self.groups = groups or {}      # {grupo: GroupTotals}
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        """Estado salvo em `path`, ou None se ainda não houver."""
+        writer.wait_for(path)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        return cls(saved['rows'], {group: GroupTotals(**totals) for group, totals in saved['groups'].items()})
+
+    def diff(self, fingerprints):
+        """Compara um export (`row_fingerprints`) com as linhas já processadas."""
+        new = [key for key in fingerprints if key not in self.rows]
+        edited = [key for key, h in fingerprints.items() if key in self.rows and self.rows[key] != h]
+        removed = [key for key in self.rows if key not in fingerprints]
+        return RowDiff(new, edited, removed)
+
+    def totals(self, group):
+        return self.groups.setdefault(group, GroupTotals())
+
+    def add_group(self, group, data, likert_columns):
+        """Soma as linhas já codificadas de um grupo aos seus totais e devolve esses totais."""
+        totals = self.totals(group)
+        totals.add(data, likert_columns, categorical_columns(data),
+                   [col for col in data.columns if col.startswith(OPEN_PREFIXES[group])])
+        return totals
+
+    def matches(self, processed):
+        """True se os respondentes dos `<grupo>_processado.csv` são exatamente os somados nos totais.
+
+        Uma execução completa sem `--incremental` (ou uma edição manual)
+        reescreve esses arquivos sem atualizar o estado; acrescentar linhas a
+        eles nesse caso duplicaria respondentes.
+        """
+        if processed is None:
+            return False
+        ids = [key for group in processed.values() for key in group]
+        return (len(ids) == sum(totals.rows for totals in self.groups.values())
+                and set(ids) <= set(self.rows))
+
+    def record(self, fingerprints, keys=None):
+        """Marca as linhas `keys` (padrão: todas) como processadas."""
+        for key in fingerprints if keys is None else keys:
+            self.rows[key] = fingerprints[key]
+
+    def save(self, path=STATE_PATH):
+        """Grava o estado (troca atômica, pelo `writer`)."""
+        state = {'rows': self.rows, 'groups': {group: totals.to_dict() for group, totals in self.groups.items()}}
+        writer.write_text(json.dumps(state, ensure_ascii=False), path)
+
+
+def processed_respondents(groups, output_dir='output'):
+    """{grupo: identificadores das linhas de `<grupo>_processado.csv`}, ou None se faltar algum arquivo."""
+    processed = {}
+    for group in groups:
+        path = os.path.join(output_dir, f"{group}_processado.csv")
+        writer.wait_for(path)
+        if not os.path.exists(path):
+            return None
+        processed[group] = respondent_ids(pd.read_csv(path, dtype=str))
+    return processed
+
+
+def save_totals(group, totals, output_dir='output'):
+    """Grava as frequências e as palavras-chave dos totais do grupo."""
+    writer.write_csv(totals.frequency_summary(), os.path.join(output_dir, f"frequencias_{group}.csv"), index=False)
+    writer.write_csv(totals.keyword_summary(), os.path.join(output_dir, f"palavras_chave_{group}.csv"), index=False)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Léxico de sentimentos compilado num autômato de Aho-Corasick.
+
+As entradas do léxico (palavras ou expressões, ex.: "perda de tempo") são
+normalizadas e reduzidas a radicais com o mesmo `text_pipeline` das
+respostas, e viram um autômato cujo alfabeto são os radicais. Cada resposta
+é percorrida uma única vez, token a token, e todas as entradas que terminam
+em cada posição saem juntas, qualquer que seja o tamanho do léxico.
+
+Entre entradas sobrepostas vale a mais longa ("muito bom" em vez de "bom").
+Uma negação ("não", "nunca", "sem"...) até `NEGATION_WINDOW` palavras antes
+de uma entrada, e depois da entrada anterior, inverte a sua polaridade: "não
+é prático" conta como negativo, mas em "sem dúvidas, bom" só "dúvidas" é
+invertida. As entradas neutras não são invertidas.
+"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from text_pipeline import normalize, stem
+
+POSITIVE, NEGATIVE, NEUTRAL = 0, 1, 2
+CATEGORY_NAMES = ['Positivo', 'Negativo', 'Neutro']
+
+NEGATIONS = ('não', 'nao', 'nunca', 'nem', 'jamais', 'sem', 'nenhum', 'nenhuma')
+NEGATION_WINDOW = 3
+
+
+class LexiconMatcher:
+    """Autômato de Aho-Corasick sobre radicais, com uma categoria por entrada."""
+
+    def __init__(self, positive=(), negative=(), neutral=()):
+        self.entries = []       # (expressão original, categoria, número de palavras)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]      # entradas que terminam em cada estado (já seguindo as falhas)
+        self.negations = frozenset(stem(word) for word in NEGATIONS)
+
+        phrases = [(p, POSITIVE) for p in positive] + [(p, NEGATIVE) for p in negative] + [(p, NEUTRAL) for p in neutral]
+        words = normalize(pd.Series([p for p, _ in phrases], dtype=object)).str.split() if phrases else []
+        for (phrase, category), tokens in zip(phrases, words):
+            if tokens:
+                self._add([stem(tok) for tok in tokens], phrase, category)
+        self._link()
+
+    def _add(self, stems, phrase, category):
+        state = 0
+        for st in stems:
+            nxt = self.goto[state].get(st)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][st] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append(len(self.entries))
+        self.entries.append((phrase, category, len(stems)))
+
+    def _link(self):
+        """Liga as falhas em largura e acumula nas saídas as entradas dos sufixos."""
+        queue = deque(self.goto[0].values())    # filhos da raiz falham para a raiz
+        while queue:
+            state = queue.popleft()
+            for st, nxt in self.goto[state].items():
+                self.fail[nxt] = self._step(self.fail[state], st)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+                queue.append(nxt)
+
+    def _step(self, state, st):
+        while state and st not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(st, 0)
+
+    def find(self, stems):
+        """Todas as ocorrências numa sequência de radicais: lista de (início, fim, entrada)."""
+        found = []
+        state = 0
+        for end, st in enumerate(stems, start=1):
+            state = self._step(state, st)
+            for entry in self.output[state]:
+                found.append((end - self.entries[entry][2], end, entry))
+        return found
+
+    def match_column(self, tokens, vocabulary, token_stems=None):
+        """Ocorrências do léxico nas respostas de uma coluna tokenizada, numa passada.
+
+        `token_stems` troca o radical de cada palavra do vocabulário (por id),
+        ex.: pelo da grafia corrigida. Retorna vetores (resposta, início, fim,
+        entrada), com as posições no vetor plano de tokens da coluna e só as
+        ocorrências mais longas entre as que se sobrepõem.
+        """
+        if token_stems is None:
+            token_stems = [vocabulary.stems[s] for s in vocabulary.stem_of]
+        stems = [token_stems[i] for i in tokens.ids]
+        responses, starts, ends, entries = [], [], [], []
+        for response in range(len(tokens)):
+            lo, hi = tokens.indptr[response], tokens.indptr[response + 1]
+            taken_until = 0
+            # Mais à esquerda e, no empate, mais longa
+            for start, end, entry in sorted(self.find(stems[lo:hi]), key=lambda m: (m[0], m[0] - m[1])):
+                if start < taken_until:
+                    continue
+                taken_until = end
+                responses.append(response)
+                starts.append(lo + start)
+                ends.append(lo + end)
+                entries.append(entry)
+        return tuple(np.array(values, dtype=np.int64) for values in (responses, starts, ends, entries))
+
+    def scores(self, tokens, vocabulary, token_stems=None):
+        """Contagem de ocorrências positivas, negativas e neutras por resposta (respostas x 3).
+
+        Ocorrências precedidas de negação dentro da janela trocam positivo por
+        negativo e vice-versa.
+        """
+        responses, starts, ends, entries = self.match_column(tokens, vocabulary, token_stems)
+        scores = np.zeros((len(tokens), 3), dtype=np.int64)
+        if len(entries) == 0:
+            return scores
+        category = np.array([c for _, c, _ in self.entries], dtype=np.int64)[entries]
+
+        # Última negação em cada posição; conta se cair na janela e depois da ocorrência anterior
+        stem_negation = np.array([st in self.negations for st in vocabulary.stems], dtype=bool)
+        negation_mask = stem_negation[vocabulary.stem_of[tokens.ids]]
+        last_negation = np.maximum.accumulate(np.where(negation_mask, np.arange(len(negation_mask)), -1))
+        previous = np.where(starts > 0, last_negation[np.maximum(starts - 1, 0)], -1)
+        same_response = np.r_[False, responses[1:] == responses[:-1]]
+        scope_start = np.maximum(starts - NEGATION_WINDOW, tokens.indptr[responses])
+        scope_start = np.where(same_response, np.maximum(scope_start, np.r_[0, ends[:-1]]), scope_start)
+        negated = previous >= scope_start
+        flipped = np.where(category == POSITIVE, NEGATIVE, POSITIVE)
+        category = np.where(negated & (category != NEUTRAL), flipped, category)
+        np.add.at(scores, (responses, category), 1)
+        return scores
+
+
+def classify(scores):
+    """Sentimento de cada resposta: a categoria com contagem estritamente maior, senão neutro."""
+    pos, neg, neu = scores.T
+    positive = (pos > neg) & (pos > neu)
+    negative = (neg > pos) & (neg > neu)
+    return np.where(positive, POSITIVE, np.where(negative, NEGATIVE, NEUTRAL))
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Respostas abertas quase duplicadas (copiadas e coladas) por MinHash + LSH.
+
+Cada resposta vira o conjunto de pares de palavras consecutivas (shingles).
+O hash de cada palavra é estável (crc32 do texto), então assinaturas de
+corpora diferentes (professores e supervisores) são comparáveis. A
+assinatura MinHash de todas as respostas sai de uma única operação vetorial
+por bloco: os hashes dos shingles passam por `NUM_PERM` funções de hash
+universais (multiplicação-deslocamento em 64 bits, sem divisão) e o mínimo de
+cada resposta é tirado com `np.minimum.reduceat`.
+
+Em vez de comparar todos os pares, as assinaturas são cortadas em faixas
+(LSH): respostas que coincidem em alguma faixa inteira são candidatas, e só
+as candidatas com similaridade estimada acima do limiar entram no mesmo grupo
+(união de conjuntos). Respostas curtas (menos de `MIN_TOKENS` palavras) não
+são verificadas: "Praticidade" repetida por vários professores é resposta
+legítima, não cópia.
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from text_pipeline import shorten
+
+NUM_PERM = 64
+BANDS = 16
+THRESHOLD = 0.7
+MIN_TOKENS = 4
+SHINGLE_SIZE = 2
+CHUNK_SHINGLES = 50_000
+
+_PRIME = np.int64((1 << 31) - 1)
+
+
+def _hash_functions(seed=1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)   # multiplicadores ímpares
+    b = rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+    return a, b
+
+
+def token_hashes(vocabulary):
+    """Hash estável de cada palavra do vocabulário (independe da ordem dos ids)."""
+    return np.array([zlib.crc32(tok.encode('utf-8')) for tok in vocabulary.tokens], dtype=np.int64) % _PRIME
+
+
+def shingles(tokens, hashes, responses):
+    """Hashes dos shingles das respostas escolhidas, em CSR (valores, limites).
+
+    As respostas escolhidas precisam ter pelo menos `SHINGLE_SIZE` palavras.
+    """
+    word = hashes[tokens.ids]
+    n = len(word) - SHINGLE_SIZE + 1
+    key = word[:n].copy()
+    for j in range(1, SHINGLE_SIZE):
+        key = (key * 1_000_003 + word[j:n + j]) % _PRIME
+    # Shingle que começa na posição i pertence à resposta de i; cada resposta tem (tamanho - SHINGLE_SIZE + 1)
+    starts = tokens.indptr[responses]
+    lengths = tokens.indptr[responses + 1] - starts - SHINGLE_SIZE + 1
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+    return key[positions], indptr
+
+
+def minhash(values, indptr, seed=1):
+    """Assinaturas MinHash (respostas x NUM_PERM) a partir dos shingles em CSR."""
+    a, b = _hash_functions(seed)
+    values = values.astype(np.uint64)
+    n = len(indptr) - 1
+    signatures = np.empty((n, NUM_PERM), dtype=np.uint64)
+    start = 0
+    while start < n:
+        # Bloco de respostas com até CHUNK_SHINGLES shingles, para limitar a memória
+        stop = max(start + 1, int(np.searchsorted(indptr, indptr[start] + CHUNK_SHINGLES, side='right')) - 1)
+        stop = min(stop, n)
+        lo, hi = indptr[start], indptr[stop]
+        # (a * x + b) mod 2^64 (estouro natural), 32 bits mais altos; no lugar, sem matrizes temporárias
+        hashed = np.multiply.outer(a, values[lo:hi])
+        hashed += b[:, None]
+        hashed >>= np.uint64(32)
+        signatures[start:stop] = np.minimum.reduceat(hashed, indptr[start:stop] - lo, axis=1).T
+        start = stop
+    return signatures
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def lsh_groups(signatures, threshold=THRESHOLD):
+    """Rótulo de grupo de cada assinatura: candidatas por faixa, confirmadas pela similaridade estimada."""
+    n = len(signatures)
+    parent = np.arange(n)
+    rows = NUM_PERM // BANDS
+    for band in range(BANDS):
+        part = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        _, bucket = np.unique(part.view(np.dtype((np.void, part.dtype.itemsize * rows))).ravel(), return_inverse=True)
+        order = np.argsort(bucket, kind='stable')
+        heads = np.r_[True, bucket[order][1:] != bucket[order][:-1]]
+        head_of = order[np.maximum.accumulate(np.where(heads, np.arange(n), 0))]
+        for member, head in zip(order[~heads], head_of[~heads]):
+            root_member, root_head = _find(parent, member), _find(parent, head)
+            if root_member != root_head and (signatures[member] == signatures[head]).mean() >= threshold:
+                parent[max(root_member, root_head)] = min(root_member, root_head)
+    return np.array([_find(parent, i) for i in range(n)])
+
+
+def find_near_duplicates(corpora, threshold=THRESHOLD):
+    """Grupos de respostas quase iguais em todos os corpora e colunas.
+
+    `corpora` é {grupo: TextCorpus}. Retorna uma linha por resposta que tem
+    pelo menos uma quase duplicata: Grupo, Pergunta, Respondente, Cluster,
+    Representante (a primeira resposta do grupo na ordem de leitura), Texto
+    e a posição da resposta na coluna tokenizada (Resposta). O
+    limiar é de similaridade de Jaccard estimada entre os shingles.
+    """
+    labels, values, indptrs = [], [], []
+    for group, corpus in corpora.items():
+        hashes = token_hashes(corpus.vocabulary)
+        for col, tokens in corpus.columns.items():
+            long_enough = np.flatnonzero(np.diff(tokens.indptr) >= max(MIN_TOKENS, SHINGLE_SIZE))
+            if len(long_enough) == 0:
+                continue
+            col_values, col_indptr = shingles(tokens, hashes, long_enough)
+            labels.append(pd.DataFrame({'Grupo': group, 'Pergunta': col, 'Respondente': tokens.index[long_enough],
+                                        'Texto': [shorten(tokens.texts[r]) for r in long_enough],
+                                        'Resposta': long_enough}))
+            values.append(col_values)
+            indptrs.append(col_indptr)
+
+    columns = ['Grupo', 'Pergunta', 'Respondente', 'Cluster', 'Representante', 'Texto', 'Resposta']
+    if not labels:
+        return pd.DataFrame(columns=columns)
+    offsets = np.cumsum([0] + [len(v) for v in values[:-1]])
+    indptr = np.concatenate([indptrs[0]] + [p[1:] + o for p, o in zip(indptrs[1:], offsets[1:])])
+    responses = pd.concat(labels, ignore_index=True)
+    responses['Cluster'] = lsh_groups(minhash(np.concatenate(values), indptr), threshold)
+
+    sizes = responses['Cluster'].map(responses['Cluster'].value_counts())
+    duplicates = responses[sizes > 1].copy()
+    duplicates['Representante'] = ~duplicates.duplicated('Cluster')
+    duplicates['Cluster'] = pd.factorize(duplicates['Cluster'])[0] + 1
+    return duplicates[columns].reset_index(drop=True)
+
+
+def collapsed_responses(duplicates, group, column, n_responses):
+    """Máscara das respostas de uma coluna que contam: uma por grupo de quase duplicatas da mesma pergunta."""
+    keep = np.ones(n_responses, dtype=bool)
+    part = duplicates[(duplicates['Grupo'] == group) & (duplicates['Pergunta'] == column)]
+    keep[part.loc[part.duplicated('Cluster'), 'Resposta'].to_numpy(dtype=np.int64)] = False
+    return keep
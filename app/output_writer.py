@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Escrita assíncrona dos artefatos de saída (CSV, PNG e relatórios).
+
+Os artefatos são serializados na thread que os produz e gravados por um pool
+de threads em segundo plano. Cada arquivo é escrito num temporário da mesma
+pasta e movido com `os.replace`, então quem lê `output/` ou `graficos_tcc/`
+nunca vê um arquivo pela metade.
+"""
+import atexit
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class OutputWriter:
+    """Fila de gravações em segundo plano com barreira de sincronização."""
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='output-writer')
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def write_bytes(self, data, path):
+        """Enfileira a gravação atômica de `data` em `path`."""
+        key = os.path.abspath(path)
+        with self._lock:
+            previous = self._pending.get(key)
+            self._pending[key] = self._executor.submit(self._write, data, key, previous)
+
+    def write_text(self, text, path, encoding='utf-8'):
+        """Enfileira a gravação de um texto."""
+        self.write_bytes(text.encode(encoding), path)
+
+    def write_csv(self, df, path, **kwargs):
+        """Serializa o DataFrame agora e enfileira a gravação do CSV."""
+        self.write_text(df.to_csv(**kwargs), path)
+
+    def save_figure(self, fig, path, **kwargs):
+        """Renderiza a figura agora e enfileira a gravação da imagem.
+
+        A renderização fica na thread chamadora porque o matplotlib não é
+        seguro entre threads; só a escrita em disco vai para o pool.
+        """
+        buffer = io.BytesIO()
+        fmt = os.path.splitext(path)[1].lstrip('.') or None
+        fig.savefig(buffer, format=fmt, **kwargs)
+        self.write_bytes(buffer.getvalue(), path)
+
+    @contextmanager
+    def open_text(self, path, encoding='utf-8'):
+        """Abre `path` para escrita em partes, com a mesma troca atômica no final.
+
+        Para textos grandes montados aos poucos (relatórios): cada parte vai
+        direto para o temporário, na thread chamadora, sem juntar o texto
+        inteiro em memória. Gravações enfileiradas antes para o mesmo arquivo
+        terminam primeiro.
+        """
+        key = os.path.abspath(path)
+        self.wait_for(key)
+        directory = os.path.dirname(key)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(key)}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+                yield f
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, key)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def wait_for(self, *paths):
+        """Espera as gravações pendentes dos caminhos informados."""
+        for path in paths:
+            with self._lock:
+                future = self._pending.get(os.path.abspath(path))
+            if future is not None:
+                future.result()
+
+    def flush(self):
+        """Barreira: espera todas as gravações e propaga o primeiro erro."""
+        with self._lock:
+            futures = list(self._pending.values())
+            self._pending.clear()
+        for future in futures:
+            future.result()
+
+    @staticmethod
+    def _write(data, path, previous):
+        # Mantém a ordem de gravações sucessivas do mesmo arquivo
+        if previous is not None:
+            previous.result()
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+# Instância compartilhada por todas as etapas do pipeline
+writer = OutputWriter()
+atexit.register(writer.flush)
@@ -1,24 +1,11 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import textwrap
 import os
-
-# --- Configurações Globais ---
-sns.set_theme(style="whitegrid")
-plt.style.use('seaborn-v0_8-colorblind')
-plt.rcParams['figure.figsize'] = (8, 5) # Mais compacto para artigo científico
-plt.rcParams['font.size'] = 9 # Fonte menor mas legível
-plt.rcParams['axes.titlesize'] = 10
-plt.rcParams['axes.labelsize'] = 9
-plt.rcParams['xtick.labelsize'] = 8
-plt.rcParams['ytick.labelsize'] = 8
-plt.rcParams['legend.fontsize'] = 8
-plt.rcParams['figure.autolayout'] = True
-plt.rcParams['savefig.dpi'] = 300 # Alta resolução para artigo científico
-plt.rcParams['savefig.bbox'] = 'tight' # Remove espaços em branco
+from plot_config import carregar_plotagem
+from output_writer import writer
+from frequencies import frequency_tables
+from weighting import WEIGHT_COLUMN
 
 # Criar diretório para salvar gráficos se não existir
 output_dir = "graficos_tcc"
@@ -26,6 +13,7 @@ os.makedirs(output_dir, exist_ok=True)
 
 # --- Carregar Dados Processados ---
 try:
+    writer.wait_for("./output/professores_processado.csv", "./output/supervisores_processado.csv")
     df_professores = pd.read_csv("./output/professores_processado.csv")
     df_supervisores = pd.read_csv("./output/supervisores_processado.csv")
     print("Dados processados carregados com sucesso.")
@@ -36,30 +24,30 @@ except Exception as e:
     print(f"Erro ao carregar arquivos CSV: {e}")
     exit()
 
+# Tabelas de frequência (reaproveitadas do process.py quando rodando no pipeline)
+freq_prof = frequency_tables('professores', df_professores)
+freq_sup = frequency_tables('supervisores', df_supervisores)
+
 # --- Funções Auxiliares ---
 def save_plot(filename, title):
     """Salva a figura atual no diretório de saída."""
+    plt, _ = carregar_plotagem('artigo')
     filepath = os.path.join(output_dir, filename)
-    plt.savefig(filepath, bbox_inches='tight')
+    writer.save_figure(plt.gcf(), filepath, bbox_inches='tight')
     print(f"Gráfico '{title}' salvo como {filepath}")
     plt.close()
 
-def calculate_percentages(data, column, title):
-    """Calcula porcentagens para uma coluna específica."""
-    if column not in data.columns or data[column].isnull().all():
+def calculate_percentages(tables, column, title):
+    """Exibe as porcentagens de uma coluna a partir da tabela de frequência."""
+    table = tables.get(column)
+    if table is None:
         print(f"Aviso: Coluna '{column}' não encontrada ou vazia.")
         return None, None
     
-    clean_data = data.dropna(subset=[column])
-    if clean_data.empty:
-        print(f"Aviso: Sem dados válidos para {column} após remover NaNs.")
-        return None, None
-    
-    counts = clean_data[column].value_counts()
-    percentages = (counts / len(clean_data) * 100).round(1)
+    counts, percentages = table.counts, table.percentages
     
     print(f"\n{title}:")
-    print(f"Total de respondentes: {len(clean_data)}")
+    print(f"Total de respondentes: {table.valid_n}")
     print("Distribuição:")
     for value, count in counts.items():
         pct = percentages[value]
@@ -67,23 +55,18 @@ def calculate_percentages(data, column, title):
     
     return counts, percentages
 
-def plot_percentage_chart(data, column, title, filename, plot_type='bar', order=None, xlabel=None):
+def plot_percentage_chart(tables, column, title, filename, plot_type='bar', order=None, xlabel=None):
     """Gera gráficos com porcentagens para perfil."""
-    if column not in data.columns or data[column].isnull().all():
+    table = tables.get(column)
+    if table is None:
         print(f"Aviso: Coluna '{column}' não encontrada ou vazia. Gráfico '{title}' não gerado.")
         return
 
+    plt, sns = carregar_plotagem('artigo')
     plt.figure(figsize=(8, 5))
     plt.suptitle(title, fontsize=10, y=0.95)
-    clean_data = data.dropna(subset=[column])
 
-    if clean_data.empty:
-        print(f"Aviso: Sem dados válidos para plotar para {column} após remover NaNs.")
-        plt.close()
-        return
-
-    counts = clean_data[column].value_counts()
-    percentages = (counts / len(clean_data) * 100).round(1)
+    counts, percentages = table.counts, table.percentages
 
     if plot_type == 'pie':
         labels = [f'{label}\n({value})' for label, value in counts.items()]
@@ -92,9 +75,7 @@ def plot_percentage_chart(data, column, title, filename, plot_type='bar', order=
 
     elif plot_type == 'bar':
         if order:
-            valid_order = [o for o in order if o in clean_data[column].unique()]
-            counts = counts.reindex(valid_order).fillna(0)
-            percentages = percentages.reindex(valid_order).fillna(0)
+            counts, percentages = table.reindex(order)
 
         if not counts.empty:
             ax = sns.barplot(x=counts.index, y=counts.values, palette='viridis', hue=counts.index, legend=False)
@@ -125,30 +106,26 @@ def plot_percentage_chart(data, column, title, filename, plot_type='bar', order=
 
     save_plot(filename, title)
 
-def create_percentage_summary(data, columns, title, filename):
+def create_percentage_summary(tables, columns, title, filename):
     """Cria um resumo de porcentagens para múltiplas colunas."""
     summary_data = []
     
     for col in columns:
-        if col in data.columns and not data[col].isnull().all():
-            clean_data = data.dropna(subset=[col])
-            if not clean_data.empty:
-                counts = clean_data[col].value_counts()
-                percentages = (counts / len(clean_data) * 100).round(1)
-                
-                for value, count in counts.items():
-                    pct = percentages[value]
-                    summary_data.append({
-                        'Pergunta': col,
-                        'Resposta': value,
-                        'Contagem': count,
-                        'Porcentagem': pct,
-                        'Total_Respondentes': len(clean_data)
-                    })
+        table = tables.get(col)
+        if table is not None:
+            for value, count in table.counts.items():
+                pct = table.percentages[value]
+                summary_data.append({
+                    'Pergunta': col,
+                    'Resposta': value,
+                    'Contagem': round(count, 2),
+                    'Porcentagem': pct,
+                    'Total_Respondentes': round(table.valid_n, 2)
+                })
     
     if summary_data:
         df_summary = pd.DataFrame(summary_data)
-        df_summary.to_csv(f"output/{filename}", index=False)
+        writer.write_csv(df_summary, f"output/{filename}", index=False)
         print(f"Resumo de porcentagens salvo em: output/{filename}")
         return df_summary
     else:
@@ -157,55 +134,55 @@ def create_percentage_summary(data, columns, title, filename):
 
 # --- Análise de Porcentagens para Professores ---
 print("\n" + "="*60)
-print("ANÁLISE DE PORCENTAGENS - PROFESSORES (N=28)")
+print(f"ANÁLISE DE PORCENTAGENS - PROFESSORES (N={len(df_professores)})")
 print("="*60)
 
 # P1.1 - Tempo de Serviço
 order_tempo_srv = ['Menos de 2 anos', 'Entre 2 e 5 anos', 'Entre 6 e 10 anos', 'Mais de 10 anos']
-counts, percentages = calculate_percentages(df_professores, 'P1.1_Tempo_Servico', 'P1.1 - Tempo de Serviço')
-plot_percentage_chart(df_professores, 'P1.1_Tempo_Servico', 'Professores: Tempo de Serviço (com Porcentagens)', '01_prof_tempo_servico_pct.png', order=order_tempo_srv, xlabel="Tempo de Serviço")
+counts, percentages = calculate_percentages(freq_prof, 'P1.1_Tempo_Servico', 'P1.1 - Tempo de Serviço')
+plot_percentage_chart(freq_prof, 'P1.1_Tempo_Servico', 'Professores: Tempo de Serviço (com Porcentagens)', '01_prof_tempo_servico_pct.png', order=order_tempo_srv, xlabel="Tempo de Serviço")
 
 # P1.2 - Segmentos
-counts, percentages = calculate_percentages(df_professores, 'P1.2_Segmentos', 'P1.2 - Segmentos de Atuação')
-plot_percentage_chart(df_professores, 'P1.2_Segmentos', 'Professores: Segmentos de Atuação (com Porcentagens)', '02_prof_segmentos_pct.png', plot_type='pie')
+counts, percentages = calculate_percentages(freq_prof, 'P1.2_Segmentos', 'P1.2 - Segmentos de Atuação')
+plot_percentage_chart(freq_prof, 'P1.2_Segmentos', 'Professores: Segmentos de Atuação (com Porcentagens)', '02_prof_segmentos_pct.png', plot_type='pie')
 
 # P1.3 - Conforto com Tecnologia
 order_conforto = ['Muito baixo', 'Baixo', 'Médio', 'Alto', 'Muito alto']
-counts, percentages = calculate_percentages(df_professores, 'P1.3_Conforto_Tec', 'P1.3 - Conforto com Tecnologia')
-plot_percentage_chart(df_professores, 'P1.3_Conforto_Tec', 'Professores: Conforto com Tecnologia (com Porcentagens)', '03_prof_conforto_tec_pct.png', order=order_conforto, xlabel="Nível de Conforto")
+counts, percentages = calculate_percentages(freq_prof, 'P1.3_Conforto_Tec', 'P1.3 - Conforto com Tecnologia')
+plot_percentage_chart(freq_prof, 'P1.3_Conforto_Tec', 'Professores: Conforto com Tecnologia (com Porcentagens)', '03_prof_conforto_tec_pct.png', order=order_conforto, xlabel="Nível de Conforto")
 
 # P1.4 - Número de Turmas
 order_turmas = ['1 a 3 turmas', '4 a 6 turmas', '7 a 9 turmas', '10 ou mais turmas']
-counts, percentages = calculate_percentages(df_professores, 'P1.4_Num_Turmas', 'P1.4 - Número de Turmas')
-plot_percentage_chart(df_professores, 'P1.4_Num_Turmas', 'Professores: Número de Turmas (com Porcentagens)', '04_prof_num_turmas_pct.png', order=order_turmas, xlabel="Número de Turmas")
+counts, percentages = calculate_percentages(freq_prof, 'P1.4_Num_Turmas', 'P1.4 - Número de Turmas')
+plot_percentage_chart(freq_prof, 'P1.4_Num_Turmas', 'Professores: Número de Turmas (com Porcentagens)', '04_prof_num_turmas_pct.png', order=order_turmas, xlabel="Número de Turmas")
 
 # P1.5 - Número de Planos
 order_planos = ['1 a 4 diários', '5 a 8 diários', '9 a 12 diários', '13 ou mais diários']
-counts, percentages = calculate_percentages(df_professores, 'P1.5_Num_Planos', 'P1.5 - Número de Planos/Cronogramas')
-plot_percentage_chart(df_professores, 'P1.5_Num_Planos', 'Professores: Número de Planos/Cronogramas (com Porcentagens)', '05_prof_num_planos_pct.png', order=order_planos, xlabel="Número de Planos")
+counts, percentages = calculate_percentages(freq_prof, 'P1.5_Num_Planos', 'P1.5 - Número de Planos/Cronogramas')
+plot_percentage_chart(freq_prof, 'P1.5_Num_Planos', 'Professores: Número de Planos/Cronogramas (com Porcentagens)', '05_prof_num_planos_pct.png', order=order_planos, xlabel="Número de Planos")
 
 # P1.6 - Outra Escola
-counts, percentages = calculate_percentages(df_professores, 'P1.6_Outra_Escola_Metodo', 'P1.6 - Atuação em Outras Escolas')
-plot_percentage_chart(df_professores, 'P1.6_Outra_Escola_Metodo', 'Professores: Atuação em Outras Escolas (com Porcentagens)', '06_prof_outra_escola_pct.png', plot_type='bar', xlabel="Método na Outra Escola")
+counts, percentages = calculate_percentages(freq_prof, 'P1.6_Outra_Escola_Metodo', 'P1.6 - Atuação em Outras Escolas')
+plot_percentage_chart(freq_prof, 'P1.6_Outra_Escola_Metodo', 'Professores: Atuação em Outras Escolas (com Porcentagens)', '06_prof_outra_escola_pct.png', plot_type='bar', xlabel="Método na Outra Escola")
 
 # --- Análise de Porcentagens para Supervisores ---
 print("\n" + "="*60)
-print("ANÁLISE DE PORCENTAGENS - SUPERVISORES (N=4)")
+print(f"ANÁLISE DE PORCENTAGENS - SUPERVISORES (N={len(df_supervisores)})")
 print("="*60)
 
 if not df_supervisores.empty:
     # S1.1 - Função
-    counts, percentages = calculate_percentages(df_supervisores, 'S1.1_Funcao_Gestora', 'S1.1 - Função na Equipe Gestora')
-    plot_percentage_chart(df_supervisores, 'S1.1_Funcao_Gestora', 'Supervisores: Função na Equipe Gestora (com Porcentagens)', '07_sup_funcao_pct.png', plot_type='pie')
+    counts, percentages = calculate_percentages(freq_sup, 'S1.1_Funcao_Gestora', 'S1.1 - Função na Equipe Gestora')
+    plot_percentage_chart(freq_sup, 'S1.1_Funcao_Gestora', 'Supervisores: Função na Equipe Gestora (com Porcentagens)', '07_sup_funcao_pct.png', plot_type='pie')
 
     # S1.2 - Tempo na Gestão
     order_tempo_gest = ['Menos de 2 anos', 'Entre 2 e 5 anos', 'Entre 5 e 10 anos', 'Mais de 10 anos']
-    counts, percentages = calculate_percentages(df_supervisores, 'S1.2_Tempo_Gestao', 'S1.2 - Tempo no Cargo de Gestão')
-    plot_percentage_chart(df_supervisores, 'S1.2_Tempo_Gestao', 'Supervisores: Tempo no Cargo (com Porcentagens)', '08_sup_tempo_gestao_pct.png', order=order_tempo_gest, xlabel="Tempo no Cargo")
+    counts, percentages = calculate_percentages(freq_sup, 'S1.2_Tempo_Gestao', 'S1.2 - Tempo no Cargo de Gestão')
+    plot_percentage_chart(freq_sup, 'S1.2_Tempo_Gestao', 'Supervisores: Tempo no Cargo (com Porcentagens)', '08_sup_tempo_gestao_pct.png', order=order_tempo_gest, xlabel="Tempo no Cargo")
 
     # S1.3 - Experiência Outras Plataformas
-    counts, percentages = calculate_percentages(df_supervisores, 'S1.3_Outras_Plataformas', 'S1.3 - Experiência com Outras Plataformas')
-    plot_percentage_chart(df_supervisores, 'S1.3_Outras_Plataformas', 'Supervisores: Uso de Outras Plataformas (com Porcentagens)', '09_sup_outras_plat_pct.png', plot_type='pie')
+    counts, percentages = calculate_percentages(freq_sup, 'S1.3_Outras_Plataformas', 'S1.3 - Experiência com Outras Plataformas')
+    plot_percentage_chart(freq_sup, 'S1.3_Outras_Plataformas', 'Supervisores: Uso de Outras Plataformas (com Porcentagens)', '09_sup_outras_plat_pct.png', plot_type='pie')
 else:
     print("Aviso: Nenhum dado de supervisor encontrado para análise de porcentagens.")
 
@@ -256,12 +233,20 @@ print("="*60)
 
 # Resumo para professores
 prof_columns = ['P1.1_Tempo_Servico', 'P1.2_Segmentos', 'P1.3_Conforto_Tec', 'P1.4_Num_Turmas', 'P1.5_Num_Planos', 'P1.6_Outra_Escola_Metodo']
-create_percentage_summary(df_professores, prof_columns, "Resumo de Porcentagens - Professores", "percentagens_professores.csv")
+create_percentage_summary(freq_prof, prof_columns, "Resumo de Porcentagens - Professores", "percentagens_professores.csv")
 
 # Resumo para supervisores
 if not df_supervisores.empty:
     sup_columns = ['S1.1_Funcao_Gestora', 'S1.2_Tempo_Gestao', 'S1.3_Outras_Plataformas']
-    create_percentage_summary(df_supervisores, sup_columns, "Resumo de Porcentagens - Supervisores", "percentagens_supervisores.csv")
+    create_percentage_summary(freq_sup, sup_columns, "Resumo de Porcentagens - Supervisores", "percentagens_supervisores.csv")
+
+# Resumos ponderados (somente quando o process.py calculou pesos por raking)
+if WEIGHT_COLUMN in df_professores.columns:
+    freq_prof_w = frequency_tables('professores', df_professores, weights=WEIGHT_COLUMN)
+    create_percentage_summary(freq_prof_w, prof_columns, "Resumo de Porcentagens Ponderadas - Professores", "percentagens_ponderadas_professores.csv")
+if not df_supervisores.empty and WEIGHT_COLUMN in df_supervisores.columns:
+    freq_sup_w = frequency_tables('supervisores', df_supervisores, weights=WEIGHT_COLUMN)
+    create_percentage_summary(freq_sup_w, sup_columns, "Resumo de Porcentagens Ponderadas - Supervisores", "percentagens_ponderadas_supervisores.csv")
 
 print("\n" + "="*60)
 print("ANÁLISE DE PORCENTAGENS CONCLUÍDA")
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Executa todas as etapas do pipeline num único interpretador.
+
+As etapas continuam sendo scripts independentes; aqui elas rodam em sequência
+compartilhando as bibliotecas já importadas e o gravador de saídas, e a
+barreira final espera todas as gravações em segundo plano.
+"""
+import os
+import runpy
+import sys
+import time
+
+from output_writer import writer
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = [
+    'process.py',
+    'graph.py',
+    'percentages.py',
+    'qualitative_analysis.py',
+    'consolidated_report.py',
+    'process-logs.py',
+    'dashboard.py',
+]
+
+
+def run_stage(stage):
+    """Roda um script de etapa como se fosse chamado por `python <etapa>`."""
+    try:
+        runpy.run_path(os.path.join(APP_DIR, stage), run_name='__main__')
+    except SystemExit as e:
+        # Mesma semântica do encadeamento com `&&`: só interrompe com código de erro
+        if e.code not in (None, 0):
+            raise
+
+
+def run_pipeline(stages=STAGES):
+    """Roda as etapas em ordem e espera a gravação de todas as saídas."""
+    inicio = time.perf_counter()
+    for stage in stages:
+        print(f"\n>>> Etapa: {stage}")
+        run_stage(stage)
+    writer.flush()
+    print(f"\nPipeline concluído em {time.perf_counter() - inicio:.1f}s.")
+
+
+if __name__ == '__main__':
+    run_pipeline(sys.argv[1:] or STAGES)
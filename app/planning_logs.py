@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Tempos de planejamento: categorias do formulário e métricas dos logs do PlanningApp.
+
+O formulário pergunta o tempo por aula em faixas (P2.6 e P2.7, estimados
+para os métodos Manual e Planilha); os logs do PlanningApp trazem, por
+usuário, o tempo registrado e o número de planejamentos. Aqui ficam as
+faixas, a padronização das respostas, a conversão de minutos em faixas (e
+de faixas em minutos, pelo ponto médio) e as métricas dos logs por função,
+usadas pelo `process-logs.py` e pelas etapas que servem os agregados.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+# --- Faixas de tempo (padrão final) ---
+CATEGORIES = [
+    'Menos de 10 minutos',
+    'Entre 10 e 20 minutos',
+    'Entre 20 e 30 minutos',
+    'Entre 30 e 45 minutos',
+    'Mais de 45 minutos'
+]
+
+# Variantes aceitas no CSV -> faixa padrão
+TIME_VARIANTS = {
+    'Menos de 10 minutos': 'Menos de 10 minutos',
+    'Menos de 10 min': 'Menos de 10 minutos',
+    'menos de 10 minutos': 'Menos de 10 minutos',
+    'Entre 10 e 20 minutos': 'Entre 10 e 20 minutos',
+    '10 a 20 minutos': 'Entre 10 e 20 minutos',
+    'Entre 10 e 20 min': 'Entre 10 e 20 minutos',
+    'entre 10 e 20 minutos': 'Entre 10 e 20 minutos',
+    'Entre 20 e 30 minutos': 'Entre 20 e 30 minutos',
+    '20 a 30 minutos': 'Entre 20 e 30 minutos',
+    'Entre 30 e 45 minutos': 'Entre 30 e 45 minutos',
+    '30 a 45 minutos': 'Entre 30 e 45 minutos',
+    'Mais de 45 minutos': 'Mais de 45 minutos',
+    'mais de 45 minutos': 'Mais de 45 minutos',
+    'Mais de 45 min': 'Mais de 45 minutos',
+}
+
+# Ponto médio de cada faixa, em minutos (a última faixa é aberta)
+CATEGORY_MINUTES = {
+    'Menos de 10 minutos': 5,
+    'Entre 10 e 20 minutos': 15,
+    'Entre 20 e 30 minutos': 25,
+    'Entre 30 e 45 minutos': 37.5,
+    'Mais de 45 minutos': 60,
+}
+
+# Limites superiores das faixas, em minutos
+_BOUNDS = [10, 20, 30, 45]
+
+
+def standardize_times(column):
+    """Leva as respostas de tempo às faixas padrão; variantes desconhecidas viram NaN."""
+    text = column.where(column.isna(), column.astype(str).str.strip())
+    return text.map(TIME_VARIANTS)
+
+
+def categorize_minutes(minutes):
+    """Faixa de um tempo em minutos."""
+    return CATEGORIES[int(np.searchsorted(_BOUNDS, minutes, side='right'))]
+
+
+def category_minutes(category):
+    """Ponto médio da faixa, em minutos (None para uma faixa desconhecida)."""
+    return CATEGORY_MINUTES.get(category)
+
+
+def category_counts(categories):
+    """Contagem por faixa, na ordem de CATEGORIES (faixas sem respostas com zero)."""
+    return pd.Series(categories, dtype=object).value_counts().reindex(CATEGORIES, fill_value=0)
+
+
+def load_logs(path='./input/logs.json'):
+    """Conteúdo (`payload`) do arquivo de logs."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['payload']
+
+
+def valid_users(user_metrics, role='Professor'):
+    """Usuários da função com pelo menos um planejamento e tempo registrado positivo."""
+    return [
+        u for u in user_metrics
+        if (u.get('owner', {}).get('predominantly_role') == role
+            and u.get('planning_count', 0) > 0
+            and u.get('average_seconds') is not None
+            and u.get('average_seconds', 0) > 0)
+    ]
+
+
+class PlanningLogs:
+    """Tempos dos logs por função: minutos e planejamentos de cada usuário válido."""
+
+    def __init__(self, user_metrics, overall, estimated=None):
+        self.overall_minutes = overall['average_seconds'] / 60
+        # Faixas estimadas no formulário por método ({'Manual': [...], 'Planilha': [...]}), quando conhecidas
+        self.estimated = estimated or {}
+        roles = dict.fromkeys(u.get('owner', {}).get('predominantly_role') for u in user_metrics)
+        self._users = {}
+        for role in roles:
+            users = valid_users(user_metrics, role)
+            if users:
+                self._users[role] = (np.array([u['average_seconds'] / 60 for u in users]),
+                                     np.array([u['planning_count'] for u in users]))
+
+    @classmethod
+    def load(cls, path='./input/logs.json'):
+        payload = load_logs(path)
+        return cls(payload['user_metrics'], payload['overall_metrics'])
+
+    @property
+    def roles(self):
+        """Funções com pelo menos um usuário válido."""
+        return list(self._users)
+
+    def minutes(self, role):
+        """Tempo registrado de cada usuário da função, em minutos (vazio se a função não existir)."""
+        return self._users.get(role, (np.array([]), None))[0]
+
+    def weighted_mean(self, role):
+        """Tempo médio por planejamento da função: média dos usuários ponderada pelos seus planejamentos."""
+        if role not in self._users:
+            return np.nan
+        minutes, counts = self._users[role]
+        return (minutes * counts).sum() / counts.sum()
+
+    def totals(self, role):
+        """Usuários válidos, minutos totais (média x planejamentos) e planejamentos da função.
+
+        Os três são aditivos entre escolas, e minutos / planejamentos é a `weighted_mean`.
+        """
+        if role not in self._users:
+            return 0, 0.0, 0
+        minutes, counts = self._users[role]
+        return len(minutes), float((minutes * counts).sum()), int(counts.sum())
+
+    def categories(self, role):
+        """Faixa de tempo de cada usuário da função."""
+        return [categorize_minutes(m) for m in self.minutes(role)]
+
+    def bins(self, role):
+        """Usuários da função por faixa de tempo, na ordem de CATEGORIES."""
+        return category_counts(self.categories(role))
+
+    def estimated_bins(self, method):
+        """Respostas do formulário por faixa de tempo estimada para o método, ou None."""
+        if method not in self.estimated:
+            return None
+        return category_counts(self.estimated[method])
+
+    def percentiles(self, role, q=(25, 50, 75, 90)):
+        """Percentis do tempo dos usuários da função, em minutos ({percentil: minutos})."""
+        minutes = self.minutes(role)
+        if len(minutes) == 0:
+            return {p: np.nan for p in q}
+        return dict(zip(q, np.percentile(minutes, q)))
+
+
+# Logs já carregados, compartilhados entre as etapas do mesmo processo
+_cache = {}
+
+
+def register_planning_logs(logs):
+    """Guarda as métricas dos logs para as etapas seguintes."""
+    _cache['logs'] = logs
+
+
+def planning_logs(path='./input/logs.json'):
+    """Métricas dos logs em memória ou carregadas de `path`."""
+    logs = _cache.get('logs')
+    if logs is None:
+        logs = PlanningLogs.load(path)
+        _cache['logs'] = logs
+    return logs
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Configuração centralizada de plotagem.
+
+matplotlib e seaborn só são importados na primeira chamada de
+`carregar_plotagem`, de modo que etapas que não geram gráficos não pagam o
+custo de importação nem da leitura do cache de fontes.
+"""
+
+# --- Estilos por tipo de gráfico ---
+ESTILOS = {
+    # Gráficos de perfil e comparativos (graph.py, percentages.py)
+    'artigo': {
+        'style': 'seaborn-v0_8-colorblind',
+        'rc': {
+            'figure.figsize': (8, 5),  # Mais compacto para artigo científico
+            'font.size': 9,  # Fonte menor mas legível
+            'axes.titlesize': 10,
+            'axes.labelsize': 9,
+            'xtick.labelsize': 8,
+            'ytick.labelsize': 8,
+            'legend.fontsize': 8,
+            'figure.autolayout': True,
+            'savefig.dpi': 300,  # Alta resolução para artigo científico
+            'savefig.bbox': 'tight',  # Remove espaços em branco
+        },
+    },
+    # Palavras-chave das respostas abertas (qualitative_analysis.py)
+    'qualitativo': {
+        'style': None,
+        'rc': {
+            'figure.figsize': (12, 8),
+            'font.size': 11,
+            'figure.autolayout': True,
+            'savefig.dpi': 150,
+        },
+    },
+    # Tempos de planejamento (process-logs.py)
+    'logs': {
+        'style': None,
+        'rc': {
+            'font.size': 11,
+            'savefig.dpi': 150,
+        },
+    },
+}
+
+_plt = None
+_sns = None
+_estilo_atual = None
+
+
+def carregar_plotagem(estilo='artigo'):
+    """Importa matplotlib/seaborn sob demanda e aplica o estilo pedido.
+
+    Retorna a tupla (plt, sns). O backend não interativo é fixado aqui, uma
+    única vez; trocar de estilo restaura os padrões antes de aplicar o novo.
+    """
+    global _plt, _sns, _estilo_atual
+
+    if _plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        _plt, _sns = plt, sns
+
+    if estilo != _estilo_atual:
+        config = ESTILOS[estilo]
+        _plt.rcdefaults()
+        _sns.set_theme(style="whitegrid")
+        if config['style']:
+            _plt.style.use(config['style'])
+        _plt.rcParams.update(config['rc'])
+        _estilo_atual = estilo
+
+    return _plt, _sns
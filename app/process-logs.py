@@ -1,52 +1,37 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import json
 import os
+from plot_config import carregar_plotagem
+from output_writer import writer
+from bootstrap import bootstrap, percentile_interval
+from validation import DomainRule, DomainValidator, read_validated_csv, write_reports
+from planning_logs import (CATEGORIES, TIME_VARIANTS, PlanningLogs, categorize_minutes, category_counts,
+                           category_minutes, planning_logs, register_planning_logs, standardize_times,
+                           valid_users)
 
 # Configurações
-sns.set_theme(style="whitegrid")
-plt.rcParams['font.size'] = 11
-plt.rcParams['savefig.dpi'] = 150
 output_dir = "graficos_tcc"
 os.makedirs(output_dir, exist_ok=True)
 
-# --- 1. DEFINIR CATEGORIAS DE TEMPO (PADRÃO FINAL) ---
-categorias = [
-    'Menos de 10 minutos',
-    'Entre 10 e 20 minutos',
-    'Entre 20 e 30 minutos',
-    'Entre 30 e 45 minutos',
-    'Mais de 45 minutos'
-]
-
-# --- 2. MAPEAMENTO DE VARIANTES (para aceitar tudo que vier no CSV) ---
-mapeamento_tempo = {
-    'Menos de 10 minutos': 'Menos de 10 minutos',
-    'Menos de 10 min': 'Menos de 10 minutos',
-    'menos de 10 minutos': 'Menos de 10 minutos',
-    'Entre 10 e 20 minutos': 'Entre 10 e 20 minutos',
-    '10 a 20 minutos': 'Entre 10 e 20 minutos',
-    'Entre 10 e 20 min': 'Entre 10 e 20 minutos',
-    'entre 10 e 20 minutos': 'Entre 10 e 20 minutos',
-    'Entre 20 e 30 minutos': 'Entre 20 e 30 minutos',
-    '20 a 30 minutos': 'Entre 20 e 30 minutos',
-    'Entre 30 e 45 minutos': 'Entre 30 e 45 minutos',
-    '30 a 45 minutos': 'Entre 30 e 45 minutos',
-    'Mais de 45 minutos': 'Mais de 45 minutos',
-    'mais de 45 minutos': 'Mais de 45 minutos',
-    'Mais de 45 min': 'Mais de 45 minutos',
-}
+# --- 1-2. CATEGORIAS DE TEMPO E VARIANTES ACEITAS NO CSV (planning_logs.py) ---
+categorias = CATEGORIES
+mapeamento_tempo = TIME_VARIANTS
 
 # --- 3. CARREGAR CSV ---
 csv_path = './input/Avaliação da Evolução dos Métodos de Planejamento de Aula.csv'
 if not os.path.exists(csv_path):
     csv_path = './input/respostas.csv'
 
-df = pd.read_csv(csv_path)
+# Tempos fora do mapeamento são listados em output/validacao_tempos_logs_*.csv
+validador = DomainValidator([
+    DomainRule('Tempo', lambda col: col.startswith(('2.6 - No método', '2.7 - No método')), mapeamento_tempo, strip=True),
+])
+df = read_validated_csv(csv_path, validador)
 print(f"CSV carregado: {len(df)} respostas")
+print(validador.summary())
+write_reports(validador, "validacao_tempos_logs", writer)
 
 # Renomear colunas
 df = df.rename(columns={
@@ -59,14 +44,8 @@ professores = df[df['Funcao'] == 'Professor'].copy()
 print(f"Professores no CSV: {len(professores)}")
 
 # --- 4. PADRONIZAR TEMPOS DO CSV ---
-def padronizar_tempo(valor):
-    if pd.isna(valor):
-        return None
-    valor_str = str(valor).strip()
-    return mapeamento_tempo.get(valor_str, None)
-
-manual_raw = professores['P2.6_Tempo_Aula_Manual'].apply(padronizar_tempo)
-planilha_raw = professores['P2.7_Tempo_Aula_Planilha'].apply(padronizar_tempo)
+manual_raw = standardize_times(professores['P2.6_Tempo_Aula_Manual'])
+planilha_raw = standardize_times(professores['P2.7_Tempo_Aula_Planilha'])
 
 manual = manual_raw.dropna().tolist()
 planilha = planilha_raw.dropna().tolist()
@@ -84,44 +63,26 @@ print(f"Usuários no logs: {len(user_metrics)}")
 print(f"Média geral (todos): {overall['average_seconds']:.1f}s → {overall['average_seconds']/60:.1f} min")
 
 # --- 6. Filtrar professores válidos ---
-prof_logs = [
-    u for u in user_metrics
-    if (u.get('owner', {}).get('predominantly_role') == 'Professor'
-        and u.get('planning_count', 0) > 0
-        and u.get('average_seconds') is not None
-        and u.get('average_seconds', 0) > 0)
-]
+prof_logs = valid_users(user_metrics, 'Professor')
+
+# Métricas por função, para as etapas que servem os agregados (painel, consultas)
+register_planning_logs(PlanningLogs(user_metrics, overall, estimated={'Manual': manual, 'Planilha': planilha}))
 
 print(f"Professores com logs válidos: {len(prof_logs)}")
 
 # --- 7. Categor...
-def categorizar_minutos(minutos):
-    if minutos < 10: return categorias[0]
-    elif minutos < 20: return categorias[1]
-    elif minutos < 30: return categorias[2]
-    elif minutos < 45: return categorias[3]
-    else: return categorias[4]
-
 planning_individual = [
-    categorizar_minutos(u['average_seconds'] / 60)
+    categorize_minutes(u['average_seconds'] / 60)
     for u in prof_logs
 ]
 
 # --- 8. CÁLCULO DAS MÉDIAS EM MINUTOS ---
-def tempo_para_minutos(categoria):
-    if categoria == 'Menos de 10 minutos': return 5
-    elif categoria == 'Entre 10 e 20 minutos': return 15
-    elif categoria == 'Entre 20 e 30 minutos': return 25
-    elif categoria == 'Entre 30 e 45 minutos': return 37.5
-    elif categoria == 'Mais de 45 minutos': return 60
-    return None
-
 # Média estimada Manual e Planilha (em minutos)
-media_manual_min = pd.Series([tempo_para_minutos(x) for x in manual]).mean()
-media_planilha_min = pd.Series([tempo_para_minutos(x) for x in planilha]).mean()
+media_manual_min = pd.Series([category_minutes(x) for x in manual]).mean()
+media_planilha_min = pd.Series([category_minutes(x) for x in planilha]).mean()
 
-# Média real PlanningApp (por professor)
-media_planning_individual_min = sum(u['average_seconds'] for u in prof_logs) / sum(u['planning_count'] for u in prof_logs) / 60
+# Média real PlanningApp (média dos professores ponderada pelos seus planejamentos)
+media_planning_individual_min = planning_logs().weighted_mean('Professor')
 
 # Média geral (overall)
 media_geral_min = overall['average_seconds'] / 60
@@ -132,13 +93,31 @@ print(f"  Planilha (estimado): {media_planilha_min:.1f} min")
 print(f"  PlanningApp (média ponderada por professor): {media_planning_individual_min:.1f} min")
 print(f"  PlanningApp (geral): {media_geral_min:.1f} min")
 
+# IC bootstrap (95%): Manual e Planilha reamostram as respostas do CSV; a média
+# ponderada do PlanningApp reamostra os professores dos logs (soma de minutos x
+# planejamentos / soma de planejamentos, a mesma razão da média acima).
+# A média geral vem pronta dos logs e não tem intervalo.
+def intervalo_media(valores, estatistica='mean'):
+    if len(valores) == 0:
+        return np.nan, np.nan
+    inf, sup = percentile_interval(bootstrap(valores, estatistica))
+    return inf[0], sup[0]
+
+ic_manual = intervalo_media([category_minutes(x) for x in manual])
+ic_planilha = intervalo_media([category_minutes(x) for x in planilha])
+ic_planning_individual = intervalo_media(
+    [[u['average_seconds'] / 60 * u['planning_count'], u['planning_count']] for u in prof_logs], 'ratio')
+print(f"  IC 95% Manual: [{ic_manual[0]:.1f}; {ic_manual[1]:.1f}] min")
+print(f"  IC 95% Planilha: [{ic_planilha[0]:.1f}; {ic_planilha[1]:.1f}] min")
+print(f"  IC 95% PlanningApp (média ponderada por professor): [{ic_planning_individual[0]:.1f}; {ic_planning_individual[1]:.1f}] min")
+
 # --- 9. FUNÇÃO DE PIZZA ---
 def gerar_pizza(dados, titulo, arquivo, cores=None):
     if not dados:
         print(f"[AVISO] Sem dados válidos para: {titulo}")
         return
 
-    contagem = pd.Series(dados).value_counts().reindex(categorias, fill_value=0)
+    contagem = category_counts(dados)
     if contagem.sum() == 0:
         print(f"[AVISO] Soma zero após reindex em: {titulo}")
         return
@@ -156,12 +135,13 @@ def gerar_pizza(dados, titulo, arquivo, cores=None):
     )
     plt.title(titulo, fontsize=14, pad=20, fontweight='bold')
     caminho = os.path.join(output_dir, arquivo)
-    plt.savefig(caminho, bbox_inches='tight')
+    writer.save_figure(plt.gcf(), caminho, bbox_inches='tight')
     plt.close()
     print(f"[OK] Gráfico salvo: {caminho}")
 
 # --- 10. GERAR GRÁFICOS DE PIZZA ---
 print("\nGerando gráficos de pizza...")
+plt, sns = carregar_plotagem('logs')
 
 gerar_pizza(manual, 'Tempo Médio Estimado por Aula\nMétodo Manual', '22_manual_pizza.png')
 gerar_pizza(planilha, 'Tempo Médio Estimado por Aula\nMétodo Planilha', '23_planilha_pizza.png')
@@ -171,19 +151,26 @@ gerar_pizza(planning_individual, 'Tempo Médio por Aula\nPlanningApp', '24_plann
 plt.figure(figsize=(10, 6))
 metodos = ['Manual', 'Planilha', 'PlanningApp']
 medias = [media_manual_min, media_planilha_min, media_geral_min]
-
-bars = plt.bar(metodos, medias, color=['#ff7f0e', '#1f77b4', '#2ca02c'], edgecolor='black', linewidth=1.2)
+intervalos = [ic_manual, ic_planilha, (media_geral_min, media_geral_min)]
+erros = np.nan_to_num(np.clip([
+    [m - inf for m, (inf, _) in zip(medias, intervalos)],
+    [sup - m for m, (_, sup) in zip(medias, intervalos)],
+], 0, None))
+
+bars = plt.bar(metodos, medias, color=['#ff7f0e', '#1f77b4', '#2ca02c'], edgecolor='black', linewidth=1.2,
+               yerr=erros, capsize=6, error_kw={'elinewidth': 1, 'ecolor': '#333333'})
 plt.ylabel('Tempo Médio (minutos)', fontsize=12)
 plt.title('Comparação das Médias de Tempo por Método', fontsize=14, fontweight='bold', pad=20)
 
 # Adicionar valores nas barras
-for bar, valor in zip(bars, medias):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
+for bar, valor, sup in zip(bars, medias, erros[1]):
+    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + sup + 1,
              f'{valor:.1f} min', ha='center', va='bottom', fontsize=11, fontweight='bold')
 
-plt.ylim(0, max(medias) * 1.2)
+plt.ylim(0, max(m + e for m, e in zip(medias, erros[1])) * 1.2)
+plt.figtext(0.5, -0.02, 'Barras de erro: IC 95% bootstrap da média estimada (PlanningApp: média geral dos logs, sem intervalo)', ha='center', fontsize=9, style='italic')
 caminho_bar = os.path.join(output_dir, '25_medias_barras.png')
-plt.savefig(caminho_bar, bbox_inches='tight')
+writer.save_figure(plt.gcf(), caminho_bar, bbox_inches='tight')
 plt.close()
 print(f"[OK] Gráfico de barras salvo: {caminho_bar}")
 
@@ -196,9 +183,9 @@ categorias_ordenadas = ['Menos de 10 min', '10-20 min', '20-30 min', '30-45 min'
 cores = ['#2E8B57', '#FF6347', '#4682B4', '#DDA0DD', '#8B4513']
 
 # Normalizar dados para porcentagem
-manual_contagem = pd.Series(manual).value_counts().reindex(categorias, fill_value=0)
-planilha_contagem = pd.Series(planilha).value_counts().reindex(categorias, fill_value=0)
-planning_contagem = pd.Series(planning_individual).value_counts().reindex(categorias, fill_value=0)
+manual_contagem = category_counts(manual)
+planilha_contagem = category_counts(planilha)
+planning_contagem = category_counts(planning_individual)
 
 manual_pct = manual_contagem / manual_contagem.sum() * 100
 planilha_pct = planilha_contagem / planilha_contagem.sum() * 100
@@ -240,7 +227,7 @@ ax.text(0.02, 0.85, f'PlanningApp - Média Geral: {media_geral_min:.1f} min',
 
 plt.tight_layout()
 caminho = os.path.join(output_dir, '21_comparacao_4_pizzas.png')
-plt.savefig(caminho, bbox_inches='tight', dpi=150)
+writer.save_figure(fig, caminho, bbox_inches='tight', dpi=150)
 plt.close()
 print(f"[OK] Comparativo compacto salvo: {caminho}")
 
@@ -1,14 +1,77 @@
 import pandas as pd
 import numpy as np
+from output_writer import writer
+from frequencies import frequency_tables
+from segment_cube import SegmentCube, register_cube
+from results import group_results
+from significance import PAIRS, run_tests
+from bootstrap import method_mean_intervals
+from reliability import SECTIONS_PROF, SECTIONS_SUP, section_reliability
+from weighting import MARGINS_PATH, WEIGHT_COLUMN, design_effect, load_margins, rake, weighted_means
+from validation import DomainRule, DomainValidator, read_validated_csv, write_reports
+from incremental import IngestState, processed_respondents, row_fingerprints, save_totals
+import os
+import re
+import sys
+
+# --- 0. Answer Domains (checked while loading, coded in section 4) ---
+# !! IMPORTANT: Update 'Supervisor' if the actual value in your form is different !!
+supervisor_role_name = 'Supervisor' # Or 'Coordenador(a) / Supervisor(a) Pedagógico(a)' etc.
+
+likert_map = {
+    'Discordo totalmente': 1,
+    'Discordo parcialmente': 2,
+    'Neutro/Indiferente': 3,
+    'Concordo parcialmente': 4,
+    'Concordo totalmente': 5
+}
+
+time_categories = ['Menos de 10 minutos', 'Entre 10 e 20 minutos', 'Entre 20 e 30 minutos', 'Entre 30 e 45 minutos', 'Mais de 45 minutos']
+
+likert_header = re.compile(r'\[(Manual|Planilha|PlanningApp)\](\.\d+)?\s*$')
+validator = DomainValidator([
+    DomainRule('Funcao', lambda col: col == 'Qual função você exerce?', ['Professor', supervisor_role_name]),
+    DomainRule('Likert', lambda col: likert_header.search(col) is not None, likert_map),
+    DomainRule('Tempo', lambda col: col.startswith(('2.6 - No método', '2.7 - No método')), time_categories),
+])
 
 # --- 1. Load and Initial Clean ---
 try:
-    df = pd.read_csv('./input/respostas.csv')
+    df = read_validated_csv('./input/respostas.csv', validator)
     print("CSV loaded successfully.")
+    print(validator.summary())
 except FileNotFoundError:
     print("Error: CSV file not found. Make sure 'Avaliação da Evolução dos Métodos de Planejamento de Aula.csv' is in the current directory.")
     exit()
 
+# --- 1.1 Incremental Mode (python process.py --incremental) ---
+# Only rows not ingested by the previous run are coded; edited/removed rows, output files out of sync
+# with the saved state or survey weights force a full run, and every full run rewrites the state
+incremental = '--incremental' in sys.argv[1:]
+new_rows = None
+fingerprints = row_fingerprints(df)
+ingest_state = IngestState.load() if incremental else None
+if incremental:
+    if ingest_state is None:
+        print("Modo incremental: nenhum estado salvo; processamento completo.")
+    elif os.path.exists(MARGINS_PATH):
+        print("Modo incremental: pesos por raking não são aditivos; processamento completo.")
+        ingest_state = None
+    elif not ingest_state.matches(processed_respondents(ingest_state.groups)):
+        print("Modo incremental: arquivos *_processado.csv diferentes do estado salvo; processamento completo.")
+        ingest_state = None
+    else:
+        row_diff = ingest_state.diff(fingerprints)
+        if row_diff.full_recompute:
+            print(f"Modo incremental: {row_diff.describe()}; processamento completo.")
+            ingest_state = None
+        else:
+            print(f"Modo incremental: {row_diff.describe()}.")
+            new_rows = row_diff.new
+            df = df[np.isin(list(fingerprints), new_rows)]
+if ingest_state is None:
+    ingest_state = IngestState()
+
 # Drop potentially empty/redundant score/feedback columns
 cols_to_drop = [col for col in df.columns if '[Pontuação]' in col or '[Feedback]' in col]
 df = df.drop(columns=cols_to_drop)
@@ -17,8 +80,6 @@ df = df.drop(columns=cols_to_drop)
 df = df.rename(columns={'Qual função você exerce?': 'Funcao'})
 
 # --- 2. Separate DataFrames ---
-# !! IMPORTANT: Update 'Supervisor' if the actual value in your form is different !!
-supervisor_role_name = 'Supervisor' # Or 'Coordenador(a) / Supervisor(a) Pedagógico(a)' etc.
 df_professores = df[df['Funcao'] == 'Professor'].copy()
 df_supervisores = df[df['Funcao'] == supervisor_role_name].copy()
 
@@ -32,12 +93,12 @@ print(f"Separated data: {len(df_professores)} Professors, {len(df_supervisores)}
 
 # !! REVIEW CAREFULLY !! - Map long names to short, usable names
 rename_map_prof = {
-    '1.1 - Há quantos anos você leciona na Escola Estadual Doutor José Augusto? ': 'P1.1_Tempo_Servico',
+    '1.1 - Há quantos anos você leciona na {escola}? ': 'P1.1_Tempo_Servico',
     '1.2 - Quais segmentos você leciona atualmente?': 'P1.2_Segmentos',
     '1.3 - Em uma escala de muito baixo a muito alto, qual seu nível de conforto geral com o uso de tecnologias digitais?': 'P1.3_Conforto_Tec',
     '1.4 - Para quantas TURMAS diferentes você leciona neste ano letivo?': 'P1.4_Num_Turmas',
     '1.5 - Ao todo, quantos "PLANOS DE AULA/CRONOGRAMA DE AULA" (Conjunto de planejamentos de uma disciplina em um bimestre) você é responsável por desempenhar?': 'P1.5_Num_Planos',
-    '1.6 - Você também leciona em outra(s) escola(s) além da E.E. Doutor José Augusto?  Se sim, qual é o principal método de gestão acadêmica utilizado?': 'P1.6_Outra_Escola_Metodo',
+    '1.6 - Você também leciona em outra(s) escola(s) além da {escola}?  Se sim, qual é o principal método de gestão acadêmica utilizado?': 'P1.6_Outra_Escola_Metodo',
     # Section 2: Eficiência
     '2.1 - O método era rápido para registrar planejamentos de aula [Manual]': 'P2.1_Rapidez_Manual',
     '2.1 - O método era rápido para registrar planejamentos de aula [Planilha]': 'P2.1_Rapidez_Planilha',
@@ -114,6 +175,13 @@ rename_map_prof = {
     '6.7 - Pensando nas funcionalidades pedagógicas (criação de planejamentos, gestão de turmas etc.), quais foram os principais benefícios ou desafios encontrados no novo  sistema de planejamento?': 'P6.7_Beneficios_Desafios'
 }
 
+# Headers that name the school: '{escola}' matches whatever school the export comes from
+school_placeholder = re.escape('{escola}')
+for key, short_name in list(rename_map_prof.items()):
+    if '{escola}' in key:
+        pattern = re.compile(re.escape(key).replace(school_placeholder, '.+?') + '$')
+        rename_map_prof.update({col: short_name for col in df_professores.columns if pattern.match(col)})
+
 # Apply renaming (ignore errors for columns not present, e.g., supervisor questions)
 df_professores = df_professores.rename(columns=rename_map_prof, errors='ignore')
 
@@ -204,41 +272,71 @@ df_supervisores = df_supervisores.rename(columns=rename_map_sup, errors='ignore'
 
 
 # --- 4. Codify Likert Scale ---
-likert_map = {
-    'Discordo totalmente': 1,
-    'Discordo parcialmente': 2,
-    'Neutro/Indiferente': 3,
-    'Concordo parcialmente': 4,
-    'Concordo totalmente': 5
-}
-
-likert_cols_prof = [col for col in df_professores.columns if any(m in col for m in ['_Manual', '_Planilha', '_PlanningApp']) and not col.startswith('P2.6') and not col.startswith('P2.7')]
+# P6.3-P6.5 (sentiment words per method) are open-ended, not Likert
+likert_cols_prof = [col for col in df_professores.columns if any(m in col for m in ['_Manual', '_Planilha', '_PlanningApp']) and not col.startswith(('P2.6', 'P2.7', 'P6.'))]
 df_professores[likert_cols_prof] = df_professores[likert_cols_prof].replace(likert_map)
-# Convert to numeric, coercing errors (e.g., if a non-likert value exists)
+# Convert to numeric, coercing errors (values outside likert_map are listed in output/validacao_respostas_*.csv)
 for col in likert_cols_prof:
     df_professores[col] = pd.to_numeric(df_professores[col], errors='coerce')
 
 
-likert_cols_sup = [col for col in df_supervisores.columns if any(m in col for m in ['_Manual', '_Planilha', '_PlanningApp'])]
+# S7.x are open-ended (S7.1_Gargalo_Planilhas would otherwise match '_Planilha')
+likert_cols_sup = [col for col in df_supervisores.columns if any(m in col for m in ['_Manual', '_Planilha', '_PlanningApp']) and not col.startswith('S7.')]
 df_supervisores[likert_cols_sup] = df_supervisores[likert_cols_sup].replace(likert_map)
 for col in likert_cols_sup:
     df_supervisores[col] = pd.to_numeric(df_supervisores[col], errors='coerce')
 
+# --- 4.0 Incremental Update: add only the new rows to the saved totals and stop ---
+# Tests, bootstrap intervals, reliability and the segment cube are not additive and stay from the last full run
+if new_rows is not None:
+    for group, data, likert_cols in [('professores', df_professores, likert_cols_prof),
+                                     ('supervisores', df_supervisores, likert_cols_sup)]:
+        totals = ingest_state.add_group(group, data, likert_cols)
+        if len(data):
+            processed_path = f"output/{group}_processado.csv"
+            writer.wait_for(processed_path)
+            writer.write_csv(pd.concat([pd.read_csv(processed_path), data], ignore_index=True), processed_path, index=False)
+        writer.write_csv(totals.means(), f"output/medias_{group}.csv")
+        save_totals(group, totals)
+    ingest_state.record(fingerprints, new_rows)
+    ingest_state.save()
+    print(f"Modo incremental: {len(df_professores)} professores e {len(df_supervisores)} supervisores adicionados; "
+          "médias, frequências e palavras-chave atualizadas (testes e confiabilidade são da última execução completa; "
+          "rode percentages.py e qualitative_analysis.py para atualizar percentagens_* e analise_qualitativa_*).")
+    exit()
+
+# --- 4.1 Survey Weights (raking to known population margins, if provided) ---
+margins = load_margins()
+if margins is not None:
+    for group_name, group_df in [('Professores', df_professores), ('Supervisores', df_supervisores)]:
+        weights, iterations, converged = rake(group_df, margins)
+        group_df[WEIGHT_COLUMN] = weights
+        deff, n_eff = design_effect(weights) if len(weights) else (np.nan, 0)
+        status = "convergiu" if converged else "NÃO convergiu"
+        print(f"Pesos ({group_name}): raking {status} em {iterations} iterações; "
+              f"pesos entre {weights.min():.2f} e {weights.max():.2f}, N efetivo {n_eff:.1f} (deff {deff:.2f})")
+else:
+    print("Margens da população não encontradas: análises sem ponderação.")
+
 # --- 5. Quantitative Analysis ---
 
 # 5.1 Profile Analysis (Frequencies)
+# One pass over every categorical column; later stages reuse these tables
+freq_prof = frequency_tables('professores', df_professores)
+freq_sup = frequency_tables('supervisores', df_supervisores)
+
 print("\n--- Perfil dos Professores ---")
 for col in df_professores.columns:
-    if col.startswith('P1.'):
+    if col.startswith('P1.') and col in freq_prof:
         print(f"\n{col}:")
-        print(df_professores[col].value_counts(normalize=True).map("{:.1%}".format)) # Percentages
+        print(freq_prof.get(col).proportions().map("{:.1%}".format)) # Percentages
 
 # (Repeat for Supervisors if needed)
 print("\n--- Perfil dos Supervisores ---")
 for col in df_supervisores.columns:
-     if col.startswith('S1.'):
+     if col.startswith('S1.') and col in freq_sup:
         print(f"\n{col}:")
-        print(df_supervisores[col].value_counts(normalize=True).map("{:.1%}".format))
+        print(freq_sup.get(col).proportions().map("{:.1%}".format))
 
 # 5.2 Likert Analysis (Means) - Professors
 print("\n--- Médias de Concordância (Professores) ---")
@@ -277,15 +375,62 @@ for col in likert_cols_sup:
 df_results_sup = pd.DataFrame(results_sup).T[['Manual', 'Planilha', 'PlanningApp']]
 print(df_results_sup.to_string(float_format="%.2f"))
 
+# Weighted means (same layout as the unweighted tables)
+if margins is not None:
+    df_results_prof_w = weighted_means(df_professores, likert_cols_prof, df_professores[WEIGHT_COLUMN]).reindex(df_results_prof.index)
+    df_results_sup_w = weighted_means(df_supervisores, likert_cols_sup, df_supervisores[WEIGHT_COLUMN]).reindex(df_results_sup.index)
+    print("\n--- Médias Ponderadas (Professores) ---")
+    print(df_results_prof_w.to_string(float_format="%.2f"))
+
+# 5.2.1 Paired significance tests (Friedman across methods, Wilcoxon per pair, Holm-corrected)
+print("\n--- Testes de Significância (Professores) ---")
+df_tests_prof = run_tests(df_professores, df_results_prof.index)
+print(df_tests_prof[['Friedman_N', 'Friedman_Qui2', 'Friedman_p_Holm', 'Kendall_W']].dropna(how='all').to_string(float_format="%.3f"))
+
+print("\n--- Testes de Significância (Supervisores) ---")
+df_tests_sup = run_tests(df_supervisores, df_results_sup.index)
+print(df_tests_sup[['Friedman_N', 'Friedman_Qui2', 'Friedman_p_Holm', 'Kendall_W']].dropna(how='all').to_string(float_format="%.3f"))
+
+# 5.2.2 Bootstrap confidence intervals for every (question, method) mean and method difference
+df_ci_prof = method_mean_intervals(df_professores, df_results_prof.index, pairs=PAIRS)
+df_ci_sup = method_mean_intervals(df_supervisores, df_results_sup.index, pairs=PAIRS)
+print("\nIntervalos de confiança bootstrap (95%) calculados para médias e diferenças entre métodos.")
+
+# 5.2.3 Scale reliability per section and method (Cronbach's alpha, item-total, Spearman)
+df_alpha_prof, df_items_prof, df_corr_prof = section_reliability(df_professores, df_results_prof.index, SECTIONS_PROF)
+df_alpha_sup, df_items_sup, df_corr_sup = section_reliability(df_supervisores, df_results_sup.index, SECTIONS_SUP)
+print("\n--- Confiabilidade das Seções (Alfa de Cronbach) ---")
+for df_alpha in (df_alpha_prof, df_alpha_sup):
+    if not df_alpha.empty:
+        print(df_alpha.pivot(index='Secao', columns='Metodo', values='Alfa_Cronbach').to_string(float_format="%.3f"))
+
+# 5.2.4 Segment Cube - Likert sums/counts split by every profile column and pair of columns
+profile_cols_prof = [col for col in df_professores.columns if col.startswith('P1.')]
+profile_cols_sup = [col for col in df_supervisores.columns if col.startswith('S1.')]
+cube_prof = SegmentCube.build(df_professores, profile_cols_prof, likert_cols_prof)
+cube_sup = SegmentCube.build(df_supervisores, profile_cols_sup, likert_cols_sup)
+register_cube('professores', cube_prof)
+register_cube('supervisores', cube_sup)
+print(f"\nCubo de segmentos: {len(cube_prof.dimensions)} recortes (professores), {len(cube_sup.dimensions)} recortes (supervisores).")
+
+# 5.2.5 Results model - the consolidated report renders from these instead of re-reading the CSVs
+for group, data, means, tests, alpha, items in [
+        ('professores', df_professores, df_results_prof, df_tests_prof, df_alpha_prof, df_items_prof),
+        ('supervisores', df_supervisores, df_results_sup, df_tests_sup, df_alpha_sup, df_items_sup)]:
+    results = group_results(group)
+    results.set_data(data)
+    results.set_likert(means, tests)
+    results.set_reliability(alpha, items)
+
 
 # 5.3 Time Estimation Analysis (Frequencies) - Professors
 print("\n--- Análise Tempo Estimado por Aula (Professores) ---")
-if 'P2.6_Tempo_Aula_Manual' in df_professores.columns:
+if 'P2.6_Tempo_Aula_Manual' in freq_prof:
     print("\nMétodo Manual:")
-    print(df_professores['P2.6_Tempo_Aula_Manual'].value_counts(normalize=True).map("{:.1%}".format))
-if 'P2.7_Tempo_Aula_Planilha' in df_professores.columns:
+    print(freq_prof.get('P2.6_Tempo_Aula_Manual').proportions().map("{:.1%}".format))
+if 'P2.7_Tempo_Aula_Planilha' in freq_prof:
     print("\nMétodo Planilha:")
-    print(df_professores['P2.7_Tempo_Aula_Planilha'].value_counts(normalize=True).map("{:.1%}".format))
+    print(freq_prof.get('P2.7_Tempo_Aula_Planilha').proportions().map("{:.1%}".format))
 
 # (Repeat for Supervisors if needed - create S2.6, S2.7 mappings first)
 
@@ -323,8 +468,32 @@ print("\n--- Fim da Análise ---")
 # %store df_results_sup
 
 # Save to CSV if needed (useful for checking)
-df_professores.to_csv("output/professores_processado.csv", index=False)
-df_supervisores.to_csv("output/supervisores_processado.csv", index=False)
-df_results_prof.to_csv("output/medias_professores.csv")
-df_results_sup.to_csv("output/medias_supervisores.csv")
+write_reports(validator, "validacao_respostas", writer)
+writer.write_csv(df_professores, "output/professores_processado.csv", index=False)
+writer.write_csv(df_supervisores, "output/supervisores_processado.csv", index=False)
+writer.write_csv(df_results_prof, "output/medias_professores.csv")
+writer.write_csv(df_results_sup, "output/medias_supervisores.csv")
+if margins is not None:
+    writer.write_csv(df_results_prof_w, "output/medias_ponderadas_professores.csv")
+    writer.write_csv(df_results_sup_w, "output/medias_ponderadas_supervisores.csv")
+writer.write_csv(df_tests_prof, "output/testes_significancia_professores.csv")
+writer.write_csv(df_tests_sup, "output/testes_significancia_supervisores.csv")
+writer.write_csv(df_ci_prof, "output/ic_medias_professores.csv")
+writer.write_csv(df_ci_sup, "output/ic_medias_supervisores.csv")
+writer.write_csv(df_alpha_prof, "output/confiabilidade_professores.csv", index=False)
+writer.write_csv(df_alpha_sup, "output/confiabilidade_supervisores.csv", index=False)
+writer.write_csv(df_items_prof, "output/item_total_professores.csv", index=False)
+writer.write_csv(df_items_sup, "output/item_total_supervisores.csv", index=False)
+writer.write_csv(df_corr_prof, "output/correlacoes_professores.csv", index=False)
+writer.write_csv(df_corr_sup, "output/correlacoes_supervisores.csv", index=False)
+writer.write_csv(cube_prof.to_long(), "output/cubo_segmentos_professores.csv", index=False)
+writer.write_csv(cube_sup.to_long(), "output/cubo_segmentos_supervisores.csv", index=False)
+
+# Incremental state: totals of this full run, the starting point for the next `--incremental` export
+for group, data, likert_cols in [('professores', df_professores, likert_cols_prof),
+                                 ('supervisores', df_supervisores, likert_cols_sup)]:
+    save_totals(group, ingest_state.add_group(group, data, likert_cols))
+ingest_state.record(fingerprints)
+ingest_state.save()
+print(f"Estado incremental salvo com {len(ingest_state.rows)} linhas.")
 print("\nDados processados e médias salvos em arquivos CSV.")
\ No newline at end of file
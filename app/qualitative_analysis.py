@@ -1,18 +1,17 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import re
-from collections import Counter
 import os
-
-# --- Configurações Globais ---
-sns.set_theme(style="whitegrid")
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 11
-plt.rcParams['figure.autolayout'] = True
-plt.rcParams['savefig.dpi'] = 150
+from plot_config import carregar_plotagem
+from output_writer import writer
+from text_pipeline import stem, text_corpus
+from text_chunks import analyze_columns, merge_keywords
+from fuzzy import Canonicalizer
+from heavy_hitters import top_phrases
+from themes import corpus_themes
+from near_duplicates import collapsed_responses, find_near_duplicates
+from results import group_results
+from lexicon import CATEGORY_NAMES, NEGATIVE, NEUTRAL, POSITIVE, LexiconMatcher, classify
 
 # Criar diretório para salvar gráficos se não existir
 output_dir = "graficos_tcc"
@@ -20,6 +19,7 @@ os.makedirs(output_dir, exist_ok=True)
 
 # --- Carregar Dados Processados ---
 try:
+    writer.wait_for("./output/professores_processado.csv", "./output/supervisores_processado.csv")
     df_professores = pd.read_csv("./output/professores_processado.csv")
     df_supervisores = pd.read_csv("./output/supervisores_processado.csv")
     print("Dados processados carregados com sucesso.")
@@ -30,79 +30,99 @@ except Exception as e:
     print(f"Erro ao carregar arquivos CSV: {e}")
     exit()
 
+# --- Léxico de Sentimentos ---
+# Categorias de sentimento (léxico único, comparado por radical: uma forma por palavra basta;
+# expressões de várias palavras também valem)
+positive_words = ['bom', 'ótimo', 'excelente', 'fácil', 'prático', 'eficiente', 'organizado', 'rápido', 'simples', 'agilidade', 'alívio', 'esperança', 'possibilidades', 'revolucionário', 'objetividade', 'conforto', 'comodidade', 'segurança', 'muito bom', 'tempo livre', 'ganho de tempo']
+negative_words = ['difícil', 'complicado', 'cansativo', 'estressante', 'frustrante', 'trabalhoso', 'exaustivo', 'desgastante', 'retrocesso', 'obsolescência', 'ódio', 'insatisfação', 'incerteza', 'insegurança', 'dúvidas', 'cansaço', 'desânimo', 'improvável', 'perda de tempo', 'muito trabalho']
+neutral_words = ['normal', 'médio', 'neutro', 'indiferente', 'aceitável', 'regular', 'moderado']
+
+# Autômato do léxico, compilado uma vez (com janela de negação: "não é prático" conta como negativo)
+sentiment_lexicon = LexiconMatcher(positive_words, negative_words, neutral_words)
+
+# Palavras com pelo menos esta frequência, sem termo do léxico próximo, não são corrigidas e servem de grafia de referência
+MIN_CANONICAL_COUNT = 3
+
+def canonical_spellings(corpus, sentiment_cols):
+    """Corrige a grafia das palavras das respostas de sentimento ("prátco" -> "prático").
+
+    Retorna o radical de cada palavra do vocabulário já corrigida (por id) e
+    a tabela das correções feitas: Original, Canonica, Distancia, Ocorrencias.
+    """
+    vocabulary = corpus.vocabulary
+    token_stems = [vocabulary.stems[s] for s in vocabulary.stem_of]
+    columns = [corpus.get(col) for col in sentiment_cols if corpus.get(col) is not None]
+    ids = np.concatenate([tokens.ids for tokens in columns]) if columns else np.zeros(0, dtype=np.int64)
+    counts = np.bincount(ids, minlength=len(vocabulary))
+    
+    lexicon_terms = [w for w in positive_words + negative_words + neutral_words if ' ' not in w]
+    frequent = vocabulary.decode(np.flatnonzero(counts >= MIN_CANONICAL_COUNT))
+    canonicalizer = Canonicalizer(lexicon_terms, frequent)
+    
+    # Palavras que o léxico já reconhece pelo radical ficam como estão
+    lexicon_stems = {stem(w) for w in lexicon_terms}
+    corrections = []
+    for token_id in np.flatnonzero(counts):
+        word = vocabulary.tokens[token_id]
+        if token_stems[token_id] in lexicon_stems:
+            continue
+        term, distance = canonicalizer.canonical(word)
+        if distance > 0:
+            token_stems[token_id] = stem(term)
+            corrections.append({'Original': word, 'Canonica': term, 'Distancia': distance,
+                                'Ocorrencias': int(counts[token_id])})
+    corrections = pd.DataFrame(corrections, columns=['Original', 'Canonica', 'Distancia', 'Ocorrencias'])
+    return token_stems, corrections.sort_values('Ocorrencias', ascending=False, kind='stable')
+
 # --- Funções para Análise Qualitativa ---
-def clean_text(text):
-    """Limpa e normaliza texto para análise."""
-    if pd.isna(text) or text == '':
-        return ''
-    
-    # Converter para string e remover caracteres especiais
-    text = str(text).lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-def extract_keywords(text, min_length=3):
-    """Extrai palavras-chave de um texto."""
-    if not text:
-        return []
-    
-    # Palavras comuns em português para filtrar
-    stop_words = {
-        'que', 'para', 'com', 'uma', 'dos', 'das', 'pelo', 'pela', 'são', 'mais',
-        'muito', 'bem', 'também', 'sistema', 'planejamento', 'aula', 'aulas',
-        'professor', 'professores', 'escola', 'tempo', 'fácil', 'difícil',
-        'novo', 'antigo', 'método', 'métodos', 'uso', 'usar', 'usado'
-    }
-    
-    words = text.split()
-    keywords = [word for word in words if len(word) >= min_length and word not in stop_words]
-    return keywords
-
-def analyze_open_ended_responses(data, columns, title_prefix):
-    """Analisa respostas abertas e extrai temas principais."""
+def analyze_open_ended_responses(corpus, columns, title_prefix, results, keep=None):
+    """Analisa respostas abertas e extrai temas principais.
+
+    `results` traz as palavras-chave já contadas por coluna (`analyze_columns`);
+    com `keep`, respostas quase iguais na mesma pergunta contaram uma vez só.
+    Retorna a análise por coluna e a contagem de palavras-chave de todas as
+    colunas juntas.
+    """
     print(f"\n{'='*60}")
     print(f"ANÁLISE QUALITATIVA - {title_prefix}")
     print(f"{'='*60}")
     
-    all_keywords = []
     response_analysis = {}
     
     for col in columns:
-        if col in data.columns:
+        tokens = corpus.get(col)
+        if tokens is not None:
             print(f"\n{col}:")
-            responses = data[col].dropna().tolist()
-            valid_responses = [r for r in responses if str(r).strip() and str(r) != '']
+            valid_responses = tokens.texts
             
             if valid_responses:
-                print(f"  Total de respostas: {len(valid_responses)}")
-                
-                # Extrair palavras-chave de todas as respostas
-                col_keywords = []
-                for response in valid_responses:
-                    cleaned = clean_text(response)
-                    keywords = extract_keywords(cleaned)
-                    col_keywords.extend(keywords)
-                    all_keywords.extend(keywords)
+                # Com `keep`, o denominador é o das contagens: respostas quase duplicadas contam uma vez só
+                total = int(keep[col].sum()) if keep is not None else len(valid_responses)
+                print(f"  Total de respostas: {total}")
+                if keep is not None and not keep[col].all():
+                    print(f"  Quase duplicadas desconsideradas: {int((~keep[col]).sum())}")
                 
-                # Contar frequência das palavras-chave
-                keyword_counts = Counter(col_keywords)
+                # Contar frequência das palavras-chave (contagens parciais dos blocos já somadas)
+                keyword_counts = results[col].keywords.counter(corpus.vocabulary)
                 most_common = keyword_counts.most_common(10)
                 
                 print("  Palavras-chave mais frequentes:")
                 for word, count in most_common:
-                    percentage = (count / len(valid_responses)) * 100
+                    percentage = (count / total) * 100
                     print(f"    {word}: {count} ({percentage:.1f}%)")
                 
                 response_analysis[col] = {
-                    'total_responses': len(valid_responses),
+                    'total_responses': total,
                     'keywords': dict(most_common),
-                    'responses': valid_responses
+                    'responses': valid_responses,
+                    'tokens': tokens
                 }
             else:
                 print("  Nenhuma resposta válida encontrada.")
     
-    return response_analysis, all_keywords
+    # Índice palavra -> respostas, para localizar citações de cada tema
+    corpus.build_index()
+    return response_analysis, merge_keywords(corpus, results, columns)
 
 def create_keyword_visualization(keyword_counts, title, filename):
     """Cria visualização das palavras-chave mais frequentes."""
@@ -113,6 +133,7 @@ def create_keyword_visualization(keyword_counts, title, filename):
     # Pegar as 15 palavras mais frequentes
     top_keywords = dict(keyword_counts.most_common(15))
     
+    plt, _ = carregar_plotagem('qualitativo')
     plt.figure(figsize=(12, 8))
     words = list(top_keywords.keys())
     counts = list(top_keywords.values())
@@ -136,7 +157,7 @@ def create_keyword_visualization(keyword_counts, title, filename):
     
     # Salvar gráfico
     filepath = os.path.join(output_dir, filename)
-    plt.savefig(filepath, bbox_inches='tight')
+    writer.save_figure(plt.gcf(), filepath, bbox_inches='tight')
     print(f"Gráfico '{title}' salvo como {filepath}")
     plt.close()
 
@@ -158,37 +179,108 @@ def save_qualitative_summary(analysis, title, filename):
     if summary_data:
         df_summary = pd.DataFrame(summary_data)
         df_summary = df_summary.sort_values(['Pergunta', 'Frequencia'], ascending=[True, False])
-        df_summary.to_csv(f"output/{filename}", index=False)
+        writer.write_csv(df_summary, f"output/{filename}", index=False)
         print(f"Resumo qualitativo salvo em: output/{filename}")
         return df_summary
     else:
         print(f"Nenhum dado qualitativo encontrado para {title}")
         return None
 
-# --- Análise Qualitativa para Professores ---
+def save_phrase_summary(corpus, columns, title, filename):
+    """Expressões de 2 e 3 palavras mais frequentes por pergunta, com o erro máximo da contagem."""
+    df_phrases = top_phrases(corpus, columns)
+    if df_phrases.empty:
+        print(f"Nenhuma expressão frequente encontrada para {title}")
+        return None
+
+    print(f"\nExpressões mais frequentes - {title}:")
+    for question, part in df_phrases.groupby('Pergunta', sort=False):
+        print(f"  {question}:")
+        for _, row in part[part['Contagem_Min'] > 1].head(5).iterrows():
+            print(f"    {row['Expressao']}: {row['Contagem']} (erro máx. {row['Erro_Max']})")
+    writer.write_csv(df_phrases, f"output/{filename}", index=False)
+    print(f"Expressões frequentes salvas em: output/{filename}")
+    return df_phrases
+
+def save_theme_summary(corpus, columns, title, filename):
+    """Agrupa as respostas de cada pergunta em temas (TF-IDF + k-means) e salva em CSV."""
+    df_themes = corpus_themes(corpus, columns)
+    if df_themes.empty:
+        print(f"Nenhum tema encontrado para {title}")
+        return None
+
+    print(f"\nTemas por agrupamento - {title}:")
+    for question, part in df_themes.groupby('Pergunta', sort=False):
+        print(f"  {question}:")
+        for _, row in part.iterrows():
+            print(f"    Tema {row['Tema']} ({row['Respostas']} respostas, {row['Porcentagem']}%): {row['Termos']}")
+    writer.write_csv(df_themes, f"output/{filename}", index=False)
+    print(f"Temas salvos em: output/{filename}")
+    return df_themes
+
+# --- Tokenização e Quase Duplicatas ---
 prof_open_ended_cols = [col for col in df_professores.columns if col.startswith('P6.')]
-prof_analysis, prof_keywords = analyze_open_ended_responses(df_professores, prof_open_ended_cols, "PROFESSORES")
+# Tokenização única de todas as respostas abertas (reutilizada nas palavras-chave e nos sentimentos)
+prof_corpus = text_corpus('professores', df_professores, prof_open_ended_cols)
+corpora = {'professores': prof_corpus}
+if not df_supervisores.empty:
+    sup_open_ended_cols = [col for col in df_supervisores.columns if col.startswith('S7.')]
+    sup_corpus = text_corpus('supervisores', df_supervisores, sup_open_ended_cols)
+    corpora['supervisores'] = sup_corpus
+
+# Respostas copiadas ou quase iguais (entre perguntas e entre formulários), por MinHash + LSH
+df_duplicates = find_near_duplicates(corpora)
+writer.write_csv(df_duplicates.drop(columns='Resposta'), "output/respostas_quase_duplicadas.csv", index=False)
+print(f"Respostas quase duplicadas: {len(df_duplicates)} em {df_duplicates['Cluster'].nunique()} grupos "
+      f"(salvas em output/respostas_quase_duplicadas.csv)")
+
+# --- Palavras-chave e Sentimentos em Blocos ---
+# Cada bloco de respostas devolve contagens parciais (somadas na ordem dos blocos); com volume
+# suficiente, os blocos rodam num pool de processos
+sentiment_cols_prof = ['P6.3_Sentimento_Manual', 'P6.4_Sentimento_Planilha', 'P6.5_Sentimento_PlanningApp']
+prof_token_stems, df_corrections_prof = canonical_spellings(prof_corpus, sentiment_cols_prof)
+prof_keep = {col: collapsed_responses(df_duplicates, 'professores', col, len(tokens))
+             for col, tokens in prof_corpus.columns.items()}
+prof_results = analyze_columns(prof_corpus, prof_open_ended_cols, prof_keep, sentiment_lexicon,
+                               prof_token_stems, sentiment_cols_prof)
+
+# --- Análise Qualitativa para Professores ---
+prof_analysis, prof_keywords = analyze_open_ended_responses(prof_corpus, prof_open_ended_cols, "PROFESSORES",
+                                                            prof_results, prof_keep)
 
 # Visualização das palavras-chave dos professores
-if prof_keywords:
-    prof_keyword_counts = Counter(prof_keywords)
+if len(prof_keywords):
+    prof_keyword_counts = prof_keywords.counter(prof_corpus.vocabulary)
     create_keyword_visualization(prof_keyword_counts, "Professores: Análise de Respostas Abertas", "qualitative_prof_keywords.png")
 
 # Salvar resumo qualitativo dos professores
-save_qualitative_summary(prof_analysis, "Professores", "analise_qualitativa_professores.csv")
+prof_summary = save_qualitative_summary(prof_analysis, "Professores", "analise_qualitativa_professores.csv")
+save_phrase_summary(prof_corpus, prof_open_ended_cols, "Professores", "expressoes_professores.csv")
+prof_themes = save_theme_summary(prof_corpus, prof_open_ended_cols, "Professores", "temas_professores.csv")
+# Palavras-chave e temas em memória para o relatório consolidado
+group_results('professores').set_keywords(prof_summary)
+group_results('professores').set_themes(prof_themes)
 
 # --- Análise Qualitativa para Supervisores ---
 if not df_supervisores.empty:
-    sup_open_ended_cols = [col for col in df_supervisores.columns if col.startswith('S7.')]
-    sup_analysis, sup_keywords = analyze_open_ended_responses(df_supervisores, sup_open_ended_cols, "SUPERVISORES")
+    sup_keep = {col: collapsed_responses(df_duplicates, 'supervisores', col, len(tokens))
+                for col, tokens in sup_corpus.columns.items()}
+    sup_results = analyze_columns(sup_corpus, sup_open_ended_cols, sup_keep)
+    sup_analysis, sup_keywords = analyze_open_ended_responses(sup_corpus, sup_open_ended_cols, "SUPERVISORES",
+                                                              sup_results, sup_keep)
     
     # Visualização das palavras-chave dos supervisores
-    if sup_keywords:
-        sup_keyword_counts = Counter(sup_keywords)
+    if len(sup_keywords):
+        sup_keyword_counts = sup_keywords.counter(sup_corpus.vocabulary)
         create_keyword_visualization(sup_keyword_counts, "Supervisores: Análise de Respostas Abertas", "qualitative_sup_keywords.png")
     
     # Salvar resumo qualitativo dos supervisores
-    save_qualitative_summary(sup_analysis, "Supervisores", "analise_qualitativa_supervisores.csv")
+    sup_summary = save_qualitative_summary(sup_analysis, "Supervisores", "analise_qualitativa_supervisores.csv")
+    save_phrase_summary(sup_corpus, sup_open_ended_cols, "Supervisores", "expressoes_supervisores.csv")
+    sup_themes = save_theme_summary(sup_corpus, sup_open_ended_cols, "Supervisores", "temas_supervisores.csv")
+    # Palavras-chave e temas em memória para o relatório consolidado
+    group_results('supervisores').set_keywords(sup_summary)
+    group_results('supervisores').set_themes(sup_themes)
 else:
     print("\nAviso: Nenhum dado de supervisor encontrado para análise qualitativa.")
 
@@ -197,53 +289,57 @@ print(f"\n{'='*60}")
 print("ANÁLISE DE SENTIMENTOS POR MÉODO")
 print(f"{'='*60}")
 
-def analyze_sentiment_words(data, sentiment_cols, title):
-    """Analisa palavras de sentimento para diferentes métodos."""
+def analyze_sentiment_words(corpus, sentiment_cols, title, results, corrections=None):
+    """Analisa palavras de sentimento para diferentes métodos.
+
+    Os placares por resposta vêm de `results` (`analyze_columns`, com a
+    grafia já corrigida). Retorna as contagens e o sentimento de cada
+    resposta, por respondente.
+    """
     print(f"\n{title}:")
+    respondent_scores = []
+    if corrections is not None and not corrections.empty:
+        print(f"  Grafias corrigidas: {len(corrections)} palavras, {corrections['Ocorrencias'].sum()} ocorrências")
     
     for col in sentiment_cols:
-        if col in data.columns:
-            responses = data[col].dropna().tolist()
-            valid_responses = [r for r in responses if str(r).strip() and str(r) != '']
+        tokens = corpus.get(col)
+        if tokens is not None and len(tokens):
+            print(f"\n{col}:")
+            print(f"  Total de respostas: {len(tokens)}")
             
-            if valid_responses:
-                print(f"\n{col}:")
-                print(f"  Total de respostas: {len(valid_responses)}")
-                
-                # Categorizar sentimentos
-                positive_words = ['bom', 'ótimo', 'excelente', 'fácil', 'prático', 'eficiente', 'organizado', 'rápido', 'simples', 'agilidade', 'alívio', 'esperança', 'possibilidades', 'revolucionário', 'objetividade', 'conforto', 'eficiência', 'praticidade', 'comodidade', 'segurança']
-                negative_words = ['difícil', 'complicado', 'cansativo', 'estressante', 'frustrante', 'trabalhoso', 'exaustivo', 'desgastante', 'retrocesso', 'obsolescência', 'ódio', 'insatisfação', 'incerteza', 'insegurança', 'dúvidas', 'cansaço', 'desânimo', 'frustração', 'exaustão', 'improvável']
-                neutral_words = ['normal', 'médio', 'neutro', 'indiferente', 'aceitável', 'regular', 'moderado']
-                
-                positive_count = 0
-                negative_count = 0
-                neutral_count = 0
-                
-                for response in valid_responses:
-                    cleaned = clean_text(response)
-                    words = cleaned.split()
-                    
-                    pos_score = sum(1 for word in words if word in positive_words)
-                    neg_score = sum(1 for word in words if word in negative_words)
-                    neu_score = sum(1 for word in words if word in neutral_words)
-                    
-                    if pos_score > neg_score and pos_score > neu_score:
-                        positive_count += 1
-                    elif neg_score > pos_score and neg_score > neu_score:
-                        negative_count += 1
-                    else:
-                        neutral_count += 1
-                
-                total = positive_count + negative_count + neutral_count
-                if total > 0:
-                    print(f"  Sentimentos:")
-                    print(f"    Positivo: {positive_count} ({(positive_count/total)*100:.1f}%)")
-                    print(f"    Negativo: {negative_count} ({(negative_count/total)*100:.1f}%)")
-                    print(f"    Neutro: {neutral_count} ({(neutral_count/total)*100:.1f}%)")
-
-# Análise de sentimentos para professores
-sentiment_cols_prof = ['P6.3_Sentimento_Manual', 'P6.4_Sentimento_Planilha', 'P6.5_Sentimento_PlanningApp']
-analyze_sentiment_words(df_professores, sentiment_cols_prof, "Sentimentos dos Professores por Método")
+            scores = results[col].scores
+            sentiment = classify(scores)
+            positive_count = int((sentiment == POSITIVE).sum())
+            negative_count = int((sentiment == NEGATIVE).sum())
+            neutral_count = len(tokens) - positive_count - negative_count
+            
+            total = positive_count + negative_count + neutral_count
+            if total > 0:
+                print(f"  Sentimentos:")
+                print(f"    Positivo: {positive_count} ({(positive_count/total)*100:.1f}%)")
+                print(f"    Negativo: {negative_count} ({(negative_count/total)*100:.1f}%)")
+                print(f"    Neutro: {neutral_count} ({(neutral_count/total)*100:.1f}%)")
+            
+            respondent_scores.append(pd.DataFrame({
+                'Respondente': tokens.index,
+                'Pergunta': col,
+                'Positivo': scores[:, POSITIVE],
+                'Negativo': scores[:, NEGATIVE],
+                'Neutro': scores[:, NEUTRAL],
+                'Sentimento': np.array(CATEGORY_NAMES)[sentiment],
+            }))
+    
+    if not respondent_scores:
+        return None
+    return pd.concat(respondent_scores, ignore_index=True)
+
+# Análise de sentimentos para professores (placares calculados junto com as palavras-chave)
+df_sentiment_prof = analyze_sentiment_words(prof_corpus, sentiment_cols_prof, "Sentimentos dos Professores por Método",
+                                            prof_results, df_corrections_prof)
+writer.write_csv(df_corrections_prof, "output/correcoes_grafia_sentimentos.csv", index=False)
+if df_sentiment_prof is not None:
+    writer.write_csv(df_sentiment_prof, "output/sentimentos_respondentes_professores.csv", index=False)
+    print("Sentimentos por respondente salvos em: output/sentimentos_respondentes_professores.csv")
 
 print(f"\n{'='*60}")
 print("ANÁLISE QUALITATIVA CONCLUÍDA")
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""Serviço local de consultas (HTTP + JSON) sobre os agregados já carregados.
+
+Os resultados do `process.py` (modelo de resultados e cubo de segmentos) e
+as métricas dos logs (`planning_logs`, a mesma lógica do `process-logs.py`)
+são carregados uma única vez na subida e ficam em memória; cada consulta é
+uma leitura dessas estruturas, e as respostas já serializadas ficam num
+cache LRU, então perguntas repetidas do painel dos coordenadores não
+recalculam nada.
+
+Uso (na pasta app/, depois do pipeline):
+
+    python query_service.py [--porta 8050] [--recalcular]
+
+Consultas (GET, respostas em JSON):
+
+    /grupos
+    /media?grupo=professores&pergunta=P3.6                          (todos os respondentes)
+    /media?grupo=professores&pergunta=P3.6&P1.3_Conforto_Tec=Baixo   (um segmento; até 2 colunas de perfil)
+    /segmentos?grupo=professores&pergunta=P3.6&dimensao=P1.3_Conforto_Tec
+    /frequencias?grupo=professores&coluna=P1.3_Conforto_Tec
+    /tempo?funcao=Professor&percentis=25,50,75,90
+
+`pergunta` aceita o nome completo ou só o número (P3.6). Sem `output/`, o
+`process.py` roda uma vez antes de o serviço subir (ou sempre, com
+`--recalcular`).
+"""
+import argparse
+import json
+import os
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from aggregates import frequency_aggregates, json_number
+from planning_logs import planning_logs
+from results import load_results
+from segment_cube import METHODS, load_cube
+
+GROUPS = ['professores', 'supervisores']
+PROFILE_PREFIXES = ('P1.', 'S1.')
+CACHE_SIZE = 1024
+
+
+class QueryError(Exception):
+    """Consulta inválida; `status` é o código HTTP da resposta."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class QueryService:
+    """Consultas sobre os resultados em memória, com respostas memoizadas (LRU)."""
+
+    def __init__(self, results, cubes, logs=None, cache_size=CACHE_SIZE):
+        self.results = results
+        self.cubes = cubes
+        self.logs = logs
+        self.routes = {
+            '/grupos': self.groups,
+            '/media': self.mean,
+            '/segmentos': self.segments,
+            '/frequencias': self.frequencies,
+            '/tempo': self.planning_time,
+        }
+        self.answer = lru_cache(maxsize=cache_size)(self._answer)
+
+    @classmethod
+    def load(cls, output_dir='./output', logs_path='./input/logs.json', recompute=False):
+        """Carrega os agregados uma vez, rodando o `process.py` se ainda não houver saídas."""
+        if recompute or not os.path.exists(os.path.join(output_dir, 'professores_processado.csv')):
+            from pipeline import run_stage
+            run_stage('process.py')     # preenche o modelo de resultados e o cubo em memória
+        results = {group: load_results(group, output_dir) for group in GROUPS}
+        cubes = {}
+        for group in GROUPS:
+            try:
+                cubes[group] = load_cube(group, os.path.join(output_dir, f"cubo_segmentos_{group}.csv"))
+            except FileNotFoundError:
+                cubes[group] = None
+        try:
+            logs = planning_logs(logs_path)
+        except FileNotFoundError:
+            logs = None
+        return cls(results, cubes, logs)
+
+    def _answer(self, path, params):
+        """Resposta serializada de uma consulta; `params` é uma tupla ordenada de (chave, valor)."""
+        handler = self.routes.get(path)
+        if handler is None:
+            raise QueryError(f"Consulta desconhecida: {path}. Disponíveis: {', '.join(self.routes)}", 404)
+        return json.dumps(handler(dict(params)), ensure_ascii=False).encode('utf-8')
+
+    # --- Consultas ---
+
+    def _group(self, params):
+        group = params.get('grupo', 'professores')
+        if group not in self.results or self.results[group].n_respondents == 0:
+            raise QueryError(f"Grupo sem dados: {group}", 404)
+        return group, self.results[group]
+
+    def _question(self, results, name):
+        """Nome completo da pergunta Likert a partir do nome ou do número (ex.: 'P3.6')."""
+        if not name:
+            raise QueryError("Informe a pergunta (ex.: pergunta=P3.6)")
+        questions = list(results.likert or {})
+        if name in questions:
+            return name
+        matches = [q for q in questions if q.split('_', 1)[0] == name]
+        if len(matches) != 1:
+            raise QueryError(f"Pergunta não encontrada: {name}", 404)
+        return matches[0]
+
+    def groups(self, params):
+        return {group: {'n': results.n_respondents} for group, results in self.results.items()}
+
+    def mean(self, params):
+        """Média de uma pergunta por método, no grupo inteiro ou num segmento de perfil."""
+        group, results = self._group(params)
+        question = self._question(results, params.get('pergunta'))
+        segment = {key: value for key, value in params.items() if key.startswith(PROFILE_PREFIXES)}
+        if not segment:
+            item = results.likert[question]
+            answer = {'grupo': group, 'pergunta': question, 'n': results.n_respondents,
+                      'medias': {m: json_number(item.means.get(m)) for m in METHODS}}
+            if item.friedman is not None:
+                answer['friedman_p_holm'] = json_number(item.friedman[2], digits=None)
+            return answer
+        cube = self.cubes.get(group)
+        if cube is None:
+            raise QueryError("Cubo de segmentos não disponível", 404)
+        try:
+            n, means = cube.lookup(segment)
+        except KeyError as e:
+            raise QueryError(str(e.args[0]), 404)
+        row = means.loc[question] if means is not None and question in means.index else {}
+        return {'grupo': group, 'pergunta': question, 'segmento': segment, 'n': n,
+                'medias': {m: json_number(row.get(m)) if n else None for m in METHODS}}
+
+    def segments(self, params):
+        """Médias de uma pergunta por método em todos os segmentos de uma coluna de perfil."""
+        group, results = self._group(params)
+        question = self._question(results, params.get('pergunta'))
+        dimension = params.get('dimensao')
+        cube = self.cubes.get(group)
+        if cube is None:
+            raise QueryError("Cubo de segmentos não disponível", 404)
+        try:
+            breakdown = cube.breakdown(dimension, question)
+        except KeyError:
+            raise QueryError(f"Coluna de perfil não disponível: {dimension}", 404)
+        methods = [m for m in METHODS if m in breakdown.columns]
+        return {'grupo': group, 'pergunta': question, 'dimensao': dimension,
+                'segmentos': [{'segmento': str(segment), 'n': int(n),
+                               'medias': {m: json_number(v) for m, v in zip(methods, values)}}
+                              for segment, n, values in zip(breakdown.index, breakdown['N'],
+                                                            breakdown[methods].to_numpy(dtype=float))]}
+
+    def frequencies(self, params):
+        """Tabela de frequência de uma pergunta categórica."""
+        group, results = self._group(params)
+        column = params.get('coluna')
+        tables = frequency_aggregates(results.frequencies)
+        if column not in tables:
+            raise QueryError(f"Coluna categórica não encontrada: {column}", 404)
+        return {'grupo': group, 'coluna': column, **tables[column]}
+
+    def planning_time(self, params):
+        """Tempo registrado nos logs para uma função: média ponderada, percentis e faixas."""
+        if self.logs is None:
+            raise QueryError("Logs não disponíveis", 404)
+        role = params.get('funcao', 'Professor')
+        if role not in self.logs.roles:
+            raise QueryError(f"Função sem logs válidos: {role}. Disponíveis: {', '.join(self.logs.roles)}", 404)
+        try:
+            q = tuple(float(p) for p in params.get('percentis', '25,50,75,90').split(','))
+        except ValueError:
+            raise QueryError("percentis deve ser uma lista de números (ex.: 25,50,75)")
+        if any(not 0 <= p <= 100 for p in q):
+            raise QueryError("percentis devem estar entre 0 e 100")
+        bins = self.logs.bins(role)
+        return {'funcao': role, 'usuarios': len(self.logs.minutes(role)),
+                'media_ponderada_min': json_number(self.logs.weighted_mean(role)),
+                'percentis_min': {f"{p:g}": json_number(v) for p, v in self.logs.percentiles(role, q).items()},
+                'faixas': {category: int(n) for category, n in bins.items()}}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """GET /consulta?parametros -> JSON; erros também saem em JSON ({"erro": ...})."""
+
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = tuple(sorted((key, values[-1]) for key, values in parse_qs(url.query).items()))
+        try:
+            body, status = self.service.answer(url.path.rstrip('/') or '/grupos', params), 200
+        except QueryError as e:
+            body, status = json.dumps({'erro': str(e)}, ensure_ascii=False).encode('utf-8'), e.status
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(service, host='127.0.0.1', port=8050):
+    """Sobe o servidor HTTP (uma thread por conexão) até Ctrl+C."""
+    QueryHandler.service = service
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    print(f"Serviço de consultas em http://{host}:{port}/ (Ctrl+C para encerrar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serviço local de consultas sobre os agregados da pesquisa.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8050)
+    parser.add_argument('--recalcular', action='store_true', help="roda o process.py antes de subir")
+    args = parser.parse_args()
+    serve(QueryService.load(recompute=args.recalcular), args.host, args.porta)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Confiabilidade das seções Likert como escalas.
+
+Para cada seção (ex.: eficiência `P2.`) e cada método, as perguntas da seção
+são tratadas como itens de uma escala:
+
+- alfa de Cronbach da seção e alfa sem cada item;
+- correlação item-total corrigida (item contra a soma dos demais);
+- matriz de correlação de Spearman entre os itens.
+
+Tudo sai de dois produtos matriciais por seção e método: a covariância dos
+itens (alfa, alfa sem item e item-total) e a correlação dos postos (Spearman),
+com os postos calculados uma única vez por coluna. Respondentes com algum item
+em branco na seção são descartados (exclusão listwise), como é usual para o
+alfa. Itens de sentido negativo (ex.: "causa frustração") são invertidos
+(6 - nota) antes do cálculo. O scipy só é importado quando os postos são
+calculados.
+"""
+import numpy as np
+import pandas as pd
+
+from segment_cube import METHODS
+
+SECTIONS_PROF = {
+    'P2.': 'Eficiência e Carga de Trabalho',
+    'P3.': 'Usabilidade e Satisfação',
+    'P4.': 'Alinhamento Pedagógico e Colaboração',
+    'P5.': 'Bem-Estar e Impacto Profissional',
+}
+
+SECTIONS_SUP = {
+    'S2.': 'Gestão e Supervisão',
+    'S3.': 'Usabilidade e Satisfação',
+    'S4.': 'Gestão Administrativa',
+    'S5.': 'Visão Estratégica',
+    'S6.': 'Bem-Estar e Impacto Profissional',
+}
+
+# Itens formulados no sentido negativo da escala
+REVERSED_ITEMS = ('P5.2_Causa_Frustracao', 'S6.2_Causa_Frustracao')
+
+
+def section_items(questions, prefix):
+    """Perguntas (sem método) de uma seção, na ordem em que aparecem."""
+    return [q for q in questions if q.startswith(prefix)]
+
+
+def scale_statistics(values):
+    """Alfa, alfa sem item e correlação item-total de uma matriz respondentes x itens completa.
+
+    Retorna (alfa, alfa_sem_item, item_total); NaN quando não há respondentes
+    ou itens suficientes.
+    """
+    n, k = values.shape
+    if n < 2 or k < 2:
+        return np.nan, np.full(k, np.nan), np.full(k, np.nan)
+
+    centered = values - values.mean(axis=0)
+    cov = centered.T @ centered / (n - 1)
+    item_var = np.diag(cov)
+    total_var = cov.sum()
+    row_sums = cov.sum(axis=1)
+    # Variância da soma dos demais itens, para cada item retirado
+    rest_var = total_var - 2 * row_sums + item_var
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha = k / (k - 1) * (1 - item_var.sum() / total_var) if total_var > 0 else np.nan
+        if k > 2:
+            alpha_deleted = (k - 1) / (k - 2) * (1 - (item_var.sum() - item_var) / rest_var)
+        else:
+            alpha_deleted = np.full(k, np.nan)
+        item_total = (row_sums - item_var) / np.sqrt(item_var * rest_var)
+    return alpha, alpha_deleted, item_total
+
+
+def spearman_matrix(values):
+    """Correlação de Spearman entre as colunas: Pearson sobre os postos, num único produto."""
+    from scipy import stats
+    n, k = values.shape
+    if n < 2:
+        return np.full((k, k), np.nan)
+    ranks = stats.rankdata(values, axis=0)
+    centered = ranks - ranks.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = centered / np.sqrt((centered ** 2).sum(axis=0))
+        corr = scaled.T @ scaled
+    np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+    return corr
+
+
+def section_reliability(data, questions, sections, methods=METHODS):
+    """Calcula a confiabilidade de todas as seções e métodos.
+
+    Retorna três tabelas:
+    - resumo: Secao, Nome, Metodo, N, Itens, Alfa_Cronbach;
+    - itens: Secao, Metodo, Item, Correlacao_Item_Total, Alfa_Sem_Item;
+    - correlações (formato longo): Secao, Metodo, Item_1, Item_2, Spearman.
+    """
+    summary, items, correlations = [], [], []
+    for prefix, name in sections.items():
+        section = section_items(questions, prefix)
+        for method in methods:
+            present = [q for q in section if f'{q}_{method}' in data.columns]
+            if not present:
+                continue
+            values = data[[f'{q}_{method}' for q in present]].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            values = values[~np.isnan(values).any(axis=1)]
+            reversed_mask = np.isin(present, REVERSED_ITEMS)
+            values[:, reversed_mask] = 6 - values[:, reversed_mask]
+
+            alpha, alpha_deleted, item_total = scale_statistics(values)
+            summary.append({'Secao': prefix.rstrip('.'), 'Nome': name, 'Metodo': method,
+                            'N': values.shape[0], 'Itens': len(present), 'Alfa_Cronbach': alpha})
+            items.append(pd.DataFrame({
+                'Secao': prefix.rstrip('.'), 'Metodo': method, 'Item': present,
+                'Correlacao_Item_Total': item_total, 'Alfa_Sem_Item': alpha_deleted,
+            }))
+
+            corr = spearman_matrix(values)
+            first, second = np.meshgrid(np.arange(len(present)), np.arange(len(present)), indexing='ij')
+            correlations.append(pd.DataFrame({
+                'Secao': prefix.rstrip('.'), 'Metodo': method,
+                'Item_1': np.asarray(present)[first.ravel()],
+                'Item_2': np.asarray(present)[second.ravel()],
+                'Spearman': corr.ravel(),
+            }))
+
+    summary = pd.DataFrame(summary, columns=['Secao', 'Nome', 'Metodo', 'N', 'Itens', 'Alfa_Cronbach'])
+    items = pd.concat(items, ignore_index=True) if items else pd.DataFrame(
+        columns=['Secao', 'Metodo', 'Item', 'Correlacao_Item_Total', 'Alfa_Sem_Item'])
+    correlations = pd.concat(correlations, ignore_index=True) if correlations else pd.DataFrame(
+        columns=['Secao', 'Metodo', 'Item_1', 'Item_2', 'Spearman'])
+    return summary, items, correlations
+
+
+def correlation_matrix(correlations, section, method):
+    """Reconstrói a matriz item x item de uma seção e método a partir do formato longo."""
+    part = correlations[(correlations['Secao'] == section) & (correlations['Metodo'] == method)]
+    order = list(dict.fromkeys(part['Item_1']))
+    return part.pivot(index='Item_1', columns='Item_2', values='Spearman').reindex(index=order, columns=order)
+
+
+def interpret_alpha(alpha):
+    """Classificação usual do alfa de Cronbach."""
+    if alpha is None or pd.isna(alpha):
+        return 'n/d'
+    if alpha >= 0.9:
+        return 'excelente'
+    if alpha >= 0.8:
+        return 'boa'
+    if alpha >= 0.7:
+        return 'aceitável'
+    if alpha >= 0.6:
+        return 'questionável'
+    if alpha >= 0.5:
+        return 'pobre'
+    return 'inaceitável'
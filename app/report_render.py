@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""Relatório consolidado em Markdown, HTML e LaTeX a partir de modelos compilados.
+
+O relatório é montado em duas etapas. Primeiro os resultados agregados de
+cada grupo (`results.GroupResults`) viram um documento: uma lista de blocos
+(seção, subseção, parágrafo, tabela, citação) com os números já formatados.
+Depois cada formato percorre os blocos e escreve direto no arquivo, pelos
+modelos do formato.
+
+Os modelos de cada formato são compilados uma única vez por processo (campos
+conferidos, `str.format` e a tabela de escape prontos) e ficam guardados em
+`_compiled`. Gerar o mesmo relatório para várias escolas ou recortes só
+repete a montagem do documento e a escrita, nunca a análise.
+"""
+import csv
+import html
+import os
+from string import Formatter
+
+from output_writer import writer
+from segment_cube import METHODS
+from significance import format_p, significance_marker
+
+# Rótulos das perguntas de perfil, na ordem do relatório
+PROFILE_LABELS = {
+    'P1.1_Tempo_Servico': 'Tempo de Serviço',
+    'P1.2_Segmentos': 'Segmentos de Atuação',
+    'P1.3_Conforto_Tec': 'Conforto com Tecnologia',
+    'P1.4_Num_Turmas': 'Número de Turmas',
+    'P1.5_Num_Planos': 'Número de Planos/Cronogramas',
+    'P1.6_Outra_Escola_Metodo': 'Atuação em Outras Escolas',
+    'S1.1_Funcao_Gestora': 'Função Gestora',
+    'S1.2_Tempo_Gestao': 'Tempo de Gestão',
+    'S1.3_Outras_Plataformas': 'Outras Plataformas',
+}
+
+ESSENTIAL_COLUMNS = ['Categoria', 'Pergunta', 'Resposta', 'Contagem', 'Porcentagem', 'Total_Respondentes']
+
+# Modelos por formato. Campos: {title}, {subtitle}, {text}, {caption}, {cells},
+# {rule} (separador do Markdown) e {spec} (colunas do LaTeX).
+TEMPLATES = {
+    'md': {
+        'open': "# {title}\n\n{subtitle}\n",
+        'section': "\n## {text}\n",
+        'subsection': "\n### {text}\n",
+        'paragraph': "\n{text}\n",
+        'table_open': "\n**{caption}**\n\n",
+        'header': "| {cells} |\n|{rule}|\n",
+        'row': "| {cells} |\n",
+        'header_cell': "{text}",
+        'cell': "{text}",
+        'cell_separator': " | ",
+        'table_close': "",
+        'quote': "> {text}\n",
+        'close': "",
+    },
+    'html': {
+        'open': ('<!DOCTYPE html>\n<html lang="pt-BR">\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n'
+                 '<style>body{{font-family:sans-serif;max-width:60em;margin:auto}}'
+                 'table{{border-collapse:collapse;margin:.5em 0}}'
+                 'th,td{{border:1px solid #ccc;padding:.2em .6em}}td+td{{text-align:right}}'
+                 'blockquote{{color:#555;margin:.2em 2em}}</style>\n'
+                 '</head>\n<body>\n<h1>{title}</h1>\n<p>{subtitle}</p>\n'),
+        'section': "<h2>{text}</h2>\n",
+        'subsection': "<h3>{text}</h3>\n",
+        'paragraph': "<p>{text}</p>\n",
+        'table_open': "<table>\n<caption>{caption}</caption>\n",
+        'header': "<tr>{cells}</tr>\n",
+        'row': "<tr>{cells}</tr>\n",
+        'header_cell': "<th>{text}</th>",
+        'cell': "<td>{text}</td>",
+        'cell_separator': "",
+        'table_close': "</table>\n",
+        'quote': "<blockquote>{text}</blockquote>\n",
+        'close': "</body>\n</html>\n",
+    },
+    'tex': {
+        'open': ("\\documentclass{{article}}\n\\usepackage[utf8]{{inputenc}}\n\\usepackage[T1]{{fontenc}}\n"
+                 "\\usepackage[brazil]{{babel}}\n\\usepackage{{booktabs}}\n\\usepackage{{longtable}}\n\\usepackage{{caption}}\n"
+                 "\\title{{{title}}}\n\\date{{{subtitle}}}\n\\begin{{document}}\n\\maketitle\n"),
+        'section': "\n\\section*{{{text}}}\n",
+        'subsection': "\n\\subsection*{{{text}}}\n",
+        'paragraph': "\n{text}\n",
+        'table_open': "\n\\begin{{longtable}}{{{spec}}}\n\\caption*{{{caption}}}\\\\\n\\toprule\n",
+        'header': "{cells} \\\\\n\\midrule\n",
+        'row': "{cells} \\\\\n",
+        'header_cell': "\\textbf{{{text}}}",
+        'cell': "{text}",
+        'cell_separator': " & ",
+        'table_close': "\\bottomrule\n\\end{{longtable}}\n",
+        'quote': "\\begin{{quote}}\\itshape {text}\\end{{quote}}\n",
+        'close': "\n\\end{{document}}\n",
+    },
+}
+
+_LATEX_ESCAPES = str.maketrans({
+    '\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
+    '_': r'\_', '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}', '^': r'\textasciicircum{}',
+})
+_MARKDOWN_ESCAPES = str.maketrans({'|': r'\|', '*': r'\*', '_': r'\_', '\n': ' '})
+
+ESCAPES = {
+    'md': lambda text: text.translate(_MARKDOWN_ESCAPES),
+    'html': lambda text: html.escape(text, quote=False),
+    'tex': lambda text: text.translate(_LATEX_ESCAPES),
+}
+
+EXTENSIONS = {'.md': 'md', '.html': 'html', '.tex': 'tex'}
+
+
+class ReportDocument:
+    """Sequência de blocos do relatório, independente do formato de saída."""
+
+    def __init__(self, title, subtitle=''):
+        self.title = title
+        self.subtitle = subtitle
+        self.blocks = []
+
+    def section(self, text):
+        self.blocks.append(('section', text))
+
+    def subsection(self, text):
+        self.blocks.append(('subsection', text))
+
+    def paragraph(self, text):
+        self.blocks.append(('paragraph', text))
+
+    def table(self, caption, columns, rows):
+        """Tabela com cabeçalho `columns` e linhas de células já formatadas como texto."""
+        self.blocks.append(('table', caption, columns, rows))
+
+    def quote(self, text):
+        self.blocks.append(('quote', text))
+
+
+class CompiledFormat:
+    """Modelos de um formato com os campos conferidos e o escape do formato."""
+
+    def __init__(self, name):
+        templates = TEMPLATES[name]
+        self.name = name
+        self.escape = ESCAPES[name]
+        self.cell_separator = templates['cell_separator']
+        self.render = {}
+        for key, source in templates.items():
+            if key == 'cell_separator':
+                continue
+            fields = {field for _, field, _, _ in Formatter().parse(source) if field is not None}
+            unknown = fields - {'title', 'subtitle', 'text', 'caption', 'cells', 'rule', 'spec'}
+            if unknown:
+                raise ValueError(f"Modelo '{name}.{key}' com campos desconhecidos: {sorted(unknown)}")
+            self.render[key] = source.format
+
+    def cells(self, values, header=False):
+        cell = self.render['header_cell' if header else 'cell']
+        return self.cell_separator.join(cell(text=self.escape(value)) for value in values)
+
+    def write(self, document, stream):
+        """Escreve o documento bloco a bloco em `stream`."""
+        render, escape = self.render, self.escape
+        stream.write(render['open'](title=escape(document.title), subtitle=escape(document.subtitle)))
+        for block in document.blocks:
+            kind = block[0]
+            if kind == 'table':
+                _, caption, columns, rows = block
+                stream.write(render['table_open'](caption=escape(caption),
+                                                  spec='l' + 'r' * (len(columns) - 1)))
+                stream.write(render['header'](cells=self.cells(columns, header=True),
+                                              rule='|'.join(['---'] * len(columns))))
+                for row in rows:
+                    stream.write(render['row'](cells=self.cells(row)))
+                stream.write(render['table_close']())
+            else:
+                stream.write(render[kind](text=escape(block[1])))
+        stream.write(render['close']())
+
+
+# Formatos já compilados, compartilhados por todos os relatórios do processo
+_compiled = {}
+
+
+def compiled_format(name):
+    """Modelos compilados do formato ('md', 'html', 'tex'), compilando só na primeira vez."""
+    compiled = _compiled.get(name)
+    if compiled is None:
+        compiled = CompiledFormat(name)
+        _compiled[name] = compiled
+    return compiled
+
+
+def save_document(document, path):
+    """Grava o documento no formato indicado pela extensão de `path`."""
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1])
+    if fmt is None:
+        raise ValueError(f"Formato de relatório não suportado: {path}")
+    with writer.open_text(path) as stream:
+        compiled_format(fmt).write(document, stream)
+
+
+# --- Montagem do documento a partir dos resultados ---
+
+def _number(value, digits=2):
+    return f"{value:.{digits}f}"
+
+
+def add_profile(document, results, label, columns):
+    """Uma tabela de frequências por pergunta de perfil do grupo."""
+    document.subsection(f"{label} (N={results.n_respondents})")
+    for column in columns:
+        table = results.frequencies.get(column)
+        if table is None:
+            continue
+        rows = [(str(value), str(count), f"{table.percentages[value]}%") for value, count in table.counts.items()]
+        document.table(f"{PROFILE_LABELS.get(column, column)} (N={table.valid_n})",
+                       ['Resposta', 'Contagem', 'Porcentagem'], rows)
+
+
+def add_likert(document, results, label):
+    """Médias por método com o teste de Friedman e, em outra tabela, os pares de Wilcoxon."""
+    if not results.likert:
+        return
+    document.subsection(f"Médias de Concordância - {label}")
+    document.paragraph("Escala de 1 (Discordo Totalmente) a 5 (Concordo Totalmente); p-valores corrigidos por Holm.")
+    means, pairs = [], []
+    for question, item in results.likert.items():
+        row = [question] + [_number(item.means[m]) if m in item.means else '-' for m in METHODS]
+        if item.friedman is not None:
+            n, chi2, p_holm, kendall_w = item.friedman
+            row += [_number(chi2), f"{format_p(p_holm)} {significance_marker(p_holm)}".strip(), _number(kendall_w), str(n)]
+            for a, b, z, p_pair, r in item.pairs:
+                pairs.append((question, f"{a} vs {b}", _number(z),
+                              f"{format_p(p_pair)} {significance_marker(p_pair)}".strip(), _number(r)))
+        else:
+            row += ['-'] * 4
+        means.append(row)
+    document.table(f"Médias e teste de Friedman - {label}",
+                   ['Pergunta'] + METHODS + ['Qui2(2)', 'p (Holm)', 'W de Kendall', 'N'], means)
+    if pairs:
+        document.table(f"Comparações pareadas (Wilcoxon) - {label}",
+                       ['Pergunta', 'Métodos', 'Z', 'p (Holm)', 'r'], pairs)
+
+
+def add_qualitative(document, results, label, index=None, top=5):
+    """Palavras-chave mais frequentes por pergunta aberta, com citações quando há índice."""
+    document.subsection(f"Análise Qualitativa - {label}")
+    if not results.keywords:
+        document.paragraph("Nenhum dado qualitativo disponível.")
+        return
+    for question, items in results.keywords.items():
+        items = items[:top]
+        document.table(question, ['Palavra-chave', 'Menções', 'Porcentagem'],
+                       [(item.keyword, str(item.frequency), f"{item.percentage}%") for item in items])
+        if index is not None:
+            for item in items:
+                for quote in index.quotes(item.keyword, question=question):
+                    document.quote(f"{item.keyword}: \u201c{quote}\u201d")
+
+
+def build_document(groups, title, subtitle=''):
+    """Documento com perfil, médias Likert e síntese qualitativa dos grupos.
+
+    `groups` é uma lista de (rótulo, GroupResults, colunas de perfil, índice
+    invertido das respostas abertas ou None); grupos sem respondentes ficam
+    de fora.
+    """
+    groups = [group for group in groups if group[1].n_respondents > 0]
+    document = ReportDocument(title, subtitle)
+    document.section("Seção 4.1 - Perfil dos Participantes")
+    for label, results, columns, _ in groups:
+        add_profile(document, results, label, columns)
+    document.section("Seções 4.2 a 4.5 - Análise Comparativa")
+    for label, results, _, _ in groups:
+        add_likert(document, results, label)
+    document.section("Seção 4.6 - Síntese Qualitativa")
+    for label, results, _, index in groups:
+        add_qualitative(document, results, label, index)
+    return document
+
+
+def essential_rows(groups):
+    """Linhas de `dados_essenciais_tcc.csv`: frequências de perfil de cada grupo, em formato longo."""
+    for label, results, columns, _ in groups:
+        if results.n_respondents == 0:
+            continue
+        for column in columns:
+            table = results.frequencies.get(column)
+            if table is None:
+                continue
+            for value, count in table.counts.items():
+                yield (label, column, value, count, float(table.percentages[value]), table.valid_n)
+
+
+def save_essential_data(groups, path):
+    """Grava as linhas essenciais em CSV, uma a uma; retorna o número de linhas (nada é gravado sem linhas)."""
+    rows = essential_rows(groups)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    count = 1
+    with writer.open_text(path) as stream:
+        out = csv.writer(stream, lineterminator='\n')
+        out.writerow(ESSENTIAL_COLUMNS)
+        out.writerow(first)
+        for row in rows:
+            out.writerow(row)
+            count += 1
+    return count
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""Armazenamento opcional das respostas e das métricas dos logs num banco SQLite.
+
+As respostas processadas ficam em formato longo (grupo, respondente,
+pergunta, método, valor para as perguntas Likert; grupo, respondente,
+pergunta, resposta para as categóricas) e as métricas dos logs, uma linha
+por usuário. A gravação é um upsert pela chave de cada linha: reenviar o
+mesmo export só toca nas linhas que mudaram, e os respondentes do grupo que
+saíram do export são apagados na mesma transação.
+
+As tabelas `agregados_likert` (soma e contagem por grupo, pergunta e
+método) e `agregados_categoricos` (contagem por resposta) funcionam como
+visões materializadas: gatilhos de INSERT, UPDATE e DELETE as mantêm em dia
+a cada linha alterada, então as visões `medias` e `frequencias` (as mesmas
+tabelas do `process.py` e do `percentages.py`) custam só o tamanho do
+resultado, sem reagrupar as respostas.
+
+Só a biblioteca padrão (`sqlite3`) é usada; o banco é gravado apenas quando
+o `store_responses.py` é executado.
+"""
+import sqlite3
+from collections import Counter
+
+import pandas as pd
+
+from frequencies import categorical_columns
+from segment_cube import METHODS, split_method
+
+DEFAULT_PATH = './output/respostas.sqlite'
+
+# Coluna do export do Google Forms usada para identificar o respondente
+RESPONDENT_COLUMN = 'Carimbo de data/hora'
+
+# Campo de `owner` (no `logs.json`) que identifica o usuário nas métricas dos logs
+USER_KEY = 'id'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS respostas_likert (
+    grupo       TEXT NOT NULL,
+    respondente TEXT NOT NULL,
+    pergunta    TEXT NOT NULL,
+    metodo      TEXT NOT NULL,
+    valor       REAL,
+    PRIMARY KEY (grupo, respondente, pergunta, metodo)
+);
+CREATE INDEX IF NOT EXISTS idx_likert_pergunta ON respostas_likert (pergunta);
+CREATE INDEX IF NOT EXISTS idx_likert_metodo ON respostas_likert (metodo);
+
+CREATE TABLE IF NOT EXISTS respostas_categoricas (
+    grupo       TEXT NOT NULL,
+    respondente TEXT NOT NULL,
+    pergunta    TEXT NOT NULL,
+    resposta    TEXT,
+    PRIMARY KEY (grupo, respondente, pergunta)
+);
+CREATE INDEX IF NOT EXISTS idx_categoricas_pergunta ON respostas_categoricas (pergunta);
+
+CREATE TABLE IF NOT EXISTS metricas_logs (
+    usuario       TEXT PRIMARY KEY,
+    funcao        TEXT,
+    planejamentos INTEGER,
+    segundos      REAL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_funcao ON metricas_logs (funcao);
+
+-- Agregados mantidos pelos gatilhos abaixo (somas e contagens são aditivas)
+CREATE TABLE IF NOT EXISTS agregados_likert (
+    grupo    TEXT NOT NULL,
+    pergunta TEXT NOT NULL,
+    metodo   TEXT NOT NULL,
+    soma     REAL NOT NULL DEFAULT 0,
+    contagem INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (grupo, pergunta, metodo)
+);
+
+CREATE TABLE IF NOT EXISTS agregados_categoricos (
+    grupo    TEXT NOT NULL,
+    pergunta TEXT NOT NULL,
+    resposta TEXT NOT NULL,
+    contagem INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (grupo, pergunta, resposta)
+);
+
+CREATE TRIGGER IF NOT EXISTS likert_insere AFTER INSERT ON respostas_likert
+WHEN NEW.valor IS NOT NULL BEGIN
+    INSERT INTO agregados_likert (grupo, pergunta, metodo)
+    SELECT NEW.grupo, NEW.pergunta, NEW.metodo WHERE NOT EXISTS (
+        SELECT 1 FROM agregados_likert WHERE grupo = NEW.grupo AND pergunta = NEW.pergunta AND metodo = NEW.metodo);
+    UPDATE agregados_likert SET soma = soma + NEW.valor, contagem = contagem + 1
+    WHERE grupo = NEW.grupo AND pergunta = NEW.pergunta AND metodo = NEW.metodo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS likert_remove AFTER DELETE ON respostas_likert
+WHEN OLD.valor IS NOT NULL BEGIN
+    UPDATE agregados_likert SET soma = soma - OLD.valor, contagem = contagem - 1
+    WHERE grupo = OLD.grupo AND pergunta = OLD.pergunta AND metodo = OLD.metodo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS likert_altera AFTER UPDATE OF valor ON respostas_likert BEGIN
+    INSERT INTO agregados_likert (grupo, pergunta, metodo)
+    SELECT NEW.grupo, NEW.pergunta, NEW.metodo WHERE NOT EXISTS (
+        SELECT 1 FROM agregados_likert WHERE grupo = NEW.grupo AND pergunta = NEW.pergunta AND metodo = NEW.metodo);
+    UPDATE agregados_likert
+    SET soma = soma - COALESCE(OLD.valor, 0) + COALESCE(NEW.valor, 0),
+        contagem = contagem - (OLD.valor IS NOT NULL) + (NEW.valor IS NOT NULL)
+    WHERE grupo = NEW.grupo AND pergunta = NEW.pergunta AND metodo = NEW.metodo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS categoricas_insere AFTER INSERT ON respostas_categoricas
+WHEN NEW.resposta IS NOT NULL BEGIN
+    INSERT INTO agregados_categoricos (grupo, pergunta, resposta)
+    SELECT NEW.grupo, NEW.pergunta, NEW.resposta WHERE NOT EXISTS (
+        SELECT 1 FROM agregados_categoricos WHERE grupo = NEW.grupo AND pergunta = NEW.pergunta AND resposta = NEW.resposta);
+    UPDATE agregados_categoricos SET contagem = contagem + 1
+    WHERE grupo = NEW.grupo AND pergunta = NEW.pergunta AND resposta = NEW.resposta;
+END;
+
+CREATE TRIGGER IF NOT EXISTS categoricas_remove AFTER DELETE ON respostas_categoricas
+WHEN OLD.resposta IS NOT NULL BEGIN
+    UPDATE agregados_categoricos SET contagem = contagem - 1
+    WHERE grupo = OLD.grupo AND pergunta = OLD.pergunta AND resposta = OLD.resposta;
+END;
+
+CREATE TRIGGER IF NOT EXISTS categoricas_altera AFTER UPDATE OF resposta ON respostas_categoricas BEGIN
+    UPDATE agregados_categoricos SET contagem = contagem - 1
+    WHERE OLD.resposta IS NOT NULL
+      AND grupo = OLD.grupo AND pergunta = OLD.pergunta AND resposta = OLD.resposta;
+    INSERT INTO agregados_categoricos (grupo, pergunta, resposta)
+    SELECT NEW.grupo, NEW.pergunta, NEW.resposta WHERE NEW.resposta IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM agregados_categoricos WHERE grupo = NEW.grupo AND pergunta = NEW.pergunta AND resposta = NEW.resposta);
+    UPDATE agregados_categoricos SET contagem = contagem + 1
+    WHERE NEW.resposta IS NOT NULL
+      AND grupo = NEW.grupo AND pergunta = NEW.pergunta AND resposta = NEW.resposta;
+END;
+
+CREATE VIEW IF NOT EXISTS medias AS
+SELECT grupo, pergunta, metodo, soma / contagem AS media, contagem AS n
+FROM agregados_likert WHERE contagem > 0;
+
+CREATE VIEW IF NOT EXISTS frequencias AS
+SELECT grupo, pergunta, resposta, contagem, rowid AS ordem,
+       ROUND(100.0 * contagem / SUM(contagem) OVER (PARTITION BY grupo, pergunta), 1) AS porcentagem
+FROM agregados_categoricos WHERE contagem > 0;
+"""
+
+# Só regrava (e só aciona os gatilhos) quando o valor mudou
+_UPSERT_LIKERT = """
+INSERT INTO respostas_likert (grupo, respondente, pergunta, metodo, valor) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (grupo, respondente, pergunta, metodo) DO UPDATE SET valor = excluded.valor
+WHERE valor IS NOT excluded.valor
+"""
+
+_UPSERT_CATEGORICAL = """
+INSERT INTO respostas_categoricas (grupo, respondente, pergunta, resposta) VALUES (?, ?, ?, ?)
+ON CONFLICT (grupo, respondente, pergunta) DO UPDATE SET resposta = excluded.resposta
+WHERE resposta IS NOT excluded.resposta
+"""
+
+# Chaves (respondentes ou usuários) do export sendo gravado (tabela temporária, da conexão)
+_EXPORT_KEYS = """
+CREATE TEMP TABLE IF NOT EXISTS chaves_export (chave TEXT PRIMARY KEY)
+"""
+
+# Apaga (e desconta dos agregados, pelos gatilhos) os respondentes do grupo que não estão no export
+_DELETE_MISSING = """
+DELETE FROM {table} WHERE grupo = ?
+AND respondente NOT IN (SELECT chave FROM temp.chaves_export)
+"""
+
+_DELETE_MISSING_USERS = """
+DELETE FROM metricas_logs WHERE usuario NOT IN (SELECT chave FROM temp.chaves_export)
+"""
+
+_UPSERT_LOGS = """
+INSERT INTO metricas_logs (usuario, funcao, planejamentos, segundos) VALUES (?, ?, ?, ?)
+ON CONFLICT (usuario) DO UPDATE
+SET funcao = excluded.funcao, planejamentos = excluded.planejamentos, segundos = excluded.segundos
+"""
+
+
+def respondent_ids(data):
+    """Identificador de cada linha: o carimbo de data/hora, numerado quando repetido."""
+    if RESPONDENT_COLUMN in data.columns:
+        stamps = data[RESPONDENT_COLUMN].astype(str)
+    else:
+        stamps = pd.Series([str(i) for i in data.index], index=data.index)
+    repeat = stamps.groupby(stamps).cumcount()
+    return stamps.where(repeat == 0, stamps + '#' + (repeat + 1).astype(str)).tolist()
+
+
+def _sql_value(value):
+    """Valor aceito pelo sqlite3: NaN vira NULL e números NumPy viram nativos."""
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+class ResponseStore:
+    """Banco SQLite com as respostas em formato longo, as métricas dos logs e os agregados."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(_EXPORT_KEYS)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert_responses(self, group, data, likert_columns, categorical=None):
+        """Grava as respostas do grupo; devolve quantas linhas do banco foram inseridas, alteradas ou apagadas.
+
+        `data` é o export completo do grupo: respondentes gravados antes que
+        não estão mais nele são apagados.
+        """
+        if categorical is None:
+            categorical = categorical_columns(data)
+        likert_columns = [col for col in likert_columns if col in data.columns]
+        categorical = [col for col in categorical if col in data.columns]
+        respondents = respondent_ids(data)
+        likert_rows = []
+        for column in likert_columns:
+            question, method = split_method(column)
+            likert_rows.extend((group, r, question, method, _sql_value(v))
+                               for r, v in zip(respondents, data[column]))
+        categorical_rows = []
+        for column in categorical:
+            categorical_rows.extend((group, r, column, None if pd.isna(v) else str(v))
+                                    for r, v in zip(respondents, data[column]))
+        with self.connection:
+            self._set_export_keys(respondents)
+            changed = 0
+            for table in ('respostas_likert', 'respostas_categoricas'):
+                changed += self.connection.execute(_DELETE_MISSING.format(table=table), (group,)).rowcount
+            changed += self.connection.executemany(_UPSERT_LIKERT, likert_rows).rowcount
+            changed += self.connection.executemany(_UPSERT_CATEGORICAL, categorical_rows).rowcount
+        return changed
+
+    def _set_export_keys(self, keys):
+        """Troca o conteúdo de `temp.chaves_export` (dentro da transação em curso)."""
+        self.connection.execute("DELETE FROM temp.chaves_export")
+        self.connection.executemany("INSERT OR IGNORE INTO temp.chaves_export VALUES (?)", [(k,) for k in keys])
+
+    def upsert_user_metrics(self, user_metrics, key=USER_KEY):
+        """Grava as métricas por usuário do `logs.json`; devolve quantos usuários foram gravados.
+
+        Cada usuário é identificado pelo campo `key` de `owner`; um usuário sem
+        ele, ou duas entradas com o mesmo valor, levantam ValueError. Usuários
+        gravados antes que não estão mais nos logs são apagados.
+        """
+        owners = [u.get('owner', {}) for u in user_metrics]
+        missing = sum(owner.get(key) is None for owner in owners)
+        if missing:
+            fields = sorted({field for owner in owners for field in owner})
+            raise ValueError(f"{missing} de {len(owners)} usuários dos logs sem owner.{key}; "
+                             f"informe o campo identificador com --chave-usuario (campos encontrados: {', '.join(fields)})")
+        users = [str(owner[key]) for owner in owners]
+        repeated = sorted(user for user, n in Counter(users).items() if n > 1)
+        if repeated:
+            raise ValueError(f"owner.{key} repetido nos logs: {', '.join(repeated[:5])}")
+        rows = [(user, owner.get('predominantly_role'), u.get('planning_count'), u.get('average_seconds'))
+                for user, owner, u in zip(users, owners, user_metrics)]
+        with self.connection:
+            self._set_export_keys(users)
+            self.connection.execute(_DELETE_MISSING_USERS)
+            self.connection.executemany(_UPSERT_LOGS, rows)
+        return len(rows)
+
+    def means(self, group):
+        """Médias (pergunta x método), no formato de `medias_<grupo>.csv`."""
+        long = pd.read_sql_query("SELECT pergunta, metodo, media FROM medias WHERE grupo = ?",
+                                 self.connection, params=(group,))
+        table = long.pivot(index='pergunta', columns='metodo', values='media')
+        table = table.reindex(columns=[m for m in METHODS if m in table.columns])
+        table.index.name = None
+        table.columns.name = None
+        return table
+
+    def frequencies(self, group, question):
+        """Contagens e porcentagens de uma pergunta categórica, da mais para a menos frequente.
+
+        Empates ficam na ordem em que a resposta apareceu, como nas tabelas do `frequencies.py`.
+        """
+        return pd.read_sql_query(
+            "SELECT resposta, contagem, porcentagem FROM frequencias WHERE grupo = ? AND pergunta = ? "
+            "ORDER BY contagem DESC, ordem", self.connection, params=(group, question)).set_index('resposta')
+
+    def role_minutes(self, role):
+        """Tempo registrado (minutos) e planejamentos dos usuários válidos da função."""
+        return pd.read_sql_query(
+            "SELECT usuario, segundos / 60.0 AS minutos, planejamentos FROM metricas_logs "
+            "WHERE funcao = ? AND planejamentos > 0 AND segundos > 0", self.connection,
+            params=(role,)).set_index('usuario')
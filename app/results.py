@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Modelo em memória dos resultados de cada grupo, preenchido pelas etapas.
+
+O `process.py` registra os dados processados, as médias Likert, os testes de
+significância e a confiabilidade das seções; o `qualitative_analysis.py`
+registra as palavras-chave e os temas das respostas abertas. O relatório
+consolidado lê tudo daqui, já agrupado por pergunta (e por seção e método),
+então montar o texto custa só o tamanho da saída: nada de máscaras por
+pergunta, `iterrows` ou releitura de CSVs.
+
+Quando o relatório roda sozinho, `load_results` preenche as partes que
+nenhuma etapa registrou a partir dos CSVs salvos em `output/`.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from frequencies import frequency_tables
+from output_writer import writer
+from segment_cube import METHODS
+from significance import PAIRS
+
+
+def _value(value):
+    """Valor escalar ou None no lugar de NaN."""
+    return None if pd.isna(value) else value
+
+
+class LikertQuestion:
+    """Médias de uma pergunta Likert por método, com os testes pareados quando disponíveis."""
+
+    __slots__ = ('question', 'means', 'friedman', 'pairs')
+
+    def __init__(self, question, means, friedman=None, pairs=()):
+        self.question = question
+        self.means = means          # {método: média}, só os métodos com média
+        self.friedman = friedman    # (N, Qui2, p Holm, W de Kendall) ou None
+        self.pairs = list(pairs)    # [(método a, método b, Z, p Holm, r)]
+
+
+class SectionReliability:
+    """Alfa de Cronbach de uma seção por método, com as correlações item-total."""
+
+    __slots__ = ('section', 'name', 'n_items', 'methods')
+
+    def __init__(self, section, name, n_items):
+        self.section = section
+        self.name = name
+        self.n_items = n_items
+        self.methods = []           # [(método, alfa, N, [(item, correlação item-total)])]
+
+
+class Keyword:
+    """Palavra-chave de uma pergunta aberta."""
+
+    __slots__ = ('keyword', 'frequency', 'percentage')
+
+    def __init__(self, keyword, frequency, percentage):
+        self.keyword = keyword
+        self.frequency = frequency
+        self.percentage = percentage
+
+
+class Theme:
+    """Tema de uma pergunta aberta (agrupamento TF-IDF + k-means)."""
+
+    __slots__ = ('number', 'responses', 'percentage', 'terms', 'examples')
+
+    def __init__(self, number, responses, percentage, terms, examples):
+        self.number = number
+        self.responses = responses
+        self.percentage = percentage
+        self.terms = terms
+        self.examples = examples    # lista de citações
+
+
+class GroupResults:
+    """Resultados de um grupo de respondentes ('professores', 'supervisores').
+
+    Cada parte (`data`, `likert`, `reliability`, `keywords`, `themes`) fica
+    None enquanto não estiver disponível; `filled` guarda as partes que
+    alguma etapa já registrou, mesmo vazias.
+    """
+
+    def __init__(self, group):
+        self.group = group
+        self.data = None
+        self.frequencies = None
+        self.likert = None          # {pergunta: LikertQuestion}, na ordem das médias
+        self.reliability = None     # [SectionReliability], na ordem das seções
+        self.keywords = None        # {pergunta: [Keyword]}, em ordem decrescente de frequência
+        self.themes = None          # {pergunta: [Theme]}, na ordem dos temas
+        self.filled = set()
+
+    @property
+    def n_respondents(self):
+        return 0 if self.data is None else len(self.data)
+
+    def set_data(self, data):
+        """Dados processados do grupo e as tabelas de frequência (memoizadas por grupo)."""
+        self.data = data
+        self.frequencies = frequency_tables(self.group, data)
+        self.filled.add('data')
+
+    def set_likert(self, means, tests=None):
+        """Médias (pergunta x método) e, opcionalmente, a tabela de testes por pergunta."""
+        methods = [m for m in METHODS if m in means.columns]
+        test_rows = {} if tests is None else tests.to_dict('index')
+        likert = {}
+        for question, row in zip(means.index, means[methods].to_numpy(dtype=float)):
+            item = LikertQuestion(question, {m: v for m, v in zip(methods, row) if not np.isnan(v)})
+            tested = test_rows.get(question)
+            if tested is not None and not pd.isna(tested['Friedman_Qui2']):
+                item.friedman = (int(tested['Friedman_N']), tested['Friedman_Qui2'],
+                                 tested['Friedman_p_Holm'], tested['Kendall_W'])
+                item.pairs = [(a, b, tested[f'{a}_vs_{b}_Z'], tested[f'{a}_vs_{b}_p_Holm'], tested[f'{a}_vs_{b}_r'])
+                              for a, b in PAIRS if not pd.isna(tested[f'{a}_vs_{b}_Z'])]
+            likert[question] = item
+        self.likert = likert
+        self.filled.add('likert')
+
+    def set_reliability(self, alpha, items=None):
+        """Resumo do alfa por seção e método e, opcionalmente, as correlações item-total."""
+        if alpha is None or alpha.empty:
+            self.reliability = None
+            self.filled.add('reliability')
+            return
+        item_totals = {}
+        if items is not None:
+            for (section, method), part in items.groupby(['Secao', 'Metodo'], sort=False):
+                item_totals[(section, method)] = list(zip(part['Item'], part['Correlacao_Item_Total']))
+        sections = {}
+        for section, name, n_items, method, value, n in zip(alpha['Secao'], alpha['Nome'], alpha['Itens'],
+                                                             alpha['Metodo'], alpha['Alfa_Cronbach'], alpha['N']):
+            if section not in sections:
+                sections[section] = SectionReliability(section, name, int(n_items))
+            sections[section].methods.append((method, _value(value), int(n), item_totals.get((section, method), [])))
+        self.reliability = list(sections.values())
+        self.filled.add('reliability')
+
+    def set_keywords(self, summary):
+        """Palavras-chave por pergunta a partir do resumo qualitativo (Pergunta, Palavra_Chave, ...)."""
+        if summary is None or summary.empty:
+            self.keywords = None
+        else:
+            keywords = {question: [] for question in summary['Pergunta'].unique()}
+            ordered = summary.sort_values('Frequencia', ascending=False, kind='stable')
+            for question, keyword, frequency, percentage in zip(ordered['Pergunta'], ordered['Palavra_Chave'],
+                                                                ordered['Frequencia'], ordered['Porcentagem']):
+                keywords[question].append(Keyword(keyword, frequency, percentage))
+            self.keywords = keywords
+        self.filled.add('keywords')
+
+    def set_themes(self, themes):
+        """Temas por pergunta a partir da tabela de `corpus_themes`."""
+        if themes is None or themes.empty:
+            self.themes = None
+        else:
+            grouped = {}
+            for question, number, responses, percentage, terms, examples in zip(
+                    themes['Pergunta'], themes['Tema'], themes['Respostas'], themes['Porcentagem'],
+                    themes['Termos'], themes['Exemplos']):
+                examples = examples.split(' | ') if isinstance(examples, str) and examples else []
+                grouped.setdefault(question, []).append(Theme(number, responses, percentage, terms, examples))
+            self.themes = grouped
+        self.filled.add('themes')
+
+
+# Resultados por grupo, compartilhados entre as etapas do mesmo processo
+_cache = {}
+
+
+def group_results(group):
+    """Resultados do grupo, criados vazios na primeira chamada."""
+    results = _cache.get(group)
+    if results is None:
+        results = GroupResults(group)
+        _cache[group] = results
+    return results
+
+
+def _read_csv(path, **kwargs):
+    """Lê um CSV de `output/` depois das gravações pendentes; None se ele não existir."""
+    writer.wait_for(path)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, **kwargs)
+
+
+def load_results(group, output_dir="./output"):
+    """Resultados do grupo, completando pelos CSVs as partes que nenhuma etapa registrou.
+
+    Sem os dados processados do grupo, levanta FileNotFoundError.
+    """
+    results = group_results(group)
+    if 'data' not in results.filled:
+        path = os.path.join(output_dir, f"{group}_processado.csv")
+        data = _read_csv(path)
+        if data is None:
+            raise FileNotFoundError(path)
+        results.set_data(data)
+    if 'likert' not in results.filled:
+        path = os.path.join(output_dir, f"medias_{group}.csv")
+        means = _read_csv(path, index_col=0)
+        if means is None:
+            raise FileNotFoundError(path)
+        results.set_likert(means, _read_csv(os.path.join(output_dir, f"testes_significancia_{group}.csv"), index_col=0))
+    if 'reliability' not in results.filled:
+        results.set_reliability(_read_csv(os.path.join(output_dir, f"confiabilidade_{group}.csv")),
+                                _read_csv(os.path.join(output_dir, f"item_total_{group}.csv")))
+    if 'keywords' not in results.filled:
+        results.set_keywords(_read_csv(os.path.join(output_dir, f"analise_qualitativa_{group}.csv")))
+    if 'themes' not in results.filled:
+        results.set_themes(_read_csv(os.path.join(output_dir, f"temas_{group}.csv")))
+    return results
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""Cubo de segmentos: médias Likert por perfil, pré-calculadas.
+
+O cubo guarda somas e contagens de todas as perguntas Likert para cada
+segmento de uma coluna de perfil e de cada par de colunas de perfil (ex.:
+"Conforto com Tecnologia = Baixo" ou "Baixo x 10 ou mais turmas"). Os dados
+são agregados uma única vez no nível mais fino (combinação de todas as
+colunas de perfil); os demais recortes saem somando esse agregado, já que
+somas e contagens são aditivas. Depois disso qualquer recorte é uma consulta
+em memória.
+"""
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+METHODS = ['Manual', 'Planilha', 'PlanningApp']
+
+
+def split_method(column):
+    """Separa 'P3.6_Satisfacao_Geral_PlanningApp' em ('P3.6_Satisfacao_Geral', 'PlanningApp')."""
+    base_name, method = column.rsplit('_', 1)
+    return base_name, method
+
+
+class SegmentCube:
+    """Somas, contagens e N de respondentes por segmento de perfil."""
+
+    def __init__(self, tables, likert_columns):
+        # tables: {(dim, ...): (n, sums, counts)}, indexados pelos rótulos do segmento
+        self._tables = tables
+        self.likert_columns = likert_columns
+
+    @classmethod
+    def build(cls, data, profile_columns, likert_columns, max_dims=2):
+        """Constrói o cubo com um único agrupamento sobre os dados compactos."""
+        profile_columns = [col for col in profile_columns if col in data.columns]
+        likert_columns = [col for col in likert_columns if col in data.columns]
+        if not profile_columns or data.empty:
+            return cls({}, likert_columns)
+
+        # Dados compactos: perfil como códigos inteiros, Likert como matriz float
+        categoricals = {col: pd.Categorical(data[col]) for col in profile_columns}
+        compact = pd.DataFrame({col: cat.codes for col, cat in categoricals.items()})
+        categories = {col: cat.categories for col, cat in categoricals.items()}
+        values = data[likert_columns].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        sums = pd.DataFrame(np.where(valid, values, 0.0), columns=likert_columns)
+        counts = pd.DataFrame(valid.astype(np.int64), columns=likert_columns)
+
+        base = pd.concat([compact, sums.add_prefix('sum:'), counts.add_prefix('cnt:')], axis=1)
+        base['N'] = 1
+        finest = base.groupby(profile_columns, sort=False).sum().reset_index()
+
+        tables = {}
+        for k in range(1, max_dims + 1):
+            for dims in combinations(profile_columns, k):
+                dims = list(dims)
+                part = finest[(finest[dims] >= 0).all(axis=1)]
+                rolled = part.groupby(dims).sum()
+                if rolled.empty:
+                    continue
+                # Troca os códigos pelos rótulos originais das respostas
+                labels = [categories[d][rolled.index.get_level_values(i)] for i, d in enumerate(dims)]
+                index = pd.MultiIndex.from_arrays(labels, names=dims) if k > 1 else pd.Index(labels[0], name=dims[0])
+                tables[tuple(dims)] = (
+                    pd.Series(rolled['N'].to_numpy(), index=index, name='N'),
+                    pd.DataFrame(rolled[[f'sum:{c}' for c in likert_columns]].to_numpy(), index=index, columns=likert_columns),
+                    pd.DataFrame(rolled[[f'cnt:{c}' for c in likert_columns]].to_numpy(), index=index, columns=likert_columns),
+                )
+        return cls(tables, likert_columns)
+
+    @property
+    def dimensions(self):
+        """Recortes disponíveis (tuplas de colunas de perfil)."""
+        return list(self._tables)
+
+    def _find(self, segment):
+        dims = tuple(segment)
+        for key in self._tables:
+            if set(key) == set(dims):
+                return key
+        raise KeyError(f"Recorte não disponível no cubo: {dims}")
+
+    def lookup(self, segment):
+        """Médias por pergunta e método para um segmento, ex. {'P1.3_Conforto_Tec': 'Baixo'}.
+
+        Retorna (N, DataFrame pergunta x método) ou (0, None) se o segmento
+        não tiver respondentes.
+        """
+        key = self._find(segment)
+        n, sums, counts = self._tables[key]
+        label = tuple(segment[d] for d in key)
+        label = label if len(key) > 1 else label[0]
+        if label not in n.index:
+            return 0, None
+        means = (sums.loc[label] / counts.loc[label].replace(0, np.nan))
+        return int(n.loc[label]), _to_question_by_method(means)
+
+    def breakdown(self, dimension, question):
+        """Médias de uma pergunta (base, sem método) em todos os segmentos de uma coluna."""
+        n, sums, counts = self._tables[self._find([dimension])]
+        columns = [f'{question}_{m}' for m in METHODS if f'{question}_{m}' in sums.columns]
+        means = sums[columns] / counts[columns].replace(0, np.nan)
+        means.columns = [split_method(c)[1] for c in columns]
+        means.insert(0, 'N', n)
+        return means
+
+    def to_compact(self):
+        """Recortes em listas simples (para JSON): dimensões, segmentos, N, somas e contagens.
+
+        As somas e contagens ficam na ordem de `likert_columns`; médias de
+        vários segmentos juntos saem somando as linhas antes de dividir.
+        """
+        slices = []
+        for dims, (n, sums, counts) in self._tables.items():
+            segments = [list(label) if isinstance(label, tuple) else [label] for label in n.index]
+            slices.append({
+                'dims': list(dims),
+                'segments': [[str(value) for value in label] for label in segments],
+                'n': [int(value) for value in n],
+                'sums': np.round(sums.reindex(columns=self.likert_columns).fillna(0).to_numpy(dtype=float), 4).tolist(),
+                'counts': counts.reindex(columns=self.likert_columns).fillna(0).to_numpy(dtype=np.int64).tolist(),
+            })
+        return {'columns': list(self.likert_columns), 'slices': slices}
+
+    def to_long(self):
+        """Formato longo, uma linha por (segmento, pergunta, método)."""
+        frames = []
+        for dims, (n, sums, counts) in self._tables.items():
+            long = pd.DataFrame({
+                'Soma': sums.stack(),
+                'Contagem': counts.stack(),
+            }).reset_index()
+            long.columns = list(dims) + ['Coluna', 'Soma', 'Contagem']
+            long['N'] = long.set_index(list(dims)).index.map(n).to_numpy()
+            out = pd.DataFrame({
+                'Dimensao_1': dims[0],
+                'Segmento_1': long[dims[0]],
+                'Dimensao_2': dims[1] if len(dims) > 1 else '',
+                'Segmento_2': long[dims[1]] if len(dims) > 1 else '',
+                'N': long['N'],
+            })
+            split = long['Coluna'].str.rsplit('_', n=1, expand=True)
+            out['Pergunta'] = split[0]
+            out['Metodo'] = split[1]
+            out['Soma'] = long['Soma']
+            out['Contagem'] = long['Contagem']
+            out['Media'] = (long['Soma'] / long['Contagem'].replace(0, np.nan)).round(4)
+            frames.append(out)
+        if not frames:
+            return pd.DataFrame(columns=['Dimensao_1', 'Segmento_1', 'Dimensao_2', 'Segmento_2', 'N',
+                                         'Pergunta', 'Metodo', 'Soma', 'Contagem', 'Media'])
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def from_long(cls, long):
+        """Reconstrói o cubo a partir do CSV em formato longo."""
+        long = long.copy()
+        long['Dimensao_2'] = long['Dimensao_2'].fillna('')
+        long['Coluna'] = long['Pergunta'] + '_' + long['Metodo']
+        likert_columns = list(dict.fromkeys(long['Coluna']))
+        tables = {}
+        for (dim1, dim2), part in long.groupby(['Dimensao_1', 'Dimensao_2'], sort=False):
+            dims = (dim1, dim2) if dim2 else (dim1,)
+            keys = ['Segmento_1', 'Segmento_2'] if dim2 else ['Segmento_1']
+            sums = part.pivot_table(index=keys, columns='Coluna', values='Soma', aggfunc='sum')
+            counts = part.pivot_table(index=keys, columns='Coluna', values='Contagem', aggfunc='sum')
+            n = part.groupby(keys)['N'].first()
+            cols = [c for c in likert_columns if c in sums.columns]
+            for frame in (sums, counts, n):
+                frame.index.names = list(dims) if dim2 else [dim1]
+            tables[dims] = (n, sums[cols], counts[cols])
+        return cls(tables, likert_columns)
+
+
+def _to_question_by_method(means):
+    """Converte uma série indexada por coluna Likert em tabela pergunta x método."""
+    frame = means.rename_axis('Coluna').reset_index(name='Media')
+    split = frame['Coluna'].str.rsplit('_', n=1, expand=True)
+    frame['Pergunta'], frame['Metodo'] = split[0], split[1]
+    table = frame.pivot(index='Pergunta', columns='Metodo', values='Media')
+    return table.reindex(columns=[m for m in METHODS if m in table.columns])
+
+
+# Cubos por grupo, compartilhados entre as etapas do mesmo processo
+_cache = {}
+
+
+def register_cube(group, cube):
+    """Guarda o cubo do grupo para as etapas seguintes."""
+    _cache[group] = cube
+
+
+def load_cube(group, path):
+    """Retorna o cubo do grupo em memória ou o carrega do CSV salvo pelo process.py."""
+    cube = _cache.get(group)
+    if cube is None:
+        cube = SegmentCube.from_long(pd.read_csv(path))
+        _cache[group] = cube
+    return cube
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Testes de significância pareados entre os três métodos.
+
+Para cada pergunta Likert, com os mesmos respondentes avaliando Manual,
+Planilha e PlanningApp:
+
+- teste de Friedman entre os três métodos, com W de Kendall como efeito;
+- teste de Wilcoxon (postos sinalizados) para cada par de métodos, com
+  r = Z / sqrt(n) como efeito;
+- correção de Holm para comparações múltiplas, em cada família de testes.
+
+Todas as perguntas são testadas de uma vez: os dados viram um array
+(respondentes x perguntas x métodos) e postos e diferenças são calculados
+como operações vetoriais. Os p-valores usam as aproximações assintóticas
+(qui-quadrado e normal, com correção de empates); com N muito pequeno, como
+no grupo de supervisores, devem ser lidos apenas como indicativos. O scipy só
+é importado quando os testes rodam.
+"""
+import numpy as np
+import pandas as pd
+
+from segment_cube import METHODS
+
+PAIRS = [('PlanningApp', 'Manual'), ('PlanningApp', 'Planilha'), ('Planilha', 'Manual')]
+
+
+def likert_array(data, questions):
+    """Monta o array (respondentes x perguntas x métodos); ausências viram NaN."""
+    array = np.full((len(data), len(questions), len(METHODS)), np.nan)
+    for j, question in enumerate(questions):
+        for m, method in enumerate(METHODS):
+            column = f'{question}_{method}'
+            if column in data.columns:
+                array[:, j, m] = pd.to_numeric(data[column], errors='coerce').to_numpy(dtype=float)
+    return array
+
+
+def friedman(array):
+    """Friedman por pergunta. Retorna (qui2, p, W de Kendall, n)."""
+    from scipy import stats
+    k = array.shape[2]
+    complete = ~np.isnan(array).any(axis=2)  # respondentes x perguntas
+    n = complete.sum(axis=0)
+
+    ranks = stats.rankdata(np.where(complete[..., None], array, 0.0), axis=2)
+    ranks = np.where(complete[..., None], ranks, 0.0)
+    rank_sums = ranks.sum(axis=0)  # perguntas x métodos
+
+    # Correção de empates: soma de (t^3 - t) por linha, linha a linha
+    sorted_rows = np.sort(array, axis=2)
+    equal = sorted_rows[..., 1:] == sorted_rows[..., :-1]
+    ties = _tie_term_from_sorted_equalities(equal)
+    ties = np.where(complete, ties, 0.0).sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = 12.0 / (n * k * (k + 1)) * (rank_sums ** 2).sum(axis=1) - 3.0 * n * (k + 1)
+        correction = 1.0 - ties / (n * k * (k * k - 1))
+        chi2 = np.where(correction > 0, chi2 / correction, np.nan)
+        kendall_w = chi2 / (n * (k - 1))
+    chi2 = np.where(n >= 2, chi2, np.nan)
+    p_value = stats.chi2.sf(chi2, k - 1)
+    return chi2, p_value, kendall_w, n
+
+
+def wilcoxon(first, second):
+    """Wilcoxon pareado por pergunta (colunas). Retorna (Z, p, r, n).
+
+    Diferenças nulas são descartadas (método de Wilcoxon). Z > 0 indica que
+    `first` tende a ter notas maiores que `second`.
+    """
+    from scipy import stats
+    diff = first - second
+    valid = ~np.isnan(diff) & (diff != 0)
+    n = valid.sum(axis=0)
+    abs_diff = np.where(valid, np.abs(diff), np.nan)
+
+    ranks = stats.rankdata(abs_diff, axis=0, nan_policy='omit')
+    w_plus = np.where(valid & (diff > 0), ranks, 0.0).sum(axis=0)
+
+    # Correção de empates: contagem de cada valor distinto de |d| por pergunta
+    distinct = np.unique(abs_diff[~np.isnan(abs_diff)])
+    tie_counts = (abs_diff[..., None] == distinct).sum(axis=0)
+    ties = (tie_counts ** 3 - tie_counts).sum(axis=-1)
+
+    mean = n * (n + 1) / 4.0
+    variance = n * (n + 1) * (2 * n + 1) / 24.0 - ties / 48.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(variance > 0, (w_plus - mean) / np.sqrt(variance), np.nan)
+        r = z / np.sqrt(n)
+    p_value = 2.0 * stats.norm.sf(np.abs(z))
+    return z, p_value, r, n
+
+
+def holm(p_values):
+    """Correção de Holm sobre um array de p-valores (NaN é ignorado)."""
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+    flat = p_values.ravel()
+    valid = np.flatnonzero(~np.isnan(flat))
+    if valid.size == 0:
+        return adjusted
+    order = valid[np.argsort(flat[valid], kind='stable')]
+    m = order.size
+    scaled = flat[order] * (m - np.arange(m))
+    out = adjusted.ravel()
+    out[order] = np.minimum(np.maximum.accumulate(scaled), 1.0)
+    return out.reshape(p_values.shape)
+
+
+def run_tests(data, questions):
+    """Roda Friedman e Wilcoxon para todas as perguntas e devolve uma tabela por pergunta."""
+    questions = list(questions)
+    array = likert_array(data, questions)
+
+    chi2, p_friedman, kendall_w, n_friedman = friedman(array)
+    results = pd.DataFrame(index=pd.Index(questions, name='Pergunta'))
+    results['Friedman_N'] = n_friedman
+    results['Friedman_Qui2'] = chi2
+    results['Friedman_p'] = p_friedman
+    results['Friedman_p_Holm'] = holm(p_friedman)
+    results['Kendall_W'] = kendall_w
+
+    pair_results = [wilcoxon(array[:, :, METHODS.index(a)], array[:, :, METHODS.index(b)]) for a, b in PAIRS]
+    # Uma única família para todos os pares e perguntas
+    p_adjusted = holm(np.stack([p for _, p, _, _ in pair_results]))
+    for (a, b), (z, p, r, n), p_adj in zip(PAIRS, pair_results, p_adjusted):
+        prefix = f'{a}_vs_{b}'
+        results[f'{prefix}_N'] = n
+        results[f'{prefix}_Z'] = z
+        results[f'{prefix}_p'] = p
+        results[f'{prefix}_p_Holm'] = p_adj
+        results[f'{prefix}_r'] = r
+    return results
+
+
+def format_p(p_value):
+    """Formata um p-valor para o relatório."""
+    if p_value is None or pd.isna(p_value):
+        return 'n/d'
+    return '<0.001' if p_value < 0.001 else f'{p_value:.3f}'
+
+
+def significance_marker(p_value):
+    """Asteriscos convencionais para um p-valor (já ajustado)."""
+    if p_value is None or pd.isna(p_value):
+        return ''
+    if p_value < 0.001:
+        return '***'
+    if p_value < 0.01:
+        return '**'
+    if p_value < 0.05:
+        return '*'
+    return 'n.s.'
+
+
+def _tie_term_from_sorted_equalities(equal):
+    """Soma de (t^3 - t) por linha a partir das igualdades entre vizinhos ordenados."""
+    # Comprimento de cada sequência de empates percorrendo os vizinhos iguais
+    total = np.zeros(equal.shape[:-1])
+    run = np.ones(equal.shape[:-1])
+    for i in range(equal.shape[-1]):
+        same = equal[..., i]
+        run = np.where(same, run + 1, run)
+        ended = ~same
+        total += np.where(ended, run ** 3 - run, 0.0)
+        run = np.where(ended, 1.0, run)
+    total += run ** 3 - run
+    return total
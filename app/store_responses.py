@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Grava as respostas processadas e as métricas dos logs no banco SQLite (opcional).
+
+Não faz parte das etapas padrão do pipeline: rode depois dele (ou junto,
+`python pipeline.py process.py store_responses.py`) para criar ou atualizar
+`output/respostas.sqlite`. Cada execução é um upsert: só as linhas novas ou
+alteradas são gravadas, os respondentes que saíram do export são apagados, e
+os agregados do banco (médias e frequências) são atualizados por elas.
+
+Uso:
+
+    python store_responses.py [--banco output/respostas.sqlite] [--chave-usuario id]
+
+As métricas dos logs são gravadas por usuário, identificado pelo campo
+`owner.<chave-usuario>` do `logs.json` (padrão: `owner.id`); se algum
+usuário não tiver esse campo, ou se ele se repetir, a gravação dos logs
+falha com a lista dos campos encontrados.
+"""
+import argparse
+import os
+import time
+
+from planning_logs import load_logs
+from response_store import DEFAULT_PATH, USER_KEY, ResponseStore
+from results import load_results
+from segment_cube import METHODS
+
+parser = argparse.ArgumentParser(description="Grava respostas e métricas dos logs no banco SQLite.")
+parser.add_argument('--banco', default=DEFAULT_PATH, help="arquivo do banco (criado se não existir)")
+parser.add_argument('--chave-usuario', default=USER_KEY,
+                    help="campo de owner que identifica o usuário no logs.json (padrão: id)")
+args, _ = parser.parse_known_args()
+
+# --- Carregar Resultados (em memória quando rodando no pipeline) ---
+try:
+    groups = {group: load_results(group) for group in ('professores', 'supervisores')}
+except FileNotFoundError as e:
+    print(f"Erro: Arquivo não encontrado: {e}. Execute o process.py primeiro.")
+    exit()
+
+os.makedirs(os.path.dirname(args.banco) or '.', exist_ok=True)
+with ResponseStore(args.banco) as store:
+    # --- Respostas (formato longo; um grupo sem respondentes apaga os que estavam gravados) ---
+    for group, results in groups.items():
+        likert_columns = [f"{question}_{method}" for question in results.likert for method in METHODS]
+        inicio = time.perf_counter()
+        changed = store.upsert_responses(group, results.data, likert_columns, results.frequencies.columns)
+        means = store.means(group)
+        elapsed = (time.perf_counter() - inicio) * 1000
+        print(f"{group.capitalize()}: {changed} respostas gravadas, alteradas ou apagadas; "
+              f"médias de {len(means)} perguntas reagregadas em {elapsed:.0f} ms")
+
+    # --- Métricas dos Logs ---
+    try:
+        users = store.upsert_user_metrics(load_logs()['user_metrics'], args.chave_usuario)
+        print(f"Logs: métricas de {users} usuários gravadas.")
+    except FileNotFoundError:
+        print("Aviso: logs.json não encontrado; banco sem as métricas dos logs.")
+
+print(f"Banco salvo em: {args.banco}")
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Análise qualitativa em blocos de respostas, com pool de processos.
+
+As respostas de cada coluna tokenizada são cortadas em blocos de
+`CHUNK_RESPONSES`. Cada bloco devolve um resultado parcial: a contagem de
+palavras-chave (`KeywordTally`, com posições globais), o número de respostas
+e, nas colunas de sentimento, a contagem do léxico por resposta. Os parciais
+se combinam de forma associativa (contagens somadas, primeira posição mínima,
+placares concatenados na ordem dos blocos), então o resultado é idêntico ao
+da passada única, com ou sem processos.
+
+O vocabulário, o autômato do léxico e os radicais corrigidos vão para cada
+processo uma única vez, no inicializador do pool; cada tarefa leva só os
+vetores de ids do seu bloco. Abaixo de `PARALLEL_THRESHOLD` tokens os blocos
+rodam no próprio processo, pelas mesmas funções.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from text_pipeline import KeywordTally, TokenizedColumn
+
+CHUNK_RESPONSES = 5000
+# Abaixo deste número de tokens o pool custa mais do que economiza
+PARALLEL_THRESHOLD = 500_000
+
+_worker = {}
+
+
+class ColumnResult:
+    """Resultado de uma coluna: respostas, palavras-chave e placares de sentimento."""
+
+    def __init__(self, total_responses=0, keywords=None, scores=None):
+        self.total_responses = total_responses
+        self.keywords = keywords if keywords is not None else KeywordTally()
+        self.scores = scores
+
+    def merge(self, other):
+        """Junta o resultado de um bloco seguinte da mesma coluna."""
+        if self.scores is None or other.scores is None:
+            scores = self.scores if other.scores is None else other.scores
+        else:
+            scores = np.concatenate([self.scores, other.scores])
+        return ColumnResult(self.total_responses + other.total_responses,
+                            self.keywords.merge(other.keywords), scores)
+
+
+def _init_worker(vocabulary, matcher, token_stems):
+    _worker['vocabulary'] = vocabulary
+    _worker['matcher'] = matcher
+    _worker['token_stems'] = token_stems
+
+
+def _analyze_chunk(column, ids, indptr, token_offset, keep, score):
+    """Resultado parcial de um bloco de respostas (posições globais a partir de `token_offset`)."""
+    vocabulary = _worker['vocabulary']
+    chunk = TokenizedColumn(column, None, None, ids, indptr)
+    mask = chunk.keyword_mask(vocabulary)
+    if keep is not None:
+        mask &= keep[chunk.response_of_token]
+    keywords = KeywordTally.from_ids(ids[mask], token_offset + np.flatnonzero(mask))
+    scores = None
+    if score and _worker['matcher'] is not None:
+        scores = _worker['matcher'].scores(chunk, vocabulary, _worker['token_stems'])
+    return ColumnResult(len(chunk), keywords, scores)
+
+
+def _chunks(corpus, columns, keep, sentiment_columns, chunk_responses):
+    for col in columns:
+        tokens = corpus.get(col)
+        if tokens is None:
+            continue
+        col_keep = keep.get(col) if keep else None
+        for start in range(0, len(tokens), chunk_responses):
+            stop = min(start + chunk_responses, len(tokens))
+            lo, hi = tokens.indptr[start], tokens.indptr[stop]
+            yield (col, tokens.ids[lo:hi], tokens.indptr[start:stop + 1] - lo, lo,
+                   None if col_keep is None else col_keep[start:stop], col in sentiment_columns)
+
+
+def analyze_columns(corpus, columns, keep=None, matcher=None, token_stems=None, sentiment_columns=(),
+                    max_workers=None, chunk_responses=CHUNK_RESPONSES):
+    """Palavras-chave, totais e sentimentos de todas as colunas, bloco a bloco.
+
+    `keep` é {coluna: máscara de respostas que contam nas palavras-chave}.
+    Retorna {coluna: ColumnResult}, na ordem de `columns`.
+    """
+    tasks = list(_chunks(corpus, columns, keep, set(sentiment_columns), chunk_responses))
+    n_tokens = sum(len(task[1]) for task in tasks)
+    workers = max_workers if max_workers is not None else min(os.cpu_count() or 1, len(tasks))
+    state = (corpus.vocabulary, matcher, token_stems)
+    if workers > 1 and n_tokens >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=state) as pool:
+            partials = list(pool.map(_analyze_chunk, *zip(*tasks)))
+    else:
+        _init_worker(*state)
+        partials = [_analyze_chunk(*task) for task in tasks]
+
+    results = {}
+    for task, partial in zip(tasks, partials):
+        col = task[0]
+        results[col] = results[col].merge(partial) if col in results else partial
+    for col in columns:
+        if corpus.get(col) is not None and col not in results:
+            results[col] = ColumnResult()       # coluna sem respostas
+    return results
+
+
+def merge_keywords(corpus, results, columns):
+    """Palavras-chave de todas as colunas juntas, como se fossem um único vetor na ordem das colunas."""
+    total = KeywordTally()
+    offset = 0
+    for col in columns:
+        if col not in results:
+            continue
+        keywords = results[col].keywords
+        total = total.merge(KeywordTally(keywords.ids, keywords.counts, keywords.first + offset))
+        offset += len(corpus.get(col).ids)
+    return total
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+"""Pipeline de texto em lote para as respostas abertas.
+
+Cada coluna de respostas é normalizada de uma vez (expressões pré-compiladas
+aplicadas à coluna inteira), quebrada em palavras e convertida para ids
+inteiros de um vocabulário compartilhado. As respostas de uma coluna viram um
+vetor plano de ids mais os limites de cada resposta (`indptr`), no formato
+CSR; palavras-chave, gráficos e sentimentos trabalham sobre esses vetores em
+vez de limpar as mesmas strings de novo.
+
+As stop words ficam num único conjunto do módulo e o filtro de palavras-chave
+é calculado uma vez por palavra do vocabulário, não por ocorrência. O índice
+invertido (palavra -> pergunta, respondente, posição) sai dos mesmos vetores
+com uma única ordenação, e permite achar as respostas que citam uma palavra
+sem varrer o texto de novo.
+
+Palavras-chave, sentimentos e o índice comparam radicais: cada palavra tem os
+acentos removidos e passa por um stemmer leve de português (plural, gênero e
+sufixos derivacionais comuns), de modo que "organizado", "organização" e
+"organizar" contam como o mesmo termo. O radical é calculado uma vez por
+palavra distinta e guardado num cache do módulo; as contagens mostram a forma
+mais frequente de cada radical.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+PUNCTUATION = re.compile(r'[^\w\s]')
+WHITESPACE = re.compile(r'\s+')
+# Pontuação que separa orações: uma expressão (`heavy_hitters`) não atravessa estes sinais
+CLAUSE_BREAK = re.compile(r'[.,;:!?()\[\]…]+')
+
+# Palavras comuns em português para filtrar
+STOP_WORDS = frozenset({
+    'que', 'para', 'com', 'uma', 'dos', 'das', 'pelo', 'pela', 'são', 'mais',
+    'muito', 'bem', 'também', 'sistema', 'planejamento', 'aula', 'aulas',
+    'professor', 'professores', 'escola', 'tempo', 'fácil', 'difícil',
+    'novo', 'antigo', 'método', 'métodos', 'uso', 'usar', 'usado'
+})
+MIN_KEYWORD_LENGTH = 3
+
+# Trocas de plural e sufixos removidos pelo stemmer, testados na ordem (sem acentos)
+PLURAL_SUFFIXES = [('coes', 'cao'), ('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ns', 'm')]
+STEM_SUFFIXES = [
+    'amente', 'mente', 'amento', 'imento', 'mento', 'idade', 'acao', 'icao', 'cao',
+    'encia', 'ancia', 'avel', 'ivel', 'ismo', 'ista', 'ante', 'ente', 'adora', 'ador',
+    'ado', 'ada', 'ido', 'ida', 'oso', 'osa', 'ivo', 'iva', 'ao', 'ar', 'er', 'ir',
+    'o', 'a', 'e',
+]
+MIN_STEM_LENGTH = 4
+
+
+def fold_accents(word):
+    """Remove os acentos (e o cedilha) de uma palavra."""
+    decomposed = unicodedata.normalize('NFKD', word)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _light_stem(word):
+    if len(word) <= MIN_STEM_LENGTH:
+        return word
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if word.endswith(suffix):
+            word = word[:-len(suffix)] + replacement
+            break
+    else:
+        if word.endswith('s') and len(word) > MIN_STEM_LENGTH:
+            word = word[:-1]
+    for suffix in STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+# Radical de cada palavra já vista, compartilhado por todos os vocabulários
+_stems = {}
+
+
+def stem(word):
+    """Radical sem acentos de uma palavra, calculado uma vez por palavra distinta."""
+    result = _stems.get(word)
+    if result is None:
+        result = _stems[word] = _light_stem(fold_accents(word))
+    return result
+
+
+FOLDED_STOP_WORDS = frozenset(fold_accents(word) for word in STOP_WORDS)
+
+
+def normalize(texts):
+    """Minúsculas, pontuação trocada por espaço e espaços colapsados, na coluna inteira."""
+    texts = texts.astype(str).str.lower()
+    texts = texts.str.replace(PUNCTUATION, ' ', regex=True)
+    texts = texts.str.replace(WHITESPACE, ' ', regex=True)
+    return texts.str.strip()
+
+
+def valid_responses(series):
+    """Respostas não vazias de uma coluna, preservando o índice dos respondentes."""
+    series = series.dropna()
+    return series[series.astype(str).str.strip() != '']
+
+
+def shorten(text, max_length=150):
+    """Resposta em uma linha, cortada com reticências para caber no relatório."""
+    text = ' '.join(str(text).split())
+    return text if len(text) <= max_length else text[:max_length - 3].rstrip() + '...'
+
+
+class Vocabulary:
+    """Mapa palavra <-> id inteiro, compartilhado por todas as colunas de um grupo.
+
+    Cada palavra também tem o id do seu radical (`stem_of`), num segundo mapa
+    radical <-> id.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.tokens = []
+        self.stem_ids = {}
+        self.stems = []
+        self._is_keyword = np.zeros(0, dtype=bool)
+        self._stem_of = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def intern(self, tokens):
+        """Converte uma sequência de palavras em ids, registrando as novas."""
+        tokens = pd.Series(tokens, dtype=object)
+        new = [tok for tok in pd.unique(tokens) if tok not in self.ids]
+        for tok in new:
+            self.ids[tok] = len(self.tokens)
+            self.tokens.append(tok)
+        if new:
+            flags = [len(tok) >= MIN_KEYWORD_LENGTH and fold_accents(tok) not in FOLDED_STOP_WORDS for tok in new]
+            self._is_keyword = np.concatenate([self._is_keyword, np.array(flags, dtype=bool)])
+            self._stem_of = np.concatenate([self._stem_of, self._intern_stems(stem(tok) for tok in new)])
+        return tokens.map(self.ids).to_numpy(dtype=np.int64)
+
+    def _intern_stems(self, stems):
+        result = []
+        for st in stems:
+            if st not in self.stem_ids:
+                self.stem_ids[st] = len(self.stems)
+                self.stems.append(st)
+            result.append(self.stem_ids[st])
+        return np.array(result, dtype=np.int64)
+
+    @property
+    def is_keyword(self):
+        """Máscara por id: a palavra conta como palavra-chave."""
+        return self._is_keyword
+
+    @property
+    def stem_of(self):
+        """Id do radical de cada palavra, por id de palavra."""
+        return self._stem_of
+
+    def decode(self, ids):
+        """Converte ids de volta em palavras."""
+        return [self.tokens[i] for i in ids]
+
+    def lookup(self, words):
+        """Ids das palavras conhecidas (as desconhecidas são ignoradas)."""
+        return np.array([self.ids[w] for w in words if w in self.ids], dtype=np.int64)
+
+
+class TokenizedColumn:
+    """Respostas de uma coluna em formato CSR: ids planos + limites por resposta."""
+
+    def __init__(self, column, index, texts, ids, indptr, clause_of_token=None):
+        self.column = column
+        self.index = index          # rótulos dos respondentes, um por resposta
+        self.texts = texts          # respostas originais (strings), na mesma ordem
+        self.ids = ids
+        self.indptr = indptr
+        self.clause_of_token = clause_of_token     # oração (numerada na coluna toda) de cada token
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def response_of_token(self):
+        """Posição da resposta de cada token."""
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    @property
+    def offsets(self):
+        """Posição de cada token dentro da sua resposta."""
+        return np.arange(len(self.ids)) - np.repeat(self.indptr[:-1], np.diff(self.indptr))
+
+    def keyword_mask(self, vocabulary):
+        """Máscara sobre os tokens: quais são palavras-chave."""
+        return vocabulary.is_keyword[self.ids]
+
+    def keyword_ids(self, vocabulary, keep=None):
+        """Ids das palavras-chave, na ordem em que aparecem (só das respostas em `keep`, se dado)."""
+        mask = self.keyword_mask(vocabulary)
+        if keep is not None:
+            mask &= keep[self.response_of_token]
+        return self.ids[mask]
+
+
+def tokenize_column(data, column, vocabulary):
+    """Normaliza e converte em ids todas as respostas válidas de uma coluna."""
+    responses = valid_responses(data[column])
+    words = normalize(responses).str.split()
+    lengths = words.str.len().fillna(0).to_numpy(dtype=np.int64)
+    flat = [tok for tokens in words for tok in tokens]
+    ids = vocabulary.intern(flat) if flat else np.zeros(0, dtype=np.int64)
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    # Orações: os sinais de CLAUSE_BREAK também viram espaço no `normalize`, então as palavras são as mesmas
+    clauses = normalize(responses.astype(str).str.split(CLAUSE_BREAK).explode()).str.split()
+    clause_lengths = clauses.str.len().fillna(0).to_numpy(dtype=np.int64)
+    clause_of_token = np.repeat(np.arange(len(clause_lengths)), clause_lengths)
+    return TokenizedColumn(column, responses.index.to_numpy(), responses.tolist(), ids, indptr, clause_of_token)
+
+
+class InvertedIndex:
+    """Listas de ocorrências por radical: (pergunta, respondente, posição na resposta).
+
+    As ocorrências de todas as colunas ficam em vetores ordenados por id de
+    radical, com `indptr` marcando o trecho de cada radical (formato CSR); uma
+    consulta por "organizado" também encontra "organização".
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self.questions = list(corpus.columns)
+        token_ids, question, response, offset = [], [], [], []
+        for q, tokens in enumerate(corpus.columns.values()):
+            token_ids.append(tokens.ids)
+            question.append(np.full(len(tokens.ids), q, dtype=np.int64))
+            response.append(tokens.response_of_token)
+            offset.append(tokens.offsets)
+        vocabulary = corpus.vocabulary
+        token_ids = vocabulary.stem_of[np.concatenate(token_ids)] if token_ids else np.zeros(0, dtype=np.int64)
+        order = np.argsort(token_ids, kind='stable')
+        self._question = np.concatenate(question)[order] if question else np.zeros(0, dtype=np.int64)
+        self._response = np.concatenate(response)[order] if response else np.zeros(0, dtype=np.int64)
+        self._offset = np.concatenate(offset)[order] if offset else np.zeros(0, dtype=np.int64)
+        self._indptr = np.searchsorted(token_ids[order], np.arange(len(vocabulary.stems) + 1))
+
+    def _slice(self, word):
+        token = self.corpus.vocabulary.stem_ids.get(stem(word))
+        if token is None or token + 1 >= len(self._indptr):
+            return slice(0, 0)
+        return slice(self._indptr[token], self._indptr[token + 1])
+
+    def postings(self, word, question=None):
+        """Ocorrências de uma palavra: Pergunta, Respondente, Posicao."""
+        part = self._slice(word)
+        question_pos, response, offset = self._question[part], self._response[part], self._offset[part]
+        if question is not None:
+            keep = question_pos == self.questions.index(question) if question in self.questions else np.zeros(len(question_pos), dtype=bool)
+            question_pos, response, offset = question_pos[keep], response[keep], offset[keep]
+        respondents = [self.corpus.columns[self.questions[q]].index[r] for q, r in zip(question_pos, response)]
+        return pd.DataFrame({
+            'Pergunta': [self.questions[q] for q in question_pos],
+            'Respondente': respondents,
+            'Posicao': offset,
+        })
+
+    def _response_keys(self, word, question=None):
+        """Pares (pergunta, posição da resposta) que contêm a palavra."""
+        part = self._slice(word)
+        keys = set(zip(self._question[part].tolist(), self._response[part].tolist()))
+        if question is not None:
+            q = self.questions.index(question) if question in self.questions else -1
+            keys = {k for k in keys if k[0] == q}
+        return keys
+
+    def responses(self, words, question=None, mode='all'):
+        """Respostas que citam todas (`mode='all'`) ou alguma (`'any'`) das palavras.
+
+        Retorna uma lista de (pergunta, respondente, texto), na ordem das perguntas e dos respondentes.
+        """
+        if isinstance(words, str):
+            words = [words]
+        sets = [self._response_keys(word, question) for word in words]
+        if not sets:
+            return []
+        keys = set.intersection(*sets) if mode == 'all' else set.union(*sets)
+        result = []
+        for q, r in sorted(keys):
+            tokens = self.corpus.columns[self.questions[q]]
+            result.append((self.questions[q], tokens.index[r], tokens.texts[r]))
+        return result
+
+    def quotes(self, words, question=None, limit=2, max_length=150):
+        """Até `limit` respostas distintas que citam as palavras, encurtadas para o relatório."""
+        quotes = []
+        for _, _, text in self.responses(words, question):
+            text = shorten(text, max_length)
+            if text not in quotes:
+                quotes.append(text)
+            if len(quotes) == limit:
+                break
+        return quotes
+
+
+class TextCorpus:
+    """Colunas tokenizadas de um grupo de respondentes, com vocabulário comum."""
+
+    def __init__(self, data, columns):
+        self.vocabulary = Vocabulary()
+        self.n_rows = len(data)
+        self.columns = {col: tokenize_column(data, col, self.vocabulary) for col in columns if col in data.columns}
+        self._index = None
+
+    def get(self, column):
+        return self.columns.get(column)
+
+    def build_index(self):
+        """Constrói o índice invertido do corpus (uma vez só) e o devolve."""
+        if self._index is None:
+            self._index = InvertedIndex(self)
+        return self._index
+
+    @property
+    def index(self):
+        """Índice invertido do corpus, construído na primeira consulta."""
+        return self.build_index()
+
+    def matches(self, data, columns):
+        return self.n_rows == len(data) and all(col in self.columns for col in columns if col in data.columns)
+
+
+class KeywordTally:
+    """Contagem parcial de palavras: por id, número de ocorrências e primeira posição.
+
+    Contagens de blocos diferentes (de processos diferentes, inclusive) se
+    somam com `merge`, em qualquer agrupamento, desde que as posições sejam
+    globais: o resultado é o mesmo de contar tudo de uma vez.
+    """
+
+    def __init__(self, ids=None, counts=None, first=None):
+        empty = np.zeros(0, dtype=np.int64)
+        self.ids = empty if ids is None else ids
+        self.counts = empty if counts is None else counts
+        self.first = empty if first is None else first
+
+    @classmethod
+    def from_ids(cls, ids, positions=None):
+        """Conta `ids`; `positions` dá a posição global de cada um (padrão: 0, 1, 2...)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        unique, first, counts = np.unique(ids, return_index=True, return_counts=True)
+        if positions is not None:
+            first = np.asarray(positions, dtype=np.int64)[first]
+        return cls(unique, counts.astype(np.int64), first.astype(np.int64))
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def merge(self, other):
+        """Soma das duas contagens (a primeira posição é a menor das duas)."""
+        ids = np.concatenate([self.ids, other.ids])
+        unique, inverse = np.unique(ids, return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts]), minlength=len(unique))
+        first = np.full(len(unique), np.iinfo(np.int64).max)
+        np.minimum.at(first, inverse, np.concatenate([self.first, other.first]))
+        return KeywordTally(unique, counts.astype(np.int64), first)
+
+    def stem_forms(self, vocabulary):
+        """Radicais contados, cada um com a forma mais frequente, contagem e primeira posição."""
+        stems = vocabulary.stem_of[self.ids]
+        # Forma de exibição: por radical, maior contagem e depois primeira ocorrência
+        ranked = np.lexsort((self.first, -self.counts, stems))
+        head = np.r_[True, stems[ranked][1:] != stems[ranked][:-1]]
+        stem_unique = stems[ranked][head]
+        labels = self.ids[ranked][head]
+        stem_counts = np.bincount(stems, weights=self.counts)[stem_unique].astype(np.int64)
+        stem_first = np.minimum.reduceat(self.first[ranked], np.flatnonzero(head))
+        return stem_unique, labels, stem_counts, stem_first
+
+    def counter(self, vocabulary):
+        """Counter de radicais na ordem da primeira ocorrência (ver `count_ids`)."""
+        if len(self.ids) == 0:
+            return Counter()
+        _, labels, stem_counts, stem_first = self.stem_forms(vocabulary)
+        order = np.argsort(stem_first, kind='stable')
+        return Counter(dict(zip(vocabulary.decode(labels[order]), stem_counts[order].tolist())))
+
+
+def stem_labels(ids, vocabulary):
+    """{id do radical: forma mais frequente} para os radicais que aparecem em `ids`."""
+    if len(ids) == 0:
+        return {}
+    stem_unique, labels, _, _ = KeywordTally.from_ids(ids).stem_forms(vocabulary)
+    return dict(zip(stem_unique.tolist(), vocabulary.decode(labels)))
+
+
+def count_ids(ids, vocabulary):
+    """Counter de radicais a partir de ids, na ordem da primeira ocorrência de cada radical.
+
+    Cada radical aparece com a sua forma mais frequente entre os ids contados
+    (no empate, a que aparece primeiro). A ordem de inserção é a mesma de um
+    Counter alimentado palavra a palavra, então `most_common` desempata do
+    mesmo jeito.
+    """
+    return KeywordTally.from_ids(ids).counter(vocabulary)
+
+
+# Corpora por grupo, compartilhados entre as etapas do mesmo processo
+_cache = {}
+
+
+def text_corpus(group, data, columns):
+    """Retorna o corpus do grupo, tokenizando as colunas só se ainda não existir."""
+    corpus = _cache.get(group)
+    if corpus is None or not corpus.matches(data, columns):
+        corpus = TextCorpus(data, columns)
+        _cache[group] = corpus
+    return corpus
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Descoberta de temas nas respostas abertas por agrupamento TF-IDF.
+
+Para cada pergunta, as palavras-chave tokenizadas viram uma matriz esparsa
+respostas x radicais (CSR) montada direto dos vetores de ids do
+`text_pipeline`, sem passar por strings. A matriz é ponderada por TF-IDF
+(tf sublinear, idf suavizado), cada linha é normalizada e as respostas são
+agrupadas por k-means esférico (similaridade de cosseno): a atribuição é um
+produto matriz esparsa x centróides e a atualização dos centróides, outro
+produto esparso com a matriz indicadora dos grupos.
+
+Cada tema sai com o tamanho, os termos de maior peso no centróide e as
+respostas mais próximas dele. O scipy só é importado quando os temas são
+calculados.
+"""
+import numpy as np
+import pandas as pd
+
+from text_pipeline import shorten, stem_labels
+
+MIN_RESPONSES = 4
+MAX_THEMES = 8
+TOP_TERMS = 5
+EXAMPLES = 2
+
+
+def document_term_matrix(tokens, vocabulary):
+    """Contagens esparsas (CSR) das palavras-chave de cada resposta, por radical."""
+    from scipy import sparse
+    mask = tokens.keyword_mask(vocabulary)
+    rows = tokens.response_of_token[mask]
+    columns = vocabulary.stem_of[tokens.ids[mask]]
+    # Pares repetidos (mesmo radical na mesma resposta) são somados na conversão
+    return sparse.csr_matrix((np.ones(len(rows)), (rows, columns)),
+                             shape=(len(tokens), len(vocabulary.stems)))
+
+
+def tfidf(counts):
+    """TF-IDF com tf sublinear (1 + log tf), idf suavizado e linhas com norma 1."""
+    weighted = counts.tocsr(copy=True)
+    n = weighted.shape[0]
+    df = np.bincount(weighted.indices, minlength=weighted.shape[1])
+    idf = np.log((1 + n) / (1 + df)) + 1
+    weighted.data = (1 + np.log(weighted.data)) * idf[weighted.indices]
+    row_of_value = np.repeat(np.arange(n), np.diff(weighted.indptr))
+    norms = np.sqrt(np.bincount(row_of_value, weights=weighted.data ** 2, minlength=n))
+    norms[norms == 0] = 1.0
+    weighted.data /= norms[row_of_value]
+    return weighted
+
+
+def _normalize_rows(centers):
+    norms = np.linalg.norm(centers, axis=1, keepdims=True)
+    return np.divide(centers, norms, out=np.zeros_like(centers), where=norms > 0)
+
+
+def _initial_centers(X, k, rng):
+    """Sementes k-means++ com distância de cosseno (1 - similaridade)."""
+    n = X.shape[0]
+    chosen = [rng.integers(n)]
+    best = (X @ X[chosen[0]].T).toarray().ravel()
+    for _ in range(1, k):
+        distance = np.clip(1 - best, 0, None)
+        total = distance.sum()
+        candidate = rng.choice(n, p=distance / total) if total > 0 else rng.integers(n)
+        chosen.append(candidate)
+        best = np.maximum(best, (X @ X[candidate].T).toarray().ravel())
+    return X[chosen].toarray()
+
+
+def _distinct_rows(X, order, count):
+    """As primeiras `count` linhas de `order` com conteúdo diferente entre si."""
+    chosen, seen = [], set()
+    for row in order:
+        start, stop = X.indptr[row], X.indptr[row + 1]
+        key = (X.indices[start:stop].tobytes(), X.data[start:stop].tobytes())
+        if key not in seen:
+            seen.add(key)
+            chosen.append(row)
+            if len(chosen) == count:
+                break
+    return chosen
+
+
+def spherical_kmeans(X, k, seed=42, n_init=5, max_iter=50):
+    """K-means esférico sobre as linhas (norma 1) de uma matriz esparsa.
+
+    Retorna (grupos, centróides, similaridade de cada resposta ao seu
+    centróide), da inicialização com maior similaridade total.
+    """
+    from scipy import sparse
+    rng = np.random.default_rng(seed)
+    n = X.shape[0]
+    best = None
+    for _ in range(n_init):
+        centers = _initial_centers(X, k, rng)
+        labels = None
+        for _ in range(max_iter):
+            similarity = np.asarray(X @ centers.T)
+            new_labels = similarity.argmax(axis=1)
+            if labels is not None and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            indicator = sparse.csr_matrix((np.ones(n), (labels, np.arange(n))), shape=(k, n))
+            sums = (indicator @ X).toarray()
+            empty = np.flatnonzero(np.asarray(indicator.sum(axis=1)).ravel() == 0)
+            if len(empty):
+                # Cada grupo vazio recebe uma resposta diferente (e de conteúdo distinto), das mais
+                # distantes do seu centróide atual; a mesma resposta em dois grupos os manteria iguais
+                seeds = _distinct_rows(X, np.argsort(similarity[np.arange(n), labels], kind='stable'), len(empty))
+                for cluster, row in zip(empty, seeds):
+                    sums[cluster] = X[row].toarray().ravel()
+            centers = _normalize_rows(sums)
+        # Grupos e similaridades em relação aos centróides finais (no limite de iterações eles já mudaram)
+        similarity = np.asarray(X @ centers.T)
+        labels = similarity.argmax(axis=1)
+        fit = similarity[np.arange(n), labels]
+        if best is None or fit.sum() > best[2].sum():
+            best = (labels, centers, fit)
+    return best
+
+
+def n_themes(n_responses):
+    """Número de temas para uma pergunta: cerca de sqrt(n/2), entre 2 e MAX_THEMES."""
+    return int(np.clip(round(np.sqrt(n_responses / 2)), 2, MAX_THEMES))
+
+
+def question_themes(tokens, vocabulary, k=None, seed=42):
+    """Temas de uma pergunta: Tema, Respostas, Porcentagem, Coesao, Termos, Exemplos.
+
+    Respostas sem nenhuma palavra-chave não entram no agrupamento; a
+    porcentagem é sobre todas as respostas válidas da pergunta.
+    """
+    columns = ['Tema', 'Respostas', 'Porcentagem', 'Coesao', 'Termos', 'Exemplos']
+    counts = document_term_matrix(tokens, vocabulary)
+    keep = np.flatnonzero(np.diff(counts.indptr) > 0)
+    if len(keep) < MIN_RESPONSES:
+        return pd.DataFrame(columns=columns)
+
+    X = tfidf(counts[keep])
+    distinct = len({tuple(X.indices[X.indptr[i]:X.indptr[i + 1]]) for i in range(X.shape[0])})
+    k = min(k or n_themes(len(keep)), distinct)
+    if k < 2:
+        return pd.DataFrame(columns=columns)
+    labels, centers, fit = spherical_kmeans(X, k, seed)
+
+    names = stem_labels(tokens.keyword_ids(vocabulary), vocabulary)
+    themes = []
+    for cluster in range(k):
+        members = np.flatnonzero(labels == cluster)
+        if len(members) == 0:
+            continue
+        top = [t for t in np.argsort(-centers[cluster], kind='stable')[:TOP_TERMS] if centers[cluster, t] > 0]
+        examples = []
+        for member in members[np.argsort(-fit[members], kind='stable')]:
+            text = shorten(tokens.texts[keep[member]])
+            if text not in examples:
+                examples.append(text)
+            if len(examples) == EXAMPLES:
+                break
+        themes.append({
+            'Respostas': len(members),
+            'Porcentagem': round(len(members) / len(tokens) * 100, 1),
+            'Coesao': round(float(fit[members].mean()), 3),
+            'Termos': ', '.join(names.get(t, vocabulary.stems[t]) for t in top),
+            'Exemplos': ' | '.join(examples),
+        })
+    themes = pd.DataFrame(themes).sort_values('Respostas', ascending=False, kind='stable')
+    themes.insert(0, 'Tema', np.arange(1, len(themes) + 1))
+    return themes[columns].reset_index(drop=True)
+
+
+def corpus_themes(corpus, columns, seed=42):
+    """Temas de todas as perguntas de um corpus, com a coluna Pergunta na frente."""
+    frames = []
+    for col in columns:
+        tokens = corpus.get(col)
+        if tokens is None or len(tokens) == 0:
+            continue
+        themes = question_themes(tokens, corpus.vocabulary, seed=seed)
+        if not themes.empty:
+            themes.insert(0, 'Pergunta', col)
+            frames.append(themes)
+    if not frames:
+        return pd.DataFrame(columns=['Pergunta', 'Tema', 'Respostas', 'Porcentagem', 'Coesao', 'Termos', 'Exemplos'])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Validação dos domínios de resposta durante a leitura dos dados.
+
+Cada regra associa um conjunto de colunas (por um critério sobre o nome) ao
+conjunto de respostas permitidas. A checagem roda bloco a bloco, junto com a
+leitura do CSV: para cada regra, um único `isin` sobre todas as colunas do
+bloco marca as respostas fora do domínio, e só essas células são guardadas.
+No fim, o relatório agrupa as violações por coluna (valor bruto e número de
+ocorrências) e por linha, de modo que uma mudança no formulário aparece logo,
+em vez de surgir apenas como N menor depois da conversão para NaN.
+"""
+import pandas as pd
+
+# Tamanho do bloco de leitura dos CSVs de respostas
+CHUNK_ROWS = 5000
+
+
+class DomainRule:
+    """Respostas permitidas para as colunas que satisfazem `matches(nome)`."""
+
+    def __init__(self, name, matches, allowed, strip=False):
+        self.name = name
+        self.matches = matches
+        self.allowed = set(allowed)
+        self.strip = strip
+
+
+class DomainValidator:
+    """Acumula, bloco a bloco, as respostas fora do domínio de cada regra."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.rows_checked = 0
+        self._violations = []
+
+    def check(self, chunk):
+        """Valida um bloco; o índice do bloco identifica as linhas no relatório."""
+        self.rows_checked += len(chunk)
+        for rule in self.rules:
+            columns = [col for col in chunk.columns if rule.matches(col)]
+            if not columns:
+                continue
+            block = chunk[columns]
+            if rule.strip:
+                block = block.apply(lambda s: s.str.strip() if pd.api.types.is_string_dtype(s) else s)
+            invalid = block.notna() & ~block.isin(rule.allowed)
+            if not invalid.any().any():
+                continue
+            # Só as células inválidas, com o valor bruto original
+            found = chunk[columns].where(invalid).stack().dropna()
+            found.index.names = ['Indice', 'Coluna']
+            found = found.rename('Valor').reset_index()
+            found['Regra'] = rule.name
+            self._violations.append(found)
+        return chunk
+
+    def violations(self):
+        """Todas as violações encontradas: Indice, Coluna, Valor, Regra."""
+        if not self._violations:
+            return pd.DataFrame(columns=['Indice', 'Coluna', 'Valor', 'Regra'])
+        return pd.concat(self._violations, ignore_index=True)
+
+    def column_report(self):
+        """Valores inválidos agrupados por coluna, com o número de ocorrências."""
+        found = self.violations()
+        if found.empty:
+            return pd.DataFrame(columns=['Regra', 'Coluna', 'Valor', 'Ocorrencias'])
+        found['Valor'] = found['Valor'].astype(str)
+        report = found.groupby(['Regra', 'Coluna', 'Valor'], sort=False).size().rename('Ocorrencias').reset_index()
+        return report.sort_values(['Regra', 'Coluna', 'Ocorrencias'], ascending=[True, True, False], kind='stable')
+
+    def row_report(self):
+        """Violações por linha do CSV (linha 2 = primeira resposta, após o cabeçalho)."""
+        found = self.violations()
+        if found.empty:
+            return pd.DataFrame(columns=['Linha', 'Violacoes', 'Colunas'])
+        grouped = found.groupby('Indice', sort=True)['Coluna']
+        report = pd.DataFrame({'Violacoes': grouped.size(), 'Colunas': grouped.agg(' | '.join)})
+        report.index = report.index + 2
+        report.index.name = 'Linha'
+        return report.reset_index()
+
+    def summary(self):
+        """Resumo de uma linha para o log da etapa."""
+        found = self.violations()
+        if found.empty:
+            return f"Validação: {self.rows_checked} linhas verificadas, nenhuma resposta fora do domínio."
+        return (f"Validação: {len(found)} respostas fora do domínio em {found['Coluna'].nunique()} colunas "
+                f"e {found['Indice'].nunique()} de {self.rows_checked} linhas.")
+
+
+def read_validated_csv(path, validator, chunksize=CHUNK_ROWS, **kwargs):
+    """Lê o CSV em blocos, validando cada bloco na mesma passada."""
+    chunks = [validator.check(chunk) for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs)]
+    if not chunks:
+        return pd.read_csv(path, **kwargs)
+    # Blocos só com NaN numa coluna mudam o tipo inferido; reinferir deixa igual à leitura única
+    return pd.concat(chunks).infer_objects()
+
+
+def write_reports(validator, prefix, writer):
+    """Grava os relatórios por coluna e por linha em `output/<prefix>_colunas.csv` e `_linhas.csv`."""
+    writer.write_csv(validator.column_report(), f"output/{prefix}_colunas.csv", index=False)
+    writer.write_csv(validator.row_report(), f"output/{prefix}_linhas.csv", index=False)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Pesos amostrais por raking (ajuste proporcional iterativo).
+
+As taxas de resposta variam por segmento e tempo de serviço; o raking ajusta
+um peso por respondente até que a distribuição ponderada de cada variável de
+perfil bata com as proporções conhecidas da população (margens).
+
+As margens ficam em `input/margens_populacao.csv`, com as colunas `Pergunta`,
+`Resposta` e `Proporcao` (uma linha por categoria). Sem esse arquivo nenhum
+peso é calculado e as saídas ponderadas não são geradas.
+
+Cada variável vira um vetor de códigos inteiros uma única vez; cada passo do
+ajuste é um `bincount` ponderado mais uma multiplicação indexada sobre todos
+os respondentes, sem laço por respondente ou categoria.
+"""
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from segment_cube import METHODS, split_method
+
+MARGINS_PATH = './input/margens_populacao.csv'
+WEIGHT_COLUMN = 'Peso'
+
+
+def load_margins(path=MARGINS_PATH):
+    """Lê as margens da população como {pergunta: Series(resposta -> proporção)}; None se não houver arquivo."""
+    if not os.path.exists(path):
+        return None
+    margins = pd.read_csv(path)
+    result = {}
+    for column, part in margins.groupby('Pergunta', sort=False):
+        target = part.set_index('Resposta')['Proporcao'].astype(float)
+        result[column] = target / target.sum()
+    return result
+
+
+def rake(data, margins, max_iter=100, tol=1e-6):
+    """Calcula os pesos (média 1) que reproduzem as margens nas colunas presentes em `data`.
+
+    Respondentes sem resposta (ou com resposta fora das margens) numa
+    variável não são ajustados por ela. Retorna (pesos, iterações, convergiu).
+    """
+    weights = np.ones(len(data))
+    columns = [col for col in margins if col in data.columns]
+    if not columns or data.empty:
+        return pd.Series(weights, index=data.index, name=WEIGHT_COLUMN), 0, True
+
+    codes, targets = [], []
+    for col in columns:
+        target = margins[col]
+        col_codes = pd.Categorical(data[col], categories=target.index).codes
+        unknown = data[col].notna() & (col_codes < 0)
+        if unknown.any():
+            warnings.warn(f"{col}: {int(unknown.sum())} respostas fora das margens não entram no ajuste")
+        observed = np.bincount(col_codes[col_codes >= 0], minlength=len(target)) > 0
+        if not observed.all():
+            # Categorias sem respondentes não podem ser atingidas; as demais são renormalizadas
+            warnings.warn(f"{col}: categorias sem respondentes ignoradas: {list(target.index[~observed])}")
+        target = np.where(observed, target.to_numpy(), 0.0)
+        codes.append(col_codes)
+        targets.append(target / target.sum())
+
+    iterations, converged = 0, False
+    for iterations in range(1, max_iter + 1):
+        for col_codes, target in zip(codes, targets):
+            valid = col_codes >= 0
+            totals = np.bincount(col_codes[valid], weights=weights[valid], minlength=len(target))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                factors = np.where(totals > 0, target * totals.sum() / totals, 1.0)
+            weights[valid] *= factors[col_codes[valid]]
+
+        # Maior distância entre a distribuição ponderada e a margem, em todas as variáveis
+        gap = 0.0
+        for col_codes, target in zip(codes, targets):
+            valid = col_codes >= 0
+            totals = np.bincount(col_codes[valid], weights=weights[valid], minlength=len(target))
+            gap = max(gap, np.abs(totals / totals.sum() - target).max())
+        if gap < tol:
+            converged = True
+            break
+
+    weights *= len(weights) / weights.sum()
+    return pd.Series(weights, index=data.index, name=WEIGHT_COLUMN), iterations, converged
+
+
+def weighted_means(data, likert_columns, weights):
+    """Médias Likert ponderadas no formato pergunta x método (como `medias_*.csv`)."""
+    likert_columns = [col for col in likert_columns if col in data.columns]
+    values = data[likert_columns].to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    w = np.asarray(weights, dtype=float)
+    # Somas e pesos válidos de todas as colunas em dois produtos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = (w @ np.where(valid, values, 0.0)) / (w @ valid)
+
+    frame = pd.DataFrame([split_method(col) for col in likert_columns], columns=['Pergunta', 'Metodo'])
+    frame['Media'] = means
+    table = frame.pivot_table(index='Pergunta', columns='Metodo', values='Media', sort=False, dropna=False)
+    table.index.name = None
+    table.columns.name = None
+    return table.reindex(columns=METHODS)
+
+
+def design_effect(weights):
+    """Efeito de desenho de Kish (1 + CV² dos pesos) e o N efetivo correspondente."""
+    w = np.asarray(weights, dtype=float)
+    n_effective = w.sum() ** 2 / (w ** 2).sum()
+    return len(w) / n_effective, n_effective